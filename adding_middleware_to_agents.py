@@ -1,12 +1,17 @@
 import asyncio
 import os
-from typing import Annotated
+from typing import Annotated, Optional
 
 from azure.identity.aio import AzureCliCredential
 from agent_framework.azure import AzureAIAgentClient
 from agent_framework import ai_function, ChatMessage, Role
 from agent_framework._middleware import chat_middleware, ChatContext
 
+from credential_cache import CachedAsyncCredential
+from instrumentation import Instrumentation
+from response_cache import ResponseCache, response_cache_middleware
+from single_flight import SingleFlight, single_flight_middleware
+
 
 @ai_function
 def GetDateTime() -> Annotated[str, "Returns the current date/time in ISO format"]:
@@ -18,12 +23,17 @@ async def adding_middleware_to_agents(
 	deployment_name: str,
 	joker_instructions: str,
 	joker_name: str,
+	instrumentation: Optional[Instrumentation] = None,
 ) -> None:
 	"""
 	Python equivalent of the C# AddingMiddlewareToAgents sample.
 
 	- Creates an agent with a Python function tool (`GetDateTime`)
 	- Adds a custom run middleware
+	- Adds a response cache middleware so repeated prompts skip the model call
+	- Adds single-flight coalescing so identical runs in flight at once share one call
+	- Records per-stage latency (agent run, middleware own time, model request, tools)
+	  and prints p50/p95/p99; pass `instrumentation` to export or sample differently
 	- Runs the agent once and prints the response
 	- Cleans up the agent
 	"""
@@ -35,7 +45,7 @@ async def adding_middleware_to_agents(
 	)
 	os.environ.setdefault("AZURE_AI_MODEL_DEPLOYMENT_NAME", deployment_name)
 
-	async with AzureCliCredential() as credential:
+	async with CachedAsyncCredential(AzureCliCredential()) as credential:
 		client = AzureAIAgentClient(credential=credential)
 
 		# Define a custom chat middleware using the framework decorator.
@@ -60,16 +70,35 @@ async def adding_middleware_to_agents(
 
 			# Post-processing: no-op, but could normalize context.result
 
+		# Cache after the custom middleware so the key sees the rewritten prompt.
+		# Pass `path=` to keep entries on disk across runs.
+		cache = ResponseCache(max_entries=256, ttl=60)
+
+		# The cache serves repeats of finished runs; this covers duplicates still in flight
+		flights = SingleFlight()
+
+		# Sampling only limits which traces keep span objects; histograms see every run
+		instr = instrumentation or Instrumentation(sample_rate=1.0)
+
 		# Create the agent with the tool and middleware
 		async with client.create_agent(
 			name=joker_name,
 			instructions=joker_instructions,
 			tools=[GetDateTime],
-			middleware=CustomAgentChatMiddleware,
+			middleware=[
+				instr.agent_middleware(),
+				instr.instrument(single_flight_middleware(flights), "single_flight"),
+				instr.instrument(CustomAgentChatMiddleware),
+				instr.instrument(response_cache_middleware(cache, scope=joker_name), "response_cache"),
+				instr.chat_middleware(),
+				instr.function_middleware(),
+			],
 		) as agent:
 			response = await agent.run("What's the current time?")
 			print(response.text or "<no assistant reply>")
 
+		print(instr.summary())
+
 
 def main() -> None:
 	asyncio.run(
@@ -0,0 +1,271 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import time
+from contextlib import AsyncExitStack
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from azure.identity.aio import AzureCliCredential
+from agent_framework.azure import AzureAIAgentClient
+
+from agent_daemon_client import default_socket_path
+from agent_pool import AgentPool
+from credential_cache import CachedAsyncCredential
+from fake_backend import FakeBackend
+from instrumentation import Histogram
+from response_cache import cache_key
+from shared_transport import shared_transports
+from single_flight import SingleFlight
+
+
+DEFAULT_NAME = "DaemonAgent"
+DEFAULT_INSTRUCTIONS = "You are a helpful assistant."
+
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class AgentDaemon:
+	"""
+	Resident agent server: one credential, client and `AgentPool` shared by every request.
+
+	- Listens on a Unix socket (mode 0600) for newline-delimited JSON requests:
+	  `{"op": "run", "prompt": ..., "name": ..., "instructions": ..., "stream": bool}`,
+	  `{"op": "stats"}` and `{"op": "ping"}`
+	- Agents are leased from the pool by (name, instructions), so repeat callers
+	  skip provisioning; connections may send any number of requests
+	- Identical runs in flight at the same time (same agent spec, prompt and
+	  mode) share one model call; streamed deltas fan out to every caller
+	- Every reply ends with a line carrying `"done": true`; failures send
+	  `{"error": ..., "done": true}` and keep the connection open
+	"""
+
+	def __init__(
+		self,
+		pool: AgentPool,
+		socket_path: Optional[str] = None,
+		name: str = DEFAULT_NAME,
+		instructions: str = DEFAULT_INSTRUCTIONS,
+	) -> None:
+		self.pool = pool
+		self.socket_path = socket_path or default_socket_path()
+		self.name = name
+		self.instructions = instructions
+		self.latency = Histogram()
+		self.flights = SingleFlight()
+		self.requests = 0
+		self.errors = 0
+		self._started = time.monotonic()
+		self._server: Optional[asyncio.AbstractServer] = None
+		self._writers: Set[asyncio.StreamWriter] = set()
+
+	async def start(self) -> None:
+		if os.path.exists(self.socket_path):
+			if _socket_alive(self.socket_path):
+				raise RuntimeError(f"an agent daemon is already listening on {self.socket_path}")
+			# Left behind by a daemon that did not shut down cleanly
+			os.unlink(self.socket_path)
+		previous = os.umask(0o177)
+		try:
+			self._server = await asyncio.start_unix_server(self._serve_connection, path=self.socket_path)
+		finally:
+			os.umask(previous)
+
+	async def close(self) -> None:
+		if self._server is None:
+			return
+		self._server.close()
+		for writer in list(self._writers):
+			writer.close()
+		await self._server.wait_closed()
+		self._server = None
+		if os.path.exists(self.socket_path):
+			os.unlink(self.socket_path)
+
+	async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+		self._writers.add(writer)
+
+		async def send(message: Dict[str, Any]) -> None:
+			writer.write(json.dumps(message).encode("utf-8") + b"\n")
+			await writer.drain()
+
+		try:
+			while True:
+				line = await reader.readline()
+				if not line:
+					return
+				try:
+					request = json.loads(line)
+					await self._dispatch(request, send)
+				except (ConnectionError, asyncio.CancelledError):
+					raise
+				except Exception as e:
+					self.errors += 1
+					await send({"error": f"{type(e).__name__}: {e}", "done": True})
+		except ConnectionError:
+			pass
+		finally:
+			self._writers.discard(writer)
+			writer.close()
+
+	async def _dispatch(self, request: Dict[str, Any], send: Send) -> None:
+		op = request.get("op", "run")
+		if op == "run":
+			await self._run(request, send)
+		elif op == "stats":
+			await send({**self.stats(), "done": True})
+		elif op == "ping":
+			await send({"done": True})
+		else:
+			raise ValueError(f"unknown op {op!r}")
+
+	async def _run(self, request: Dict[str, Any], send: Send) -> None:
+		prompt = request.get("prompt")
+		if not isinstance(prompt, str) or not prompt:
+			raise ValueError("run requests need a non-empty 'prompt'")
+		spec = {
+			"name": request.get("name") or self.name,
+			"instructions": request.get("instructions") or self.instructions,
+		}
+		started = time.perf_counter()
+		self.requests += 1
+		stream = bool(request.get("stream"))
+		key = cache_key([prompt], instructions=spec["instructions"], scope=f"{spec['name']}|{'stream' if stream else 'run'}")
+		if stream:
+			parts = []
+			async for delta in self.flights.stream(key, lambda: self._stream(spec, prompt)):
+				parts.append(delta)
+				await send({"delta": delta})
+			text = "".join(parts)
+		else:
+			text = await self.flights.do(key, lambda: self._run_text(spec, prompt))
+		elapsed = time.perf_counter() - started
+		self.latency.record(elapsed)
+		await send({"text": text, "elapsed_ms": round(elapsed * 1000, 3), "done": True})
+
+	async def _run_text(self, spec: Dict[str, str], prompt: str) -> str:
+		async with self.pool.lease(**spec) as agent:
+			return (await agent.run(prompt)).text
+
+	async def _stream(self, spec: Dict[str, str], prompt: str) -> AsyncIterator[str]:
+		async with self.pool.lease(**spec) as agent:
+			async for update in agent.run_stream(prompt):
+				if update.text:
+					yield update.text
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"requests": self.requests,
+			"errors": self.errors,
+			"connections": len(self._writers),
+			"uptime_s": round(time.monotonic() - self._started, 1),
+			"p50_ms": round(self.latency.percentile(0.5) * 1000, 3),
+			"p95_ms": round(self.latency.percentile(0.95) * 1000, 3),
+			"p99_ms": round(self.latency.percentile(0.99) * 1000, 3),
+			"pool": self.pool.stats(),
+			"single_flight": self.flights.stats(),
+			"http": shared_transports().snapshot(),
+		}
+
+
+def _socket_alive(path: str) -> bool:
+	probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	try:
+		probe.connect(path)
+		return True
+	except OSError:
+		return False
+	finally:
+		probe.close()
+
+
+def _client_and_credential(deployment_name: str, backend: Optional[FakeBackend]) -> Tuple[Any, Any]:
+	"""`(credential, client factory)`; `backend` swaps in the offline fake."""
+	if backend is not None:
+		return CachedAsyncCredential(backend.async_credential()), lambda credential: backend.chat_client()
+	# Ensure Azure AI Projects endpoint and model deployment are available via env vars
+	os.environ.setdefault(
+		"AZURE_AI_PROJECT_ENDPOINT",
+		"https://<your-microsoft-foundry>.services.ai.azure.com/api/projects/proj-default",
+	)
+	os.environ.setdefault("AZURE_AI_MODEL_DEPLOYMENT_NAME", deployment_name)
+	return CachedAsyncCredential(AzureCliCredential()), lambda credential: AzureAIAgentClient(
+		agents_client=shared_transports().agents_client(credential), credential=credential
+	)
+
+
+async def serve(
+	deployment_name: str,
+	socket_path: Optional[str] = None,
+	name: str = DEFAULT_NAME,
+	instructions: str = DEFAULT_INSTRUCTIONS,
+	pool_size: int = 32,
+	idle_ttl: float = 600.0,
+	backend: Optional[FakeBackend] = None,
+) -> None:
+	"""Run the daemon until SIGINT/SIGTERM, then close the pooled agents and credential."""
+	credential, make_client = _client_and_credential(deployment_name, backend)
+	async with AsyncExitStack() as stack:
+		await stack.enter_async_context(shared_transports().scope())
+		credential = await stack.enter_async_context(credential)
+		pool = await stack.enter_async_context(AgentPool(make_client(credential), max_size=pool_size, idle_ttl=idle_ttl))
+		daemon = AgentDaemon(pool, socket_path, name=name, instructions=instructions)
+		await daemon.start()
+		stack.push_async_callback(daemon.close)
+
+		stop = asyncio.Event()
+		loop = asyncio.get_running_loop()
+		for sig in (signal.SIGINT, signal.SIGTERM):
+			loop.add_signal_handler(sig, stop.set)
+		print(f"agent daemon listening on {daemon.socket_path}", flush=True)
+
+		# Lease checkins only evict when there is traffic; sweep idle agents on a timer too
+		while not stop.is_set():
+			try:
+				await asyncio.wait_for(stop.wait(), timeout=max(1.0, idle_ttl / 2))
+			except asyncio.TimeoutError:
+				await pool.evict_idle()
+		print(f"agent daemon stopping: {json.dumps(daemon.stats())}", flush=True)
+
+
+async def run_once(
+	deployment_name: str,
+	prompt: str,
+	name: str = DEFAULT_NAME,
+	instructions: str = DEFAULT_INSTRUCTIONS,
+	backend: Optional[FakeBackend] = None,
+) -> str:
+	"""The per-invocation path the daemon replaces: full setup, one run, full teardown."""
+	credential, make_client = _client_and_credential(deployment_name, backend)
+	async with shared_transports().scope(), credential:
+		client = make_client(credential)
+		async with client.create_agent(name=name, instructions=instructions) as agent:
+			return (await agent.run(prompt)).text
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Resident agent daemon (see agent_daemon_client.py for the client)")
+	parser.add_argument("--socket", default=default_socket_path())
+	parser.add_argument("--deployment", default="gpt-4.1")
+	parser.add_argument("--name", default=DEFAULT_NAME)
+	parser.add_argument("--instructions", default=DEFAULT_INSTRUCTIONS)
+	parser.add_argument("--pool-size", type=int, default=32)
+	parser.add_argument("--idle-ttl", type=float, default=600.0, help="seconds before an unused agent is deleted")
+	parser.add_argument("--fake", action="store_true", help="serve from the offline fake backend")
+	parser.add_argument("--latency", type=float, default=0.05, help="with --fake: time to first token (seconds)")
+	parser.add_argument("--once", metavar="PROMPT", help="no daemon: set up, run PROMPT, tear down and exit")
+	args = parser.parse_args()
+
+	backend = FakeBackend(latency=args.latency) if args.fake else None
+	if args.once is not None:
+		print(asyncio.run(run_once(args.deployment, args.once, args.name, args.instructions, backend)))
+		return
+	asyncio.run(
+		serve(args.deployment, args.socket, args.name, args.instructions, args.pool_size, args.idle_ttl, backend)
+	)
+
+
+if __name__ == "__main__":
+	main()
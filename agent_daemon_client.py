@@ -0,0 +1,178 @@
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+# Standard library only: this runs once per cron/webhook invocation, so it must
+# start in tens of milliseconds. The SDKs live in the daemon (agent_daemon.py).
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def default_socket_path() -> str:
+	"""`$AGENT_DAEMON_SOCKET`, else a per-user socket in `$XDG_RUNTIME_DIR` or the temp dir."""
+	configured = os.environ.get("AGENT_DAEMON_SOCKET")
+	if configured:
+		return configured
+	directory = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+	return os.path.join(directory, f"agent-daemon-{os.getuid()}.sock")
+
+
+class DaemonError(RuntimeError):
+	pass
+
+
+class DaemonClient:
+	"""
+	Thin client for `agent_daemon.py`: newline-delimited JSON over a Unix socket.
+
+	- One connection is reused for every request made through this client
+	- Each request gets zero or more `{"delta": ...}` lines and one final line
+	  with `"done": true` (or `"error"`)
+
+		with DaemonClient() as daemon:
+			print(daemon.run("Tell me a joke")["text"])
+	"""
+
+	def __init__(self, path: Optional[str] = None, timeout: Optional[float] = 300.0) -> None:
+		self.path = path or default_socket_path()
+		self.timeout = timeout
+		self._sock: Optional[socket.socket] = None
+		self._file = None
+
+	def _connect(self) -> None:
+		if self._sock is not None:
+			return
+		sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		sock.settimeout(self.timeout)
+		try:
+			sock.connect(self.path)
+		except OSError as e:
+			sock.close()
+			raise DaemonError(f"agent daemon not reachable at {self.path}: {e}") from e
+		self._sock = sock
+		self._file = sock.makefile("rwb")
+
+	def request(self, payload: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+		"""Send one request and yield its reply lines, ending with the `done` line."""
+		self._connect()
+		self._file.write(json.dumps(payload).encode("utf-8") + b"\n")
+		self._file.flush()
+		while True:
+			line = self._file.readline()
+			if not line:
+				self.close()
+				raise DaemonError("agent daemon closed the connection")
+			message = json.loads(line)
+			if "error" in message:
+				raise DaemonError(message["error"])
+			yield message
+			if message.get("done"):
+				return
+
+	def run(self, prompt: str, name: Optional[str] = None, instructions: Optional[str] = None) -> Dict[str, Any]:
+		"""`{"text": ..., "elapsed_ms": ...}` for one non-streaming run."""
+		payload = {"op": "run", "prompt": prompt, "name": name, "instructions": instructions}
+		return list(self.request(payload))[-1]
+
+	def stream(self, prompt: str, name: Optional[str] = None, instructions: Optional[str] = None) -> Iterator[str]:
+		payload = {"op": "run", "prompt": prompt, "name": name, "instructions": instructions, "stream": True}
+		for message in self.request(payload):
+			if "delta" in message:
+				yield message["delta"]
+
+	def stats(self) -> Dict[str, Any]:
+		return list(self.request({"op": "stats"}))[-1]
+
+	def close(self) -> None:
+		if self._file is not None:
+			self._file.close()
+			self._file = None
+		if self._sock is not None:
+			self._sock.close()
+			self._sock = None
+
+	def __enter__(self) -> "DaemonClient":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+
+def _timed(command: List[str]) -> float:
+	started = time.perf_counter()
+	subprocess.run(command, check=True, stdout=subprocess.DEVNULL, cwd=HERE)
+	return time.perf_counter() - started
+
+
+def compare(prompt: str, iterations: int, socket_path: str, daemon_args: List[str]) -> None:
+	"""
+	Per-invocation wall time as a cron/webhook caller sees it: a fresh process
+	that does the full setup (`agent_daemon.py --once`) vs a fresh thin client
+	forwarding to the running daemon.
+	"""
+	cold = [sys.executable, os.path.join(HERE, "agent_daemon.py"), "--once", prompt, *daemon_args]
+	warm = [sys.executable, os.path.abspath(__file__), "--socket", socket_path, prompt]
+	with DaemonClient(socket_path) as daemon:
+		before = daemon.stats()
+	timings: Dict[str, List[float]] = {"without daemon": [], "with daemon": []}
+	for _ in range(iterations):
+		timings["without daemon"].append(_timed(cold))
+		timings["with daemon"].append(_timed(warm))
+	with DaemonClient(socket_path) as daemon:
+		after = daemon.stats()
+
+	print(f"{'per invocation':<16} {'p50 ms':>9} {'mean ms':>9} {'min ms':>9}")
+	for label, samples in timings.items():
+		ordered = sorted(samples)
+		print(
+			f"{label:<16} {ordered[len(ordered) // 2] * 1000:9.1f} "
+			f"{sum(ordered) / len(ordered) * 1000:9.1f} {ordered[0] * 1000:9.1f}"
+		)
+	served = after["requests"] - before["requests"]
+	print(f"\ndaemon served {served} runs; server-side p50 {after['p50_ms']:.1f} ms, pool {after['pool']}")
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Send a prompt to the resident agent daemon")
+	parser.add_argument("prompt", nargs="?")
+	parser.add_argument("--socket", default=default_socket_path())
+	parser.add_argument("--name", default=None, help="agent name (default: the daemon's)")
+	parser.add_argument("--instructions", default=None, help="agent instructions (default: the daemon's)")
+	parser.add_argument("--stream", action="store_true")
+	parser.add_argument("--stats", action="store_true", help="print daemon stats and exit")
+	parser.add_argument("--compare", type=int, metavar="N", help="time N invocations with and without the daemon")
+	parser.add_argument(
+		"--daemon-args", default="", help="extra agent_daemon.py arguments for the no-daemon runs of --compare, e.g. --daemon-args=--fake"
+	)
+	args = parser.parse_args()
+
+	try:
+		if args.stats:
+			with DaemonClient(args.socket) as daemon:
+				print(json.dumps(daemon.stats(), indent=2))
+			return
+		if args.prompt is None:
+			parser.error("prompt is required")
+		if args.compare:
+			compare(args.prompt, args.compare, args.socket, args.daemon_args.split())
+			return
+		with DaemonClient(args.socket) as daemon:
+			if args.stream:
+				for delta in daemon.stream(args.prompt, args.name, args.instructions):
+					print(delta, end="", flush=True)
+				print()
+			else:
+				print(daemon.run(args.prompt, args.name, args.instructions)["text"])
+	except DaemonError as e:
+		print(f"ERROR: {e}", file=sys.stderr)
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
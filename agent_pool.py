@@ -0,0 +1,253 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+
+def _tool_identity(tool: Any) -> str:
+	return str(getattr(tool, "name", None) or getattr(tool, "__name__", None) or repr(tool))
+
+
+def agent_key(**spec: Any) -> str:
+	"""
+	Stable hash of an agent definition (name, instructions, tools, model, ...).
+
+	Tools are identified by name so the same function tool maps to the same key
+	across runs; other values are hashed through canonical JSON.
+	"""
+	canonical = dict(spec)
+	if canonical.get("tools") is not None:
+		tools = canonical["tools"]
+		tools = tools if isinstance(tools, (list, tuple)) else [tools]
+		canonical["tools"] = sorted(_tool_identity(t) for t in tools)
+	payload = json.dumps(canonical, sort_keys=True, default=repr, separators=(",", ":"))
+	return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Entry:
+	__slots__ = ("agent", "release", "leases", "last_used")
+
+	def __init__(self, agent: Any, release: Any) -> None:
+		self.agent = agent
+		self.release = release
+		self.leases = 0
+		self.last_used = time.monotonic()
+
+
+class _KeyLock:
+	"""Serializes creation of one key; dropped once nobody is creating or waiting."""
+
+	__slots__ = ("lock", "users")
+
+	def __init__(self) -> None:
+		self.lock = threading.Lock()
+		self.users = 0
+
+
+class _PoolIndex:
+	"""LRU/TTL bookkeeping shared by the sync and async pools."""
+
+	def __init__(self, max_size: int, idle_ttl: Optional[float]) -> None:
+		self.max_size = max_size
+		self.idle_ttl = idle_ttl
+		self.entries: "OrderedDict[str, _Entry]" = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	def checkout(self, key: str) -> Optional[_Entry]:
+		entry = self.entries.get(key)
+		if entry is not None:
+			self.entries.move_to_end(key)
+			entry.leases += 1
+			self.hits += 1
+		return entry
+
+	def add(self, key: str, entry: _Entry) -> None:
+		entry.leases += 1
+		self.entries[key] = entry
+		self.misses += 1
+
+	def checkin(self, entry: _Entry) -> None:
+		entry.leases -= 1
+		entry.last_used = time.monotonic()
+
+	def evictions(self, everything: bool = False) -> List[_Entry]:
+		"""Pop entries that are idle past the TTL, or least-recently used beyond `max_size`."""
+		now = time.monotonic()
+		evicted = []
+		for key, entry in list(self.entries.items()):
+			if entry.leases:
+				continue
+			expired = self.idle_ttl is not None and now - entry.last_used >= self.idle_ttl
+			if everything or expired or len(self.entries) > self.max_size:
+				evicted.append(self.entries.pop(key))
+		return evicted
+
+	def stats(self) -> Dict[str, int]:
+		return {
+			"size": len(self.entries),
+			"leased": sum(1 for e in self.entries.values() if e.leases),
+			"hits": self.hits,
+			"misses": self.misses,
+		}
+
+
+class AgentPool:
+	"""
+	Keeps `client.create_agent(...)` agents warm across runs.
+
+	- Agents are keyed by `agent_key(name=..., instructions=..., tools=..., ...)`
+	- `lease(...)` hands out an already-provisioned agent, creating it on first use
+	- Idle agents are closed (deleting their server-side agent) after `idle_ttl`
+	  seconds or when more than `max_size` are pooled; `aclose()` closes the rest
+	"""
+
+	def __init__(self, client: Any, max_size: int = 32, idle_ttl: Optional[float] = 600.0) -> None:
+		self.client = client
+		self._index = _PoolIndex(max_size, idle_ttl)
+		self._creating: Dict[str, asyncio.Future] = {}
+		self._lock = asyncio.Lock()
+
+	@asynccontextmanager
+	async def lease(self, **spec: Any) -> AsyncIterator[Any]:
+		entry = await self._checkout(agent_key(**spec), spec)
+		try:
+			yield entry.agent
+		finally:
+			self._index.checkin(entry)
+			await self.evict_idle()
+
+	async def _checkout(self, key: str, spec: Dict[str, Any]) -> _Entry:
+		async with self._lock:
+			entry = self._index.checkout(key)
+			if entry is not None:
+				return entry
+			pending = self._creating.get(key)
+			if pending is None:
+				pending = asyncio.get_running_loop().create_future()
+				self._creating[key] = pending
+				owner = True
+			else:
+				owner = False
+
+		if not owner:
+			# Another task is provisioning the same agent: wait for it, then lease it
+			await asyncio.shield(pending)
+			return await self._checkout(key, spec)
+
+		try:
+			stack = AsyncExitStack()
+			agent = await stack.enter_async_context(self.client.create_agent(**spec))
+			entry = _Entry(agent, stack)
+			async with self._lock:
+				self._index.add(key, entry)
+			pending.set_result(None)
+			return entry
+		except BaseException as exc:
+			pending.set_exception(exc)
+			# Mark retrieved so an unobserved failure does not log a warning
+			pending.exception()
+			raise
+		finally:
+			self._creating.pop(key, None)
+
+	async def evict_idle(self) -> None:
+		async with self._lock:
+			evicted = self._index.evictions()
+		for entry in evicted:
+			await entry.release.aclose()
+
+	def stats(self) -> Dict[str, int]:
+		return self._index.stats()
+
+	async def aclose(self) -> None:
+		async with self._lock:
+			evicted = self._index.evictions(everything=True)
+		for entry in evicted:
+			await entry.release.aclose()
+
+	async def __aenter__(self) -> "AgentPool":
+		return self
+
+	async def __aexit__(self, *exc) -> None:
+		await self.aclose()
+
+
+class SyncAgentPool:
+	"""
+	Thread-safe counterpart of `AgentPool` for the synchronous `AIProjectClient` samples.
+
+	`create(**spec)` provisions an agent and `delete(agent)` removes it; the pool
+	decides when each is called.
+	"""
+
+	def __init__(
+		self,
+		create: Callable[..., Any],
+		delete: Callable[[Any], None],
+		max_size: int = 32,
+		idle_ttl: Optional[float] = 600.0,
+	) -> None:
+		self._create = create
+		self._delete = delete
+		self._index = _PoolIndex(max_size, idle_ttl)
+		self._lock = threading.Lock()
+		# Only keys being created have a lock, so this stays as small as the concurrency
+		self._creating: Dict[str, _KeyLock] = {}
+
+	@contextmanager
+	def lease(self, **spec: Any) -> Iterator[Any]:
+		key = agent_key(**spec)
+		with self._lock:
+			entry = self._index.checkout(key)
+			if entry is None:
+				key_lock = self._creating.get(key)
+				if key_lock is None:
+					key_lock = self._creating[key] = _KeyLock()
+				key_lock.users += 1
+		if entry is None:
+			try:
+				with key_lock.lock:
+					with self._lock:
+						entry = self._index.checkout(key)
+					if entry is None:
+						entry = _Entry(self._create(**spec), None)
+						with self._lock:
+							self._index.add(key, entry)
+			finally:
+				with self._lock:
+					key_lock.users -= 1
+					if key_lock.users == 0:
+						del self._creating[key]
+		try:
+			yield entry.agent
+		finally:
+			with self._lock:
+				self._index.checkin(entry)
+			self.evict_idle()
+
+	def evict_idle(self) -> None:
+		with self._lock:
+			evicted = self._index.evictions()
+		for entry in evicted:
+			self._delete(entry.agent)
+
+	def stats(self) -> Dict[str, int]:
+		with self._lock:
+			return self._index.stats()
+
+	def close(self) -> None:
+		with self._lock:
+			evicted = self._index.evictions(everything=True)
+		for entry in evicted:
+			self._delete(entry.agent)
+
+	def __enter__(self) -> "SyncAgentPool":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
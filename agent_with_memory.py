@@ -1,16 +1,77 @@
+import os
 import time
 import traceback
+from typing import Callable, Optional, Sequence, Tuple
 
 from azure.identity import AzureCliCredential
 from azure.ai.projects import AIProjectClient
-from azure.ai.projects.models import PromptAgentDefinition, AgentKind
+from azure.ai.projects.models import PromptAgentDefinition, AgentKind, ResponsesUserMessageItemParam
 
+from agent_pool import SyncAgentPool
+from credential_cache import CachedCredential
+from local_memory import LocalMemory
+from memory_readiness import fact_probe, indexing_lag, wait_until_ready
+from shared_transport import shared_transports
 
-def _run_and_print_response(openai_client, model: str, instructions: str, conversation_id: str, user_text: str) -> None:
+
+def prompt_agent_pool(client: AIProjectClient, **kwargs) -> SyncAgentPool:
+	"""Pool prompt agents (`client.agents.create`) keyed by name, model and instructions."""
+
+	def _create(name: str, model: str, instructions: str):
+		definition = PromptAgentDefinition()
+		definition["kind"] = AgentKind.PROMPT
+		definition["model"] = model
+		definition["instructions"] = instructions
+		return client.agents.create(name=name, definition=definition)
+
+	return SyncAgentPool(create=_create, delete=lambda agent: client.agents.delete(agent.id), **kwargs)
+
+
+SEED_TURNS = (
+	"Hi there! My name is Taylor and I'm planning a hiking trip to Patagonia in November.",
+	"I'm travelling with my sister and we love finding scenic viewpoints.",
+)
+# Distinctive fragment of the seed turns to look for in the memory store
+SEED_FACT = "Patagonia"
+
+
+def memory_store_probe(client: AIProjectClient, store: str, scope: str, fact: str = SEED_FACT) -> Callable[[str], bool]:
+	"""`memory_probe` that searches memory store `store` in `scope` for `fact`."""
+
+	def _search():
+		result = client.memory_stores.search_memories(name=store, scope=scope)
+		return [item.memory_item.content for item in result.memories]
+
+	probe = fact_probe(_search, fact)
+	return lambda conversation_id: probe()
+
+
+def _remember_in_store(client: AIProjectClient, store: str, scope: str, texts: Sequence[str]) -> None:
+	"""Submit user turns to the memory store; extraction runs server-side, which is the lag waited on."""
+	client.memory_stores.begin_update_memories(
+		name=store,
+		scope=scope,
+		items=[ResponsesUserMessageItemParam(content=text) for text in texts],
+		update_delay=0,
+	)
+
+
+def _run_and_print_response(
+	openai_client,
+	model: str,
+	instructions: str,
+	conversation_id: str,
+	user_text: str,
+	local_memory: Optional[LocalMemory] = None,
+) -> None:
 	"""
 	Helper: create a response tied to a given conversation and print the output text.
 	Uses the OpenAI Responses API which is supported in the Azure AI Projects client.
+	With `local_memory`, relevant memories are injected into the instructions and
+	facts from `user_text` are stored locally.
 	"""
+	if local_memory is not None:
+		instructions = local_memory.instructions_for(instructions, user_text)
 	resp = openai_client.responses.create(
 		model=model,
 		instructions=instructions,
@@ -21,22 +82,52 @@ def _run_and_print_response(openai_client, model: str, instructions: str, conver
 		print(resp.output_text)
 	else:
 		print(resp)
-
-
-def agent_with_memory(endpoint: str, deployment_name: str) -> None:
+	if local_memory is not None:
+		local_memory.remember(user_text)
+
+
+def agent_with_memory(
+	endpoint: str,
+	deployment_name: str,
+	client: Optional[AIProjectClient] = None,
+	pool: Optional[SyncAgentPool] = None,
+	memory_probe: Optional[Callable[[str], bool]] = None,
+	readiness_deadline: float = 10.0,
+	local_memory: Optional[LocalMemory] = None,
+	fallback_delay: float = 2.0,
+	memory_store: Optional[str] = None,
+	memory_scope: str = "taylor",
+) -> None:
 	"""
 	Python version of the C# AgentWithMemory sample using azure-ai-projects.
 
 	- Creates an agent with instructions and name
 	- Starts a thread, sends two messages introducing personal trip details
-	- Waits briefly to allow memory indexing
+	- With `memory_store` (an existing project memory store), sends the turns to it
+	  under `memory_scope` and polls it for them (`memory_store_probe`)
+	- Waits until memory reflects the new turns: `memory_probe(conversation_id)`
+	  searches the memory store for a just-written fact and is polled with backoff
+	  up to `readiness_deadline`; with no probe at all, waits a fixed `fallback_delay`.
+	  With `local_memory`, recalls facts client-side and skips the wait entirely
 	- Asks what the agent already knows about the upcoming trip
 	- Demonstrates persisted state by "serializing" (saving thread id) and "deserializing" (reusing it)
 	- Starts a new thread in the same agent/memory scope and asks for a summary
-	- Deletes the agent at the end
+	- Deletes the agent at the end, unless a long-lived `pool` is passed in to keep it warm
 	"""
-	print("Initializing AIProjectClient...")
-	client = AIProjectClient(endpoint=endpoint, credential=AzureCliCredential())
+	if client is None:
+		print("Initializing AIProjectClient...")
+		client = AIProjectClient(
+			endpoint=endpoint,
+			credential=CachedCredential(AzureCliCredential()),
+			transport=shared_transports().sync_transport(),
+		)
+
+	if memory_store is not None and memory_probe is None:
+		memory_probe = memory_store_probe(client, memory_store, memory_scope)
+
+	owns_pool = pool is None
+	if owns_pool:
+		pool = prompt_agent_pool(client)
 
 	options_instructions = (
 		"You are a friendly travel assistant. "
@@ -44,90 +135,114 @@ def agent_with_memory(endpoint: str, deployment_name: str) -> None:
 	)
 	options_name = "AgentWithMemory"
 
-	agent = None
 	try:
-		print("Creating agent...")
-		# Create the agent (assistant) with the given model
-		definition = PromptAgentDefinition()
-		definition["kind"] = AgentKind.PROMPT
-		definition["model"] = deployment_name
-		definition["instructions"] = options_instructions
-
-		agent = client.agents.create(
-			name=options_name,
-			definition=definition,
-		)
-
-		# Use the OpenAI-compatible client for conversations/responses
-		oc = client.get_openai_client()
-
-		print("Creating conversation...")
-		conv = oc.conversations.create()
-
-		# Initial messages to seed personal details
-		_run_and_print_response(
-			oc,
-			model=deployment_name,
-			instructions=options_instructions,
-			conversation_id=conv.id,
-			user_text=(
-				"Hi there! My name is Taylor and I'm planning a hiking trip "
-				"to Patagonia in November."
-			),
-		)
+		print("Leasing agent...")
+		with pool.lease(name=options_name, model=deployment_name, instructions=options_instructions):
+			_converse(
+				client,
+				deployment_name,
+				options_instructions,
+				memory_probe,
+				readiness_deadline,
+				local_memory,
+				fallback_delay,
+				(memory_store, memory_scope) if memory_store is not None else None,
+			)
+	finally:
+		if owns_pool:
+			print("Deleting agent...")
+			pool.close()
+
+
+def _converse(
+	client: AIProjectClient,
+	deployment_name: str,
+	options_instructions: str,
+	memory_probe: Optional[Callable[[str], bool]] = None,
+	readiness_deadline: float = 10.0,
+	local_memory: Optional[LocalMemory] = None,
+	fallback_delay: float = 2.0,
+	memory_store: Optional[Tuple[str, str]] = None,
+) -> None:
+	# Use the OpenAI-compatible client for conversations/responses
+	oc = shared_transports().openai_client(client)
+
+	print("Creating conversation...")
+	conv = oc.conversations.create()
+
+	# Initial messages to seed personal details
+	for user_text in SEED_TURNS:
 		_run_and_print_response(
 			oc,
 			model=deployment_name,
 			instructions=options_instructions,
 			conversation_id=conv.id,
-			user_text=(
-				"I'm travelling with my sister and we love finding scenic viewpoints."
-			),
+			local_memory=local_memory,
+			user_text=user_text,
 		)
+	if memory_store is not None and local_memory is None:
+		_remember_in_store(client, *memory_store, SEED_TURNS)
 
-		print("\nWaiting briefly for Mem0 to index the new memories...\n")
-		time.sleep(2)
-
-		_run_and_print_response(
-			oc,
-			model=deployment_name,
-			instructions=options_instructions,
-			conversation_id=conv.id,
-			user_text=("What do you already know about my upcoming trip?"),
-		)
+	if local_memory is not None:
+		print(f"\nLocal memory holds {len(local_memory.index)} facts; no indexing wait needed\n")
+	else:
+		print("\nWaiting for Mem0 to index the new memories...\n")
+		written_at = time.monotonic()
+		if memory_probe is None:
+			# Nothing to observe: the conversation lists its items long before memory is extracted
+			time.sleep(min(fallback_delay, readiness_deadline))
+			print(f"Waited {time.monotonic() - written_at:.2f}s without a memory probe\n")
+		else:
+			readiness = wait_until_ready(lambda: memory_probe(conv.id), deadline=readiness_deadline, since=written_at)
+			if readiness.ready:
+				print(f"Memory ready after {readiness.lag_seconds:.2f}s ({readiness.attempts} checks)\n")
+			else:
+				print(f"Memory not confirmed after {readiness.lag_seconds:.2f}s; continuing\n")
+
+	_run_and_print_response(
+		oc,
+		model=deployment_name,
+		instructions=options_instructions,
+		conversation_id=conv.id,
+		local_memory=local_memory,
+		user_text=("What do you already know about my upcoming trip?"),
+	)
 
-		print("\n>> Serialize and deserialize the thread to demonstrate persisted state\n")
-		serialized_conversation_id = conv.id  # Serialize by storing the conversation id
-		# Reuse the saved conversation id for persistence demonstration
-		restored_conversation_id = serialized_conversation_id
+	print("\n>> Serialize and deserialize the thread to demonstrate persisted state\n")
+	serialized_conversation_id = conv.id  # Serialize by storing the conversation id
+	# Reuse the saved conversation id for persistence demonstration
+	restored_conversation_id = serialized_conversation_id
+
+	_run_and_print_response(
+		oc,
+		model=deployment_name,
+		instructions=options_instructions,
+		conversation_id=restored_conversation_id,
+		local_memory=local_memory,
+		user_text=("Can you recap the personal details you remember?"),
+	)
 
-		_run_and_print_response(
-			oc,
-			model=deployment_name,
-			instructions=options_instructions,
-			conversation_id=restored_conversation_id,
-			user_text=("Can you recap the personal details you remember?"),
-		)
+	print("\n>> Start a new conversation that shares the same Mem0 scope\n")
+	new_conv = oc.conversations.create()
+	_run_and_print_response(
+		oc,
+		model=deployment_name,
+		instructions=options_instructions,
+		conversation_id=new_conv.id,
+		local_memory=local_memory,
+		user_text=("Summarize what you already know about me."),
+	)
 
-		print("\n>> Start a new conversation that shares the same Mem0 scope\n")
-		new_conv = oc.conversations.create()
-		_run_and_print_response(
-			oc,
-			model=deployment_name,
-			instructions=options_instructions,
-			conversation_id=new_conv.id,
-			user_text=("Summarize what you already know about me."),
-		)
-	finally:
-		if agent is not None:
-			print("Deleting agent...")
-			client.agents.delete(agent.id)
+	if local_memory is None and memory_probe is not None:
+		print(f"\nIndexing lag: {indexing_lag.snapshot()}")
 
 
 def main() -> None:
 	endpoint = "https://<your-microsoft-foundry>.services.ai.azure.com/api/projects/proj-default"
 	deployment_name = "gpt-4.1"
-	agent_with_memory(endpoint=endpoint, deployment_name=deployment_name)
+	# An existing memory store in the project; readiness is polled against it
+	memory_store = os.environ.get("AZURE_AI_MEMORY_STORE_NAME", "agent-with-memory")
+	agent_with_memory(endpoint=endpoint, deployment_name=deployment_name, memory_store=memory_store)
 
 
 if __name__ == "__main__":
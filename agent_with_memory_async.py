@@ -0,0 +1,148 @@
+import asyncio
+import inspect
+import time
+import traceback
+from typing import Awaitable, Callable, List, Optional, Sequence, Union
+
+from azure.identity.aio import AzureCliCredential
+from azure.ai.projects.aio import AIProjectClient
+from azure.ai.projects.models import PromptAgentDefinition, AgentKind
+
+from credential_cache import CachedAsyncCredential
+from memory_readiness import wait_until_ready_async
+
+
+SEED_TURNS = (
+	"Hi there! My name is Taylor and I'm planning a hiking trip to Patagonia in November.",
+	"I'm travelling with my sister and we love finding scenic viewpoints.",
+)
+RECALL_TURN = "What do you already know about my upcoming trip?"
+
+# `memory_probe(conversation_id)`: whether the memory store already returns the new facts
+MemoryProbe = Callable[[str], Union[bool, Awaitable[bool]]]
+
+
+async def _run_response(openai_client, model: str, instructions: str, conversation_id: str, user_text: str) -> str:
+	"""Async counterpart of `agent_with_memory._run_and_print_response` that returns the text."""
+	resp = await openai_client.responses.create(
+		model=model,
+		instructions=instructions,
+		conversation={"id": conversation_id},
+		input=user_text,
+	)
+	return getattr(resp, "output_text", None) or str(resp)
+
+
+async def run_conversation(
+	openai_client,
+	model: str,
+	instructions: str,
+	seed_turns: Sequence[str] = SEED_TURNS,
+	recall_turn: str = RECALL_TURN,
+	readiness_deadline: float = 10.0,
+	memory_probe: Optional[MemoryProbe] = None,
+	fallback_delay: float = 2.0,
+) -> List[str]:
+	"""
+	One full conversation from `agent_with_memory`: seed turns, wait for memory, recall.
+
+	The wait polls `memory_probe` (see `memory_readiness.fact_probe`) up to
+	`readiness_deadline`; without one it sleeps `fallback_delay`. Each await
+	yields the event loop, so many of these run concurrently over the client's
+	single connection pool.
+	"""
+	conv = await openai_client.conversations.create()
+	replies = []
+	for text in seed_turns:
+		replies.append(await _run_response(openai_client, model, instructions, conv.id, text))
+
+	written_at = time.monotonic()
+	if memory_probe is None:
+		await asyncio.sleep(min(fallback_delay, readiness_deadline))
+	else:
+		await wait_until_ready_async(lambda: memory_probe(conv.id), deadline=readiness_deadline, since=written_at)
+	replies.append(await _run_response(openai_client, model, instructions, conv.id, recall_turn))
+	return replies
+
+
+async def run_conversations(
+	openai_client,
+	model: str,
+	instructions: str,
+	conversations: int,
+	concurrency: int = 64,
+	memory_probe: Optional[MemoryProbe] = None,
+) -> List[List[str]]:
+	"""Run `conversations` independent conversations with at most `concurrency` in flight."""
+	semaphore = asyncio.Semaphore(concurrency)
+
+	async def _one() -> List[str]:
+		async with semaphore:
+			return await run_conversation(openai_client, model, instructions, memory_probe=memory_probe)
+
+	return await asyncio.gather(*(_one() for _ in range(conversations)))
+
+
+async def agent_with_memory_async(
+	endpoint: str,
+	deployment_name: str,
+	conversations: int = 8,
+	concurrency: int = 64,
+	memory_probe: Optional[MemoryProbe] = None,
+) -> None:
+	"""
+	Asyncio-native version of `agent_with_memory` using the aio project client.
+
+	- Creates the prompt agent once
+	- Runs `conversations` conversations concurrently over one shared async OpenAI client,
+	  each waiting on `memory_probe` between its seed turns and the recall
+	- Prints the recall reply of each conversation
+	- Deletes the agent at the end
+	"""
+	options_instructions = (
+		"You are a friendly travel assistant. "
+		"Use known memories about the user when responding, and do not invent details."
+	)
+	options_name = "AgentWithMemory"
+
+	async with CachedAsyncCredential(AzureCliCredential()) as credential:
+		async with AIProjectClient(endpoint=endpoint, credential=credential) as client:
+			definition = PromptAgentDefinition()
+			definition["kind"] = AgentKind.PROMPT
+			definition["model"] = deployment_name
+			definition["instructions"] = options_instructions
+
+			print("Creating agent...")
+			agent = await client.agents.create(name=options_name, definition=definition)
+			try:
+				oc = client.get_openai_client()
+				if inspect.isawaitable(oc):
+					oc = await oc
+
+				started = time.perf_counter()
+				results = await run_conversations(
+					oc, deployment_name, options_instructions, conversations, concurrency=concurrency, memory_probe=memory_probe
+				)
+				elapsed = time.perf_counter() - started
+
+				for index, replies in enumerate(results):
+					print(f"[conversation {index}] {replies[-1]}")
+				print(f"\n{conversations} conversations in {elapsed:.2f}s")
+			finally:
+				print("Deleting agent...")
+				await client.agents.delete(agent.id)
+
+
+def main() -> None:
+	endpoint = "https://<your-microsoft-foundry>.services.ai.azure.com/api/projects/proj-default"
+	deployment_name = "gpt-4.1"
+	asyncio.run(agent_with_memory_async(endpoint=endpoint, deployment_name=deployment_name))
+
+
+if __name__ == "__main__":
+	try:
+		main()
+	except Exception as e:
+		print("ERROR:", e)
+		traceback.print_exc()
+		raise
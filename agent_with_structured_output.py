@@ -1,12 +1,16 @@
 import asyncio
 import os
-from typing import Optional
+from typing import Optional, Sequence
 
 from pydantic import BaseModel
 from azure.identity.aio import AzureCliCredential
 from agent_framework.azure import AzureAIAgentClient
 from agent_framework import ChatMessage, Role
 
+from batch_extraction import ExtractionStats, extract_batch
+from credential_cache import CachedAsyncCredential
+from streaming_structured_output import stream_structured
+
 
 class PersonInfo(BaseModel):
     name: Optional[str] = None
@@ -14,7 +18,13 @@ class PersonInfo(BaseModel):
     occupation: Optional[str] = None
 
 
-async def agent_with_structured_output(deployment_name: str) -> None:
+async def agent_with_structured_output(deployment_name: str, stream: bool = False) -> None:
+    """
+    Ask for a `PersonInfo` and print it.
+
+    With `stream=True` the JSON is parsed as it arrives and each field is printed
+    as soon as it is complete, followed by time-to-first-field vs total time.
+    """
     # Ensure Azure AI Projects env vars for the chat client
     os.environ.setdefault(
         "AZURE_AI_PROJECT_ENDPOINT",
@@ -22,7 +32,7 @@ async def agent_with_structured_output(deployment_name: str) -> None:
     )
     os.environ.setdefault("AZURE_AI_MODEL_DEPLOYMENT_NAME", deployment_name)
 
-    async with AzureCliCredential() as credential:
+    async with CachedAsyncCredential(AzureCliCredential()) as credential:
         # AzureAIAgentClient integrates with Azure AI Projects Agents
         client = AzureAIAgentClient(credential=credential)
 
@@ -43,6 +53,10 @@ async def agent_with_structured_output(deployment_name: str) -> None:
             # Prefer explicit ChatMessage for compatibility with agent runs
             messages = [ChatMessage(role=Role.USER, text=user_prompt)]
 
+            if stream:
+                await _print_streamed(agent, messages)
+                return
+
             response = await agent.run(messages, response_format=PersonInfo)
 
             print("Assistant Output:")
@@ -56,6 +70,49 @@ async def agent_with_structured_output(deployment_name: str) -> None:
                 print(response.text or "<no structured output>")
 
 
+async def _print_streamed(agent, messages) -> None:
+    print("Assistant Output (streaming):")
+    snapshot = None
+    async for snapshot in stream_structured(agent, messages, PersonInfo):
+        for name in snapshot.new_fields:
+            print(f"[{snapshot.field_times[name] * 1000:7.1f} ms] {name.capitalize()}: {getattr(snapshot.value, name)}")
+    if snapshot is None or snapshot.time_to_first_field is None:
+        print("<no structured output>")
+        return
+    print(
+        f"Time to first field: {snapshot.time_to_first_field * 1000:.1f} ms "
+        f"(first token {(snapshot.time_to_first_token or 0) * 1000:.1f} ms, complete {snapshot.elapsed * 1000:.1f} ms)"
+    )
+
+
+async def extract_people(deployment_name: str, texts: Sequence[str]) -> None:
+    """
+    `PersonInfo` extraction over many short texts, many texts per model call.
+
+    Prints one line per input plus request count vs the one-call-per-text baseline.
+    """
+    os.environ.setdefault(
+        "AZURE_AI_PROJECT_ENDPOINT",
+        "https://<your-microsoft-foundry>.services.ai.azure.com/api/projects/proj-default",
+    )
+    os.environ.setdefault("AZURE_AI_MODEL_DEPLOYMENT_NAME", deployment_name)
+
+    async with CachedAsyncCredential(AzureCliCredential()) as credential:
+        client = AzureAIAgentClient(credential=credential)
+        async with client.create_agent(
+            name="StructuredExtraction",
+            instructions="You extract structured records from text. Do not invent details.",
+        ) as agent:
+            stats = ExtractionStats()
+            results = await extract_batch(agent, texts, PersonInfo, stats=stats)
+            for result in results:
+                print(f"[{result.index}] {result.value if result.value is not None else 'ERROR: ' + str(result.error)}")
+            print(
+                f"\n{stats.items} texts in {stats.requests} requests "
+                f"({stats.items_per_request:.1f} per request), {stats.retried_items} retried, {stats.failed_items} failed"
+            )
+
+
 def main() -> None:
     asyncio.run(agent_with_structured_output("gpt-4.1"))
 
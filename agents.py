@@ -0,0 +1,248 @@
+import argparse
+import importlib
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+
+# Only the standard library above: `agents --help` and the startup check must
+# not pay for the SDKs. Each sample module is imported when its command runs.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Top-level packages that must never load before a command is chosen
+HEAVY_PACKAGES = ("agent_framework", "agent_framework_azure_ai", "azure", "openai", "pydantic", "numpy", "mcp", "httpx", "aiohttp")
+
+# What the common entry points pull in, for `Command.heavy`
+_FRAMEWORK = ("agent_framework", "httpx", "mcp", "pydantic")
+_PROJECTS = ("aiohttp", "azure", "openai", "pydantic")
+_AZURE_AGENT = _FRAMEWORK + _PROJECTS + ("agent_framework_azure_ai",)
+
+
+@dataclass(frozen=True)
+class Command:
+	module: str
+	help: str
+	entry: str = "main"
+	# The entry point parses sys.argv itself (argparse-based tools)
+	passthrough: bool = False
+	# The `HEAVY_PACKAGES` loading the module is expected to import (checked by --check-startup)
+	heavy: Tuple[str, ...] = ()
+
+
+COMMANDS: Dict[str, Command] = {
+	"simple": Command("samply", "Create an agent, send one message and print the reply", heavy=_FRAMEWORK + _PROJECTS),
+	"tools": Command("simple_agent_with_tools", "Agent with a Python function tool", heavy=_AZURE_AGENT),
+	"middleware": Command("adding_middleware_to_agents", "Agent with chat middleware, response cache and instrumentation", heavy=_AZURE_AGENT),
+	"memory": Command("agent_with_memory", "Agent backed by a Foundry memory store", heavy=_FRAMEWORK + _PROJECTS + ("numpy",)),
+	"memory-async": Command("agent_with_memory_async", "Concurrent conversations over the async Responses API", heavy=_PROJECTS),
+	"structured": Command("agent_with_structured_output", "Structured (pydantic) output, streamed field by field", heavy=_AZURE_AGENT),
+	"multi-turn": Command("multi_turn_async", "Multi-turn conversation on one thread", heavy=_AZURE_AGENT),
+	"persist": Command("persisting_conversations", "Save a thread and resume it later", heavy=_AZURE_AGENT),
+	"as-function": Command("using_agent_as_a_function", "Use one agent as a tool of another", heavy=_AZURE_AGENT),
+	"workflow": Command("sample-workflow.py", "Translation DAG workflow with stage latency report", heavy=_AZURE_AGENT),
+	"fan-out": Command("workflow_concurrent_fan_in_fan_out", "Concurrent fan-out/fan-in workflow with quorum", heavy=_AZURE_AGENT),
+	"batch": Command("batch_runner", "Run a JSONL file of prompts through an agent", passthrough=True, heavy=_AZURE_AGENT),
+	"daemon": Command("agent_daemon", "Resident agent daemon on a Unix socket (warm credential, client, agents)", passthrough=True, heavy=_AZURE_AGENT),
+	"ask": Command("agent_daemon_client", "Send a prompt to the running agent daemon", passthrough=True),
+	"stub-server": Command("openai_stub_server", "Local OpenAI Conversations/Responses stub", passthrough=True),
+	"bench-samples": Command("bench_samples", "Benchmark the samples against the offline fake backend", passthrough=True, heavy=_FRAMEWORK + ("azure",)),
+	"bench-async-memory": Command("bench_async_memory", "Benchmark sync vs async memory conversations", passthrough=True, heavy=_PROJECTS),
+	"bench-local-memory": Command("bench_local_memory", "Benchmark local vector memory retrieval", passthrough=True, heavy=("numpy",)),
+	"bench-message-codec": Command("bench_message_codec", "Benchmark the message log codec against JSON", passthrough=True),
+	"bench-sessions": Command("bench_session_manager", "Benchmark the session manager against unbounded histories", passthrough=True, heavy=_FRAMEWORK),
+	"bench-rate-limiter": Command("bench_rate_limiter", "Benchmark the rate limiter against a throttling fake deployment", passthrough=True, heavy=_FRAMEWORK + ("azure",)),
+}
+
+
+def load(name: str) -> Any:
+	"""Import the module behind command `name` (the expensive part of startup)."""
+	module = COMMANDS[name].module
+	if module.endswith(".py"):
+		# Scripts whose file names are not valid module names (sample-workflow.py)
+		spec = importlib.util.spec_from_file_location(module[:-3].replace("-", "_"), os.path.join(HERE, module))
+		loaded = importlib.util.module_from_spec(spec)
+		spec.loader.exec_module(loaded)
+		return loaded
+	return importlib.import_module(module)
+
+
+def run(name: str, argv: Sequence[str]) -> None:
+	command = COMMANDS[name]
+	entry = getattr(load(name), command.entry)
+	if command.passthrough:
+		sys.argv = [f"agents {name}", *argv]
+	elif argv:
+		raise SystemExit(f"agents {name}: takes no arguments")
+	entry()
+
+
+def loaded_heavy_packages() -> List[str]:
+	return sorted(name for name in HEAVY_PACKAGES if name in sys.modules)
+
+
+@dataclass
+class ImportReport:
+	"""`-X importtime` output for one startup, grouped by top-level package (self time, ms)."""
+
+	command: str
+	packages: Dict[str, float]
+	heavy: List[str]
+
+	@property
+	def total_ms(self) -> float:
+		return sum(self.packages.values())
+
+	def format(self, top: int = 15) -> str:
+		total = self.total_ms
+		lines = [f"startup imports for {self.command or '(cli)'}: {total:.1f} ms"]
+		ranked = sorted(self.packages.items(), key=lambda item: item[1], reverse=True)
+		for package, ms in ranked[:top]:
+			lines.append(f"  {package:<32} {ms:9.1f} ms {ms / total:6.1%}")
+		rest = sum(ms for _, ms in ranked[top:])
+		if rest:
+			lines.append(f"  {f'({len(ranked) - top} more)':<32} {rest:9.1f} ms {rest / total:6.1%}")
+		return "\n".join(lines)
+
+
+def import_report(name: str = "") -> ImportReport:
+	"""
+	Start a fresh interpreter under `-X importtime`, load command `name` (or just
+	the CLI when empty) without running it, and group the import self-times.
+	"""
+	completed = subprocess.run(
+		[sys.executable, "-X", "importtime", os.path.abspath(__file__), "--load-only", name],
+		capture_output=True,
+		text=True,
+		cwd=HERE,
+	)
+	if completed.returncode != 0:
+		raise RuntimeError(f"loading {name or 'the cli'} failed: {completed.stderr.strip().splitlines()[-1:]}")
+	packages: Dict[str, float] = {}
+	for line in completed.stderr.splitlines():
+		# "import time:   self [us] | cumulative | imported package"
+		if not line.startswith("import time:") or "self [us]" in line:
+			continue
+		self_us, _, module = line[len("import time:"):].split("|", 2)
+		top = module.strip().split(".", 1)[0]
+		packages[top] = packages.get(top, 0.0) + int(self_us) / 1000
+	return ImportReport(name, packages, json.loads(completed.stdout.strip().splitlines()[-1]))
+
+
+# Startup times of small commands jitter by a fair share of the CLI's own; not a regression
+_NOISE_RATIO = 1.0
+
+
+def _fastest(name: str, runs: int) -> ImportReport:
+	"""Fastest of `runs` fresh startups: the minimum is the least noisy estimate."""
+	return min((import_report(name) for _ in range(max(1, runs))), key=lambda report: report.total_ms)
+
+
+def check_startup(
+	names: Sequence[str],
+	baseline: Dict[str, float],
+	tolerance: float,
+	runs: int = 3,
+) -> Tuple[Dict[str, float], List[str]]:
+	"""
+	Startup regression check; returns `(import time per command as a multiple of
+	the CLI's own, failures)`.
+
+	- The bare CLI must not import any of `HEAVY_PACKAGES`, and each command must
+	  import exactly its `Command.heavy`; this holds on any machine
+	- Import times are compared as ratios to the CLI's startup measured in the same
+	  run, within `tolerance` of `baseline` when it has an entry there (see the
+	  committed `startup_baseline.json`); absolute milliseconds vary between machines
+	- Times are the best of `runs` startups
+	"""
+	failures: List[str] = []
+	results: Dict[str, float] = {}
+	cli = _fastest("", runs)
+	if cli.heavy:
+		failures.append(f"cli imports heavy packages before a command is chosen: {', '.join(cli.heavy)}")
+	print(f"{'(cli)':<22} {cli.total_ms:9.1f} ms")
+
+	for name in names:
+		try:
+			report = _fastest(name, runs)
+		except RuntimeError as e:
+			failures.append(str(e))
+			continue
+		expected = sorted(set(COMMANDS[name].heavy))
+		if report.heavy != expected:
+			failures.append(f"{name}: imports heavy packages [{', '.join(report.heavy)}], expected [{', '.join(expected)}]")
+		results[name] = report.total_ms / cli.total_ms
+		before = baseline.get(name)
+		change = f"  ({(results[name] - before) / before:+.0%})" if before else ""
+		print(f"{name:<22} {report.total_ms:9.1f} ms {results[name]:7.1f}x cli{change}", flush=True)
+		if before and results[name] > before * (1 + tolerance) + _NOISE_RATIO:
+			failures.append(f"{name}: imports {before:.1f}x -> {results[name]:.1f}x the cli's startup")
+	return results, failures
+
+
+def _parser() -> argparse.ArgumentParser:
+	width = max(len(name) for name in COMMANDS)
+	listing = "\n".join(f"  {name:<{width}}  {command.help}" for name, command in COMMANDS.items())
+	parser = argparse.ArgumentParser(
+		prog="agents",
+		description="Run any of the agent samples; SDKs are imported only for the chosen command.",
+		epilog=f"commands:\n{listing}\n\nOptions go before the command; everything after it is passed to the command.",
+		formatter_class=argparse.RawDescriptionHelpFormatter,
+	)
+	parser.add_argument("command", nargs="?", choices=list(COMMANDS), metavar="command")
+	parser.add_argument("args", nargs=argparse.REMAINDER, help="passed to the command")
+	parser.add_argument("--import-report", action="store_true", help="print the command's import-time breakdown instead of running it")
+	parser.add_argument("--check-startup", action="store_true", help="check heavy imports and import times of the cli and commands against the baseline")
+	parser.add_argument("--baseline", default=os.path.join(HERE, "startup_baseline.json"))
+	parser.add_argument("--save-baseline", action="store_true", help="with --check-startup: write these ratios as the new baseline")
+	parser.add_argument("--tolerance", type=float, default=0.25, help="allowed import-time regression vs baseline (fraction)")
+	parser.add_argument("--load-only", metavar="COMMAND", help=argparse.SUPPRESS)
+	return parser
+
+
+def main() -> None:
+	parser = _parser()
+	args = parser.parse_args()
+
+	if args.load_only is not None:
+		if args.load_only:
+			load(args.load_only)
+		print(json.dumps(loaded_heavy_packages()))
+		return
+
+	if args.check_startup:
+		baseline: Dict[str, float] = {}
+		if os.path.exists(args.baseline):
+			with open(args.baseline, "r", encoding="utf-8") as f:
+				baseline = json.load(f).get("import_ratio", {})
+		names = [args.command] if args.command else list(COMMANDS)
+		results, failures = check_startup(names, baseline, args.tolerance)
+		if args.save_baseline:
+			merged = dict(baseline)
+			merged.update({name: round(ratio, 2) for name, ratio in results.items()})
+			with open(args.baseline, "w", encoding="utf-8") as f:
+				json.dump({"python": sys.version.split()[0], "import_ratio": merged}, f, indent=2, sort_keys=True)
+			print(f"\nBaseline written to {args.baseline}")
+		if failures:
+			print("\nStartup regressions:")
+			for line in failures:
+				print(f"  {line}")
+			sys.exit(1)
+		return
+
+	if args.command is None:
+		parser.print_help()
+		return
+
+	if args.import_report:
+		print(import_report(args.command).format())
+		return
+
+	run(args.command, args.args)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,203 @@
+import asyncio
+import json
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, Field, ValidationError, create_model
+from agent_framework import ChatMessage, Role
+
+from history_manager import count_tokens
+
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Framing around each input in the prompt ("[12] ...\n") and around each output item
+ITEM_OVERHEAD_TOKENS = 8
+
+
+@lru_cache(maxsize=None)
+def indexed_model(model: Type[BaseModel]) -> Type[BaseModel]:
+	"""`model` plus an `index` field tying each record back to its input."""
+	return create_model(
+		f"Indexed{model.__name__}",
+		__base__=model,
+		index=(int, Field(description="The [number] of the input this record was extracted from")),
+	)
+
+
+@lru_cache(maxsize=None)
+def batch_model(model: Type[BaseModel]) -> Type[BaseModel]:
+	"""Wrapper schema `{"items": [Indexed<model>, ...]}` used as the batch `response_format`."""
+	return create_model(f"{model.__name__}Batch", items=(List[indexed_model(model)], ...))
+
+
+@lru_cache(maxsize=None)
+def _output_tokens_per_item(model: Type[BaseModel]) -> int:
+	# A filled-in record is roughly its field names plus a short value each
+	names = " ".join(f'"{name}": "value",' for name in indexed_model(model).model_fields)
+	return count_tokens(names) + ITEM_OVERHEAD_TOKENS
+
+
+@dataclass
+class ExtractionResult(Generic[ModelT]):
+	index: int
+	value: Optional[ModelT] = None
+	attempts: int = 0
+	error: Optional[str] = None
+
+
+@dataclass
+class ExtractionStats:
+	items: int = 0
+	requests: int = 0
+	retried_items: int = 0
+	failed_items: int = 0
+	batch_sizes: List[int] = field(default_factory=list)
+
+	@property
+	def items_per_request(self) -> float:
+		return self.items / self.requests if self.requests else 0.0
+
+
+def plan_batches(
+	texts: Sequence[str],
+	indices: Sequence[int],
+	model: Type[BaseModel],
+	context_budget: int = 16000,
+	max_output_tokens: int = 4096,
+	max_items: int = 50,
+) -> List[List[int]]:
+	"""
+	Greedily pack `indices` into batches that fit the model's limits.
+
+	- Input side: prompt + schema + every packed text stays under `context_budget`
+	- Output side: expected records stay under `max_output_tokens`
+	- Never more than `max_items` per batch; an oversized text gets a batch of its own
+	"""
+	fixed = count_tokens(_instructions(model)) + count_tokens(json.dumps(batch_model(model).model_json_schema()))
+	per_output = _output_tokens_per_item(model)
+	max_by_output = max(1, max_output_tokens // per_output)
+	limit = max(1, min(max_items, max_by_output))
+
+	batches: List[List[int]] = []
+	current: List[int] = []
+	used = fixed
+	for index in indices:
+		cost = count_tokens(texts[index]) + ITEM_OVERHEAD_TOKENS + per_output
+		if current and (len(current) >= limit or used + cost > context_budget):
+			batches.append(current)
+			current, used = [], fixed
+		current.append(index)
+		used += cost
+	if current:
+		batches.append(current)
+	return batches
+
+
+def _instructions(model: Type[BaseModel]) -> str:
+	return (
+		f"Extract one {model.__name__} record from each numbered input below. "
+		'Return {"items": [...]} with exactly one item per input, in any order, '
+		"with `index` set to that input's number. Leave a field null if the input does not state it."
+	)
+
+
+def _prompt(model: Type[BaseModel], texts: Sequence[str], batch: Sequence[int]) -> str:
+	# Inputs are renumbered 0..n-1 per batch so indexes stay small and easy to copy
+	lines = [f"[{position}] {' '.join(texts[index].split())}" for position, index in enumerate(batch)]
+	return _instructions(model) + "\n\n" + "\n".join(lines)
+
+
+def parse_batch(model: Type[ModelT], text: str, size: int) -> Tuple[Dict[int, ModelT], Dict[int, str]]:
+	"""
+	Validate each returned item on its own.
+
+	Returns `(values, errors)` keyed by batch position; positions missing from
+	both were not returned at all. One bad item never discards the others.
+	"""
+	values: Dict[int, ModelT] = {}
+	errors: Dict[int, str] = {}
+	try:
+		payload = json.loads(text)
+	except (TypeError, json.JSONDecodeError) as e:
+		return values, {position: f"unparseable batch response: {e}" for position in range(size)}
+	items = payload.get("items") if isinstance(payload, dict) else payload
+	if not isinstance(items, list):
+		return values, {position: "batch response has no items list" for position in range(size)}
+
+	wrapper = indexed_model(model)
+	for raw in items:
+		position = raw.get("index") if isinstance(raw, dict) else None
+		if not isinstance(position, int) or not 0 <= position < size or position in values:
+			continue
+		try:
+			record = wrapper.model_validate(raw)
+		except ValidationError as e:
+			errors[position] = str(e)
+			continue
+		values[position] = model.model_validate(record.model_dump(exclude={"index"}))
+		errors.pop(position, None)
+	return values, errors
+
+
+async def extract_batch(
+	agent,
+	texts: Sequence[str],
+	model: Type[ModelT],
+	context_budget: int = 16000,
+	max_output_tokens: int = 4096,
+	max_items: int = 50,
+	concurrency: int = 4,
+	max_attempts: int = 3,
+	stats: Optional[ExtractionStats] = None,
+) -> List[ExtractionResult[ModelT]]:
+	"""
+	Batched replacement for one `agent.run(..., response_format=model)` per text.
+
+	- Packs many texts into one request with a generated `list[Indexed<model>]` schema
+	  (`plan_batches` picks the batch size from text length and the token budgets)
+	- Validates every returned item separately and maps it back by `index`
+	- Re-batches only missing or invalid items, in halving batch sizes, up to `max_attempts` per item
+	- Runs up to `concurrency` batch requests at once
+
+	Results are returned in input order; items that never validated carry `error`.
+	"""
+	stats = stats if stats is not None else ExtractionStats()
+	stats.items += len(texts)
+	results = [ExtractionResult[ModelT](index) for index in range(len(texts))]
+	semaphore = asyncio.Semaphore(concurrency)
+	response_format = batch_model(model)
+
+	async def _run(batch: List[int]) -> None:
+		async with semaphore:
+			stats.requests += 1
+			stats.batch_sizes.append(len(batch))
+			for index in batch:
+				results[index].attempts += 1
+			try:
+				messages = [ChatMessage(role=Role.USER, text=_prompt(model, texts, batch))]
+				response = await agent.run(messages, response_format=response_format)
+				values, errors = parse_batch(model, response.text, len(batch))
+			except Exception as e:
+				values, errors = {}, {position: f"{type(e).__name__}: {e}" for position in range(len(batch))}
+		for position, index in enumerate(batch):
+			if position in values:
+				results[index].value = values[position]
+				results[index].error = None
+			else:
+				results[index].error = errors.get(position, "item missing from batch response")
+
+	pending = list(range(len(texts)))
+	for attempt in range(max_attempts):
+		if not pending:
+			break
+		if attempt:
+			stats.retried_items += len(pending)
+		# Smaller batches on retry: a failure is often the model losing track of a long list
+		batches = plan_batches(texts, pending, model, context_budget, max_output_tokens, max(1, max_items >> attempt))
+		await asyncio.gather(*(_run(batch) for batch in batches))
+		pending = [index for index in pending if results[index].value is None]
+
+	stats.failed_items += len(pending)
+	return results
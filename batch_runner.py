@@ -0,0 +1,222 @@
+import argparse
+import asyncio
+import json
+import os
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from azure.identity.aio import AzureCliCredential
+from agent_framework.azure import AzureAIAgentClient
+
+from credential_cache import CachedAsyncCredential
+from rate_limiter import deployment_limiter
+
+
+def _iter_prompts(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+	"""
+	Yield (line number, request) lazily; a line is either a JSON object with `prompt` or a JSON string.
+
+	A line that is neither yields `{"error": ...}` instead, so it fails on its own
+	rather than aborting the batch.
+	"""
+	with open(path, "r", encoding="utf-8") as f:
+		for line_no, line in enumerate(f):
+			if not line.strip():
+				continue
+			try:
+				item = json.loads(line)
+			except ValueError as e:
+				yield line_no, {"error": f"invalid JSON: {e}"}
+				continue
+			if isinstance(item, str):
+				item = {"prompt": item}
+			if not isinstance(item, dict) or not isinstance(item.get("prompt"), str):
+				yield line_no, {"error": "expected a JSON string or an object with a string `prompt`"}
+				continue
+			yield line_no, item
+
+
+def _completed_lines(output_path: str) -> bytearray:
+	"""
+	Scan an existing output file and return a bitmap of completed input lines.
+
+	Only successful records count: lines whose record carries `error` run again
+	on resume. A bitmap keeps resume state at one bit per input line (125 KB per
+	million lines). A torn trailing line left by a crash is truncated so appends
+	stay valid JSONL.
+	"""
+	done = bytearray()
+	if not os.path.exists(output_path):
+		return done
+	good_size = 0
+	with open(output_path, "rb") as f:
+		for raw in f:
+			if not raw.endswith(b"\n"):
+				# Torn final write, even if it parses: the next append would join its line
+				break
+			try:
+				record = json.loads(raw)
+				line_no = record["line"]
+			except (ValueError, KeyError, TypeError):
+				break
+			good_size += len(raw)
+			if "error" in record:
+				continue
+			if line_no // 8 >= len(done):
+				done.extend(bytes(line_no // 8 + 1 - len(done)))
+			done[line_no // 8] |= 1 << (line_no % 8)
+	if good_size != os.path.getsize(output_path):
+		with open(output_path, "r+b") as f:
+			f.truncate(good_size)
+	return done
+
+
+def _is_done(done: bytearray, line_no: int) -> bool:
+	return line_no // 8 < len(done) and bool(done[line_no // 8] & (1 << (line_no % 8)))
+
+
+async def run_batch(
+	agent: Any,
+	input_path: str,
+	output_path: str,
+	concurrency: int = 8,
+	resume: bool = True,
+	flush_every: int = 100,
+) -> Dict[str, int]:
+	"""
+	Drive every prompt in `input_path` through `agent.run`, appending results to `output_path`.
+
+	- At most `concurrency` runs are in flight; the input is read lazily, so memory
+	  stays flat regardless of file size
+	- Results are written as they complete, one JSON object per line, tagged with
+	  the input `line` so the output can be joined back to the input
+	- With `resume`, lines that already succeeded are skipped; failed lines run
+	  again and append a new record, so the last record for a line wins
+	"""
+	done = _completed_lines(output_path) if resume else bytearray()
+	stats = {"completed": 0, "failed": 0, "skipped": 0}
+	semaphore = asyncio.Semaphore(concurrency)
+	in_flight: set = set()
+	unflushed = 0
+
+	with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+
+		def _write(result: Dict[str, Any]) -> None:
+			nonlocal unflushed
+			out.write(json.dumps(result, ensure_ascii=False) + "\n")
+			unflushed += 1
+			if unflushed >= flush_every:
+				out.flush()
+				unflushed = 0
+
+		async def _run_one(line_no: int, item: Dict[str, Any]) -> None:
+			result: Dict[str, Any] = {"line": line_no}
+			if "id" in item:
+				result["id"] = item["id"]
+			try:
+				response = await agent.run(item["prompt"])
+				result["text"] = response.text
+				stats["completed"] += 1
+			except Exception as e:
+				result["error"] = f"{type(e).__name__}: {e}"
+				stats["failed"] += 1
+			finally:
+				semaphore.release()
+			_write(result)
+
+		try:
+			for line_no, item in _iter_prompts(input_path):
+				if _is_done(done, line_no):
+					stats["skipped"] += 1
+					continue
+				if "prompt" not in item:
+					# Malformed input line: record it like a failed run
+					stats["failed"] += 1
+					_write({"line": line_no, "error": item["error"]})
+					continue
+				await semaphore.acquire()
+				task = asyncio.create_task(_run_one(line_no, item))
+				in_flight.add(task)
+				task.add_done_callback(in_flight.discard)
+
+			if in_flight:
+				await asyncio.gather(*in_flight)
+		finally:
+			# On cancellation, stop the remaining runs before the output file closes
+			pending = list(in_flight)
+			for task in pending:
+				task.cancel()
+			await asyncio.gather(*pending, return_exceptions=True)
+			out.flush()
+
+	return stats
+
+
+async def batch_runner(
+	deployment_name: str,
+	input_path: str,
+	output_path: str,
+	concurrency: int,
+	resume: bool,
+	agent_name: str = "BatchAgent",
+	instructions: Optional[str] = None,
+	rpm: Optional[float] = None,
+	tpm: Optional[float] = None,
+) -> None:
+	"""
+	Run `input_path` through one agent on `deployment_name`.
+
+	Runs go through the deployment's `RateLimiter` (`rpm` / `tpm` caps, AIMD
+	concurrency, Retry-After aware retries), so `concurrency` can be set for
+	throughput without turning throttling into a retry storm.
+	"""
+	os.environ.setdefault(
+		"AZURE_AI_PROJECT_ENDPOINT",
+		"https://<your-microsoft-foundry>.services.ai.azure.com/api/projects/proj-default",
+	)
+	os.environ.setdefault("AZURE_AI_MODEL_DEPLOYMENT_NAME", deployment_name)
+
+	async with CachedAsyncCredential(AzureCliCredential()) as credential:
+		client = AzureAIAgentClient(credential=credential)
+
+		limiter = deployment_limiter(deployment_name, rpm=rpm, tpm=tpm)
+
+		async with client.create_agent(
+			name=agent_name,
+			instructions=instructions or "You are a helpful assistant",
+			middleware=[limiter.agent_middleware()],
+		) as agent:
+			stats = await run_batch(agent, input_path, output_path, concurrency=concurrency, resume=resume)
+			print(f"completed={stats['completed']} failed={stats['failed']} skipped={stats['skipped']}")
+			print(limiter.format_stats())
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Run a JSONL file of prompts through an agent")
+	parser.add_argument("input", help="JSONL file: one {\"prompt\": ...} object or JSON string per line")
+	parser.add_argument("output", help="JSONL file results are appended to")
+	parser.add_argument("--concurrency", type=int, default=8)
+	parser.add_argument("--no-resume", dest="resume", action="store_false", help="overwrite output instead of resuming")
+	parser.add_argument("--deployment", default="gpt-4.1")
+	parser.add_argument("--name", default="BatchAgent")
+	parser.add_argument("--instructions", default=None)
+	parser.add_argument("--rpm", type=float, default=None, help="requests per minute allowed on the deployment")
+	parser.add_argument("--tpm", type=float, default=None, help="tokens per minute allowed on the deployment")
+	args = parser.parse_args()
+
+	asyncio.run(
+		batch_runner(
+			deployment_name=args.deployment,
+			input_path=args.input,
+			output_path=args.output,
+			concurrency=args.concurrency,
+			resume=args.resume,
+			agent_name=args.name,
+			instructions=args.instructions,
+			rpm=args.rpm,
+			tpm=args.tpm,
+		)
+	)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, Set
+
+from openai import AsyncOpenAI, OpenAI
+
+from agent_with_memory_async import RECALL_TURN, SEED_TURNS, run_conversations
+from memory_readiness import FakeMemoryService, fact_probe, wait_until_ready
+
+
+MODEL = "stub-model"
+INSTRUCTIONS = "You are a friendly travel assistant."
+
+
+def _memory_probe(memory: FakeMemoryService) -> Callable[[str], bool]:
+	"""
+	Probe a local memory service for the last seed turn of a conversation.
+
+	The stub server has no memory store, so the seed turns are ingested into
+	`memory` on the first check, i.e. as soon as they were written, and become
+	searchable after its indexing delay.
+	"""
+	ingested: Set[str] = set()
+
+	def _probe(conversation_id: str) -> bool:
+		if conversation_id not in ingested:
+			ingested.add(conversation_id)
+			for text in SEED_TURNS:
+				memory.add(conversation_id, text)
+		return fact_probe(lambda: memory.search(conversation_id), SEED_TURNS[-1])()
+
+	return _probe
+
+
+def _sync_conversation(oc: OpenAI, memory_probe: Callable[[str], bool]) -> None:
+	"""The blocking path from `agent_with_memory`, one call at a time."""
+	conv = oc.conversations.create()
+	for text in SEED_TURNS:
+		oc.responses.create(model=MODEL, instructions=INSTRUCTIONS, conversation={"id": conv.id}, input=text)
+	written_at = time.monotonic()
+	wait_until_ready(lambda: memory_probe(conv.id), since=written_at)
+	oc.responses.create(model=MODEL, instructions=INSTRUCTIONS, conversation={"id": conv.id}, input=RECALL_TURN)
+
+
+def _measure(label: str, conversations: int, run) -> Dict[str, float]:
+	wall_start = time.perf_counter()
+	cpu_start = time.process_time()
+	run()
+	cpu = time.process_time() - cpu_start
+	wall = time.perf_counter() - wall_start
+	result = {
+		"conversations": conversations,
+		"wall_seconds": wall,
+		"cpu_seconds": cpu,
+		"conv_per_sec": conversations / wall,
+		"conv_per_sec_per_core": conversations / cpu if cpu else float("inf"),
+	}
+	print(
+		f"{label:<8} {conversations:>6} conv  wall={wall:7.2f}s  cpu={cpu:6.2f}s  "
+		f"{result['conv_per_sec']:8.1f} conv/s  {result['conv_per_sec_per_core']:8.1f} conv/s/core"
+	)
+	return result
+
+
+def bench_async_memory(conversations: int, concurrency: int, latency: float, indexing_delay: float) -> None:
+	"""
+	Throughput of the sync vs async `agent_with_memory` paths against a local stub server.
+
+	- The stub runs in a subprocess so its CPU time is not charged to the client
+	- "per core" divides by the client's CPU seconds, i.e. how many conversations
+	  one fully busy core could drive
+	- Each conversation waits until its seed turns are searchable in a local
+	  memory service with `indexing_delay` seconds of lag
+	"""
+	memory = FakeMemoryService(indexing_delay=indexing_delay)
+	server = subprocess.Popen(
+		[sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "openai_stub_server.py"),
+			"--latency", str(latency)],
+		stdout=subprocess.PIPE,
+		text=True,
+	)
+	try:
+		base_url = server.stdout.readline().strip()
+		print(f"stub server at {base_url}, {latency * 1000:.0f} ms per request, concurrency {concurrency}\n")
+
+		sync_client = OpenAI(base_url=base_url, api_key="stub", max_retries=0)
+		# The sync path serves one conversation at a time, so a small sample is enough
+		sync_count = max(1, min(conversations, 20))
+		sync_probe = _memory_probe(memory)
+		_measure("sync", sync_count, lambda: [_sync_conversation(sync_client, sync_probe) for _ in range(sync_count)])
+		sync_client.close()
+
+		async def _run_async() -> None:
+			async with AsyncOpenAI(base_url=base_url, api_key="stub", max_retries=0) as async_client:
+				await run_conversations(
+					async_client, MODEL, INSTRUCTIONS, conversations, concurrency=concurrency, memory_probe=_memory_probe(memory)
+				)
+
+		_measure("async", conversations, lambda: asyncio.run(_run_async()))
+	finally:
+		server.terminate()
+		server.wait()
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Benchmark sync vs async agent_with_memory conversations")
+	parser.add_argument("--conversations", type=int, default=500)
+	parser.add_argument("--concurrency", type=int, default=100)
+	parser.add_argument("--latency", type=float, default=0.05, help="stub service time per request (seconds)")
+	parser.add_argument("--indexing-delay", type=float, default=0.1, help="memory indexing lag per conversation (seconds)")
+	args = parser.parse_args()
+	bench_async_memory(args.conversations, args.concurrency, args.latency, args.indexing_delay)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,83 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+from local_memory import VectorIndex
+
+
+def _percentile(samples: List[float], q: float) -> float:
+	ordered = sorted(samples)
+	return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def bench_local_memory(memories: int, dim: int, queries: int, noise: float, min_recall: float = 0.0) -> None:
+	"""
+	Retrieval latency of `VectorIndex` at scale, on memory-mapped files.
+
+	- Vectors are random unit vectors; each query is a stored vector plus noise,
+	  so the exact answer is known and the sketch prefilter's recall can be checked
+	- Reports build time, reopen time, exact vs prefiltered p50/p95 and recall@1
+	- Exits non-zero if the prefiltered recall@1 falls below `min_recall`; run at
+	  `--dim 1536` too, where sketches span many 64-bit words
+	"""
+	rng = np.random.default_rng(0)
+	vectors = rng.standard_normal((memories, dim), dtype=np.float32)
+	vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+	targets = rng.choice(memories, size=queries, replace=False)
+	probes = vectors[targets] + noise * rng.standard_normal((queries, dim), dtype=np.float32)
+	probes /= np.linalg.norm(probes, axis=1, keepdims=True)
+
+	directory = tempfile.mkdtemp(prefix="local_memory_")
+	try:
+		start = time.perf_counter()
+		with VectorIndex(dim=dim, path=directory) as index:
+			for offset in range(0, memories, 100_000):
+				chunk = vectors[offset : offset + 100_000]
+				index.add([f"memory {offset + i}" for i in range(len(chunk))], chunk)
+		print(f"build     {memories:>9} x {dim}  {time.perf_counter() - start:7.2f}s")
+
+		start = time.perf_counter()
+		index = VectorIndex(dim=dim, path=directory)
+		print(f"reopen    {time.perf_counter() - start:7.3f}s")
+		size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+		print(f"on disk   {size / 1e6:7.1f} MB\n")
+
+		for label, exact_below in (("exact", memories), ("sketch", 0)):
+			index.exact_below = exact_below
+			index.search(probes[0])  # fault the mapped pages in before timing
+			timings, hits = [], 0
+			for target, probe in zip(targets, probes):
+				start = time.perf_counter()
+				result = index.search(probe, k=5)
+				timings.append((time.perf_counter() - start) * 1000)
+				hits += bool(result) and result[0].index == target
+			print(
+				f"{label:<8} p50={_percentile(timings, 0.5):6.2f} ms  p95={_percentile(timings, 0.95):6.2f} ms  "
+				f"recall@1={hits / queries:.3f}"
+			)
+			recall = hits / queries
+		index.close()
+		if recall < min_recall:
+			raise SystemExit(f"sketch recall@1 {recall:.3f} below --min-recall {min_recall:.3f}")
+	finally:
+		shutil.rmtree(directory, ignore_errors=True)
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Benchmark local vector memory retrieval")
+	parser.add_argument("--memories", type=int, default=1_000_000)
+	parser.add_argument("--dim", type=int, default=128)
+	parser.add_argument("--queries", type=int, default=200)
+	parser.add_argument("--noise", type=float, default=0.05)
+	parser.add_argument("--min-recall", type=float, default=0.9, help="fail if the sketch recall@1 is lower")
+	args = parser.parse_args()
+	bench_local_memory(args.memories, args.dim, args.queries, args.noise, args.min_recall)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+import message_codec
+
+
+def _synthetic_thread(n: int) -> List[Dict[str, Any]]:
+	"""
+	Build `n` message dicts shaped like `ChatMessage.to_dict()` output:
+	user/assistant text turns interleaved with function calls and results.
+	"""
+	records: List[Dict[str, Any]] = []
+	for i in range(n):
+		kind = i % 4
+		if kind == 0:
+			records.append({
+				"type": "chat_message",
+				"role": {"type": "role", "value": "user"},
+				"contents": [{"type": "text", "text": f"Question {i}: what is the weather like in Amsterdam today?"}],
+			})
+		elif kind == 1:
+			records.append({
+				"type": "chat_message",
+				"role": {"type": "role", "value": "assistant"},
+				"contents": [{
+					"type": "function_call",
+					"call_id": f"call_{i:08d}",
+					"name": "GetWeather",
+					"arguments": {"city": "Amsterdam"},
+				}],
+			})
+		elif kind == 2:
+			records.append({
+				"type": "chat_message",
+				"role": {"type": "role", "value": "tool"},
+				"contents": [{
+					"type": "function_result",
+					"call_id": f"call_{i - 1:08d}",
+					"result": "It's sunny and around 20°C today in Amsterdam.",
+				}],
+			})
+		else:
+			records.append({
+				"type": "chat_message",
+				"role": {"type": "role", "value": "assistant"},
+				"author_name": "WeatherAgent",
+				"message_id": f"msg_{i:08d}",
+				"contents": [{"type": "text", "text": "It's sunny and around 20°C in Amsterdam. " * 3}],
+			})
+	return records
+
+
+def _load(kind: str, path: str, tail: int) -> List[Any]:
+	if kind == "json":
+		with open(path, "r", encoding="utf-8") as f:
+			return json.load(f)[-tail:]
+	if kind == "codec-full":
+		with open(path, "rb") as f:
+			return message_codec.loads(f.read())[-tail:]
+	with message_codec.MappedMessageLog(path) as log:
+		return log.tail(tail)
+
+
+def _measure(kind: str, path: str, tail: int) -> Dict[str, float]:
+	"""Load `path` with the given strategy and report wall time, peak heap and peak RSS."""
+	start = time.perf_counter()
+	result = _load(kind, path, tail)
+	elapsed = time.perf_counter() - start
+	assert len(result) == tail
+	del result
+
+	# Second pass under tracemalloc so the timing above is not skewed by tracing
+	tracemalloc.start()
+	_load(kind, path, tail)
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return {
+		"load_ms": elapsed * 1000,
+		"peak_heap_kb": peak / 1024,
+		"peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+	}
+
+
+def bench_message_codec(messages: int, tail: int) -> None:
+	"""
+	Compare the current JSON path with the binary codec on one large thread.
+
+	- Writes the same thread as JSON (like `persisting_conversations`) and as a message log
+	- Loads each file in a fresh subprocess so peak RSS is isolated per strategy
+	- Prints load time, size on disk, peak Python heap and peak process RSS
+	"""
+	records = _synthetic_thread(messages)
+	workdir = tempfile.mkdtemp(prefix="codec-bench-")
+	json_path = os.path.join(workdir, "thread.json")
+	log_path = os.path.join(workdir, "thread.cmh")
+	with open(json_path, "w", encoding="utf-8") as f:
+		json.dump(records, f, ensure_ascii=False)
+	message_codec.dump(records, log_path)
+
+	with message_codec.MappedMessageLog(log_path) as log:
+		assert list(log) == records, "codec round-trip mismatch"
+
+	print(f"{messages} messages, resuming last {tail}")
+	print(f"{'strategy':<12} {'size_kb':>10} {'load_ms':>10} {'peak_heap_kb':>13} {'peak_rss_kb':>12}")
+	for kind, path in (("json", json_path), ("codec-full", log_path), ("codec-tail", log_path)):
+		out = subprocess.run(
+			[sys.executable, __file__, "--child", kind, path, "--tail", str(tail)],
+			check=True, capture_output=True, text=True,
+		).stdout
+		stats = json.loads(out)
+		size_kb = os.path.getsize(path) / 1024
+		print(
+			f"{kind:<12} {size_kb:>10.1f} {stats['load_ms']:>10.2f} "
+			f"{stats['peak_heap_kb']:>13.1f} {stats['peak_rss_kb']:>12}"
+		)
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Benchmark the message log codec against JSON")
+	parser.add_argument("--messages", type=int, default=10_000)
+	parser.add_argument("--tail", type=int, default=20)
+	parser.add_argument("--child", nargs=2, metavar=("KIND", "PATH"), help=argparse.SUPPRESS)
+	args = parser.parse_args()
+	if args.child:
+		print(json.dumps(_measure(args.child[0], args.child[1], args.tail)))
+	else:
+		bench_message_codec(args.messages, args.tail)
+
+
+if __name__ == "__main__":
+	main()
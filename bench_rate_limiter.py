@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+from fake_backend import FakeBackend
+from rate_limiter import AIMDLimiter, RateLimiter, is_throttled
+
+
+def _percentile(samples: List[float], q: float) -> float:
+	ordered = sorted(samples)
+	return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def _naive_retry(run: Callable[[], Awaitable[Any]], retries: int = 20, delay: float = 0.05) -> Any:
+	"""What a bare batch loop tends to do: retry 429s after a short fixed sleep, ignoring Retry-After."""
+	for attempt in range(retries + 1):
+		try:
+			return await run()
+		except Exception as e:
+			if not is_throttled(e) or attempt == retries:
+				raise
+			await asyncio.sleep(delay)
+
+
+async def bench_strategy(
+	strategy: str,
+	requests: int,
+	quota: int,
+	window: float,
+	latency: float,
+	stream: bool,
+	rpm: Optional[float],
+) -> None:
+	backend = FakeBackend(latency=latency, chunk_interval=0.001, quota=quota, quota_window=window)
+	limiter = None
+	middleware = []
+	if strategy == "limiter":
+		limiter = RateLimiter("fake", rpm=rpm, concurrency=AIMDLimiter(initial=16), base_delay=0.1, max_retries=10)
+		middleware.append(limiter.agent_middleware())
+	agent = backend.chat_client().create_agent(name="Bench", instructions="Answer briefly.", middleware=middleware)
+
+	async def run_once(i: int) -> str:
+		if stream:
+			return "".join([update.text async for update in agent.run_stream(f"question {i}")])
+		return (await agent.run(f"question {i}")).text
+
+	latencies: List[float] = []
+	failed = 0
+
+	async def one(i: int) -> None:
+		nonlocal failed
+		started = time.perf_counter()
+		try:
+			if strategy == "naive":
+				await _naive_retry(lambda: run_once(i))
+			else:
+				await run_once(i)
+			latencies.append(time.perf_counter() - started)
+		except Exception:
+			failed += 1
+
+	started = time.perf_counter()
+	await asyncio.gather(*(one(i) for i in range(requests)))
+	elapsed = time.perf_counter() - started
+	print(
+		f"{strategy:<8} {len(latencies):>5} {failed:>6} {backend.stats.requests:>9} {backend.stats.throttled:>9} "
+		f"{elapsed:8.2f} {_percentile(latencies, 0.5):8.2f} {_percentile(latencies, 0.95):8.2f}"
+	)
+	if limiter is not None:
+		print(f"         {limiter.format_stats()}")
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Fan out agent runs against a rate-limited fake deployment")
+	parser.add_argument("--requests", type=int, default=300)
+	parser.add_argument("--quota", type=int, default=50, help="requests the fake deployment accepts per window")
+	parser.add_argument("--window", type=float, default=1.0, help="quota window (seconds)")
+	parser.add_argument("--latency", type=float, default=0.05)
+	parser.add_argument("--stream", action="store_true")
+	parser.add_argument("--rpm", type=float, default=None, help="limiter RPM (default: derived from the quota)")
+	parser.add_argument("--strategies", nargs="+", default=["none", "naive", "limiter"], choices=["none", "naive", "limiter"])
+	args = parser.parse_args()
+
+	rpm = args.rpm if args.rpm is not None else args.quota * 60 / args.window
+	print(f"{args.requests} runs against a quota of {args.quota} per {args.window:g}s (limiter rpm {rpm:g})\n")
+	print(f"{'strategy':<8} {'ok':>5} {'failed':>6} {'attempts':>9} {'throttled':>9} {'wall s':>8} {'p50 s':>8} {'p95 s':>8}")
+	for strategy in args.strategies:
+		asyncio.run(bench_strategy(strategy, args.requests, args.quota, args.window, args.latency, args.stream, rpm))
+
+
+if __name__ == "__main__":
+	main()
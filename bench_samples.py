@@ -0,0 +1,358 @@
+import argparse
+import asyncio
+import contextlib
+import importlib
+import importlib.util
+import io
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from fake_backend import FakeBackend
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ENDPOINT = "https://fake.services.ai.azure.com/api/projects/proj-default"
+DEPLOYMENT = "gpt-4.1"
+
+
+@dataclass
+class Scenario:
+	name: str
+	module: str
+	run: Callable[[Any, FakeBackend], Any]
+	# Synchronous entry points are timed inline and run on threads for throughput
+	blocking: bool = False
+	# False when runs share state (files) and must not overlap
+	concurrent: bool = True
+
+
+def _joker(entry: str) -> Callable[[Any, FakeBackend], Any]:
+	return lambda module, backend: getattr(module, entry)(
+		deployment_name=DEPLOYMENT, joker_instructions="You are good at telling jokes.", joker_name="JokerAgent"
+	)
+
+
+def _samply(run_path: str) -> Callable[[Any, FakeBackend], Any]:
+	return lambda module, backend: module.simple_agent(
+		ENDPOINT,
+		DEPLOYMENT,
+		"JokerAgent",
+		"You are good at telling jokes.",
+		client=backend.project_client(),
+		run_path=run_path,
+	)
+
+
+SCENARIOS: Dict[str, Scenario] = {
+	s.name: s
+	for s in (
+		Scenario("multi_turn_async", "multi_turn_async", _joker("multi_turn_async")),
+		Scenario("simple_agent_with_tools", "simple_agent_with_tools", _joker("simple_agent_with_tools")),
+		Scenario("adding_middleware_to_agents", "adding_middleware_to_agents", _joker("adding_middleware_to_agents")),
+		Scenario("persisting_conversations", "persisting_conversations", _joker("persisting_conversations"), concurrent=False),
+		Scenario(
+			"using_agent_as_a_function",
+			"using_agent_as_a_function",
+			lambda module, backend: module.using_agent_as_a_function(DEPLOYMENT),
+		),
+		Scenario(
+			"agent_with_structured_output",
+			"agent_with_structured_output",
+			lambda module, backend: module.agent_with_structured_output(DEPLOYMENT),
+		),
+		Scenario(
+			"agent_with_structured_output_stream",
+			"agent_with_structured_output",
+			lambda module, backend: module.agent_with_structured_output(DEPLOYMENT, stream=True),
+		),
+		Scenario("sample_workflow", "sample-workflow.py", lambda module, backend: module.sample_workflow(DEPLOYMENT)),
+		Scenario(
+			"workflow_concurrent_fan_in_fan_out",
+			"workflow_concurrent_fan_in_fan_out",
+			lambda module, backend: module.workflow_concurrent_fan_in_fan_out(DEPLOYMENT),
+		),
+		Scenario("simple_agent_stream", "samply", _samply("stream"), blocking=True),
+		Scenario("simple_agent_poll", "samply", _samply("poll"), blocking=True),
+		Scenario("simple_agent_legacy", "samply", _samply("legacy"), blocking=True),
+		Scenario(
+			"agent_with_memory",
+			"agent_with_memory",
+			lambda module, backend: module.agent_with_memory(
+				ENDPOINT,
+				DEPLOYMENT,
+				client=backend.project_client(),
+				memory_store="fake-memory",
+				# A fresh scope per run, so each run waits for its own writes to be indexed
+				memory_scope=backend.next_id("scope"),
+				readiness_deadline=2.0,
+			),
+			blocking=True,
+		),
+	)
+}
+
+
+def _import(name: str) -> Any:
+	if name.endswith(".py"):
+		# Scripts whose file names are not valid module names (sample-workflow.py)
+		spec = importlib.util.spec_from_file_location(name[:-3].replace("-", "_"), os.path.join(HERE, name))
+		module = importlib.util.module_from_spec(spec)
+		spec.loader.exec_module(module)
+		return module
+	return importlib.import_module(name)
+
+
+def percentile(samples: List[float], q: float) -> float:
+	"""Linear-interpolated percentile, `q` in [0, 1]."""
+	ordered = sorted(samples)
+	if not ordered:
+		return float("nan")
+	rank = q * (len(ordered) - 1)
+	low = int(rank)
+	high = min(low + 1, len(ordered) - 1)
+	return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _describe(exc: BaseException) -> str:
+	return f"{type(exc).__name__}: {exc}"
+
+
+def _ms(seconds: float) -> Optional[float]:
+	"""Milliseconds, or None for NaN (no successful run) so the JSON stays valid."""
+	return None if math.isnan(seconds) else seconds * 1000
+
+
+async def _once(scenario: Scenario, module: Any, backend: FakeBackend, errors: List[str]) -> Optional[float]:
+	"""
+	Seconds for one run, or None if it raised. Injected errors are counted,
+	not fatal; the description is appended to `errors` either way.
+	"""
+	start = time.perf_counter()
+	try:
+		if scenario.blocking:
+			scenario.run(module, backend)
+		else:
+			await scenario.run(module, backend)
+	except Exception as exc:
+		errors.append(_describe(exc))
+		return None
+	return time.perf_counter() - start
+
+
+async def _measure(scenario: Scenario, backend: FakeBackend, iterations: int, warmup: int, concurrency: int) -> Dict[str, Any]:
+	module = _import(scenario.module)
+	errors: List[str] = []
+	with backend.patch(module), contextlib.redirect_stdout(io.StringIO()):
+		for _ in range(warmup):
+			await _once(scenario, module, backend, [])
+
+		timings = [await _once(scenario, module, backend, errors) for _ in range(iterations)]
+		latencies = [t for t in timings if t is not None]
+		failures = len(timings) - len(latencies)
+
+		width = concurrency if scenario.concurrent else 1
+		semaphore = asyncio.Semaphore(width)
+
+		async def _slot() -> bool:
+			async with semaphore:
+				try:
+					if scenario.blocking:
+						await asyncio.to_thread(scenario.run, module, backend)
+					else:
+						await scenario.run(module, backend)
+				except Exception as exc:
+					errors.append(_describe(exc))
+					return False
+				return True
+
+		runs = max(iterations, width)
+		wall_start = time.perf_counter()
+		completed = sum(await asyncio.gather(*(_slot() for _ in range(runs))))
+		wall = time.perf_counter() - wall_start
+		failures += runs - completed
+
+		# Separate pass: tracing slows everything down, so it is not timed
+		tracemalloc.start()
+		await _once(scenario, module, backend, errors)
+		_, peak = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+
+	rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	if platform.system() == "Darwin":
+		rss_kb //= 1024
+	return {
+		"iterations": iterations,
+		"p50_ms": _ms(percentile(latencies, 0.50)),
+		"p95_ms": _ms(percentile(latencies, 0.95)),
+		"p99_ms": _ms(percentile(latencies, 0.99)),
+		"concurrency": width,
+		"throughput_per_s": completed / wall,
+		"failed_runs": failures,
+		"first_error": errors[0] if errors else None,
+		"heap_peak_kb": peak / 1024,
+		"rss_kb": rss_kb,
+		"backend_requests": backend.stats.requests,
+	}
+
+
+def _backend(args: argparse.Namespace) -> FakeBackend:
+	return FakeBackend(
+		latency=args.latency,
+		chunk_interval=args.chunk_interval,
+		chunk_size=args.chunk_size,
+		error_rate=args.error_rate,
+		throttle_rate=args.throttle_rate,
+		memory_indexing_delay=args.memory_indexing_delay,
+		seed=0,
+	)
+
+
+def _run_child(name: str, args: argparse.Namespace) -> Dict[str, Any]:
+	"""Each scenario runs in a fresh interpreter so RSS and import costs do not leak across."""
+	command = [
+		sys.executable, os.path.abspath(__file__), "--child", name,
+		"--iterations", str(args.iterations), "--warmup", str(args.warmup), "--concurrency", str(args.concurrency),
+		"--latency", str(args.latency), "--chunk-interval", str(args.chunk_interval),
+		"--chunk-size", str(args.chunk_size), "--error-rate", str(args.error_rate),
+		"--throttle-rate", str(args.throttle_rate), "--memory-indexing-delay", str(args.memory_indexing_delay),
+	]
+	completed = subprocess.run(command, capture_output=True, text=True, cwd=HERE)
+	if completed.returncode != 0:
+		return {"error": (completed.stderr.strip().splitlines() or ["failed"])[-1]}
+	return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+	"""
+	Regressions against `baseline`: p95 latency or peak heap up, or throughput
+	down, by more than `tolerance` (a fraction), or no successful run where
+	the baseline had some.
+	"""
+	regressions = []
+	for name, current in results.items():
+		before = baseline.get(name)
+		if not before or "error" in current or "error" in before:
+			continue
+		if current.get("p95_ms") is None and before.get("p95_ms") is not None:
+			regressions.append(f"{name}: every run failed (baseline p95 {before['p95_ms']:.1f} ms)")
+			continue
+		for metric, worse_when_higher in (("p95_ms", True), ("heap_peak_kb", True), ("throughput_per_s", False)):
+			old, new = before.get(metric), current.get(metric)
+			if not old or new is None:
+				continue
+			change = (new - old) / old
+			if (change > tolerance) if worse_when_higher else (change < -tolerance):
+				regressions.append(f"{name}: {metric} {old:.1f} -> {new:.1f} ({change:+.0%})")
+	return regressions
+
+
+def _format_row(name: str, result: Dict[str, Any], before: Optional[Dict[str, Any]]) -> str:
+	if "error" in result:
+		return f"{name:<38} ERROR {result['error']}"
+	failed = result.get("failed_runs", 0)
+	if result["p50_ms"] is None:  # no successful timed run
+		return f"{name:<38} every run failed ({failed}): {result.get('first_error')}"
+	delta = f"  {failed} failed ({result.get('first_error')})" if failed else ""
+	if before and "error" not in before and before.get("p50_ms"):
+		delta += f"  ({(result['p50_ms'] - before['p50_ms']) / before['p50_ms']:+.0%} p50)"
+	return (
+		f"{name:<38} {result['p50_ms']:8.1f} {result['p95_ms']:8.1f} {result['p99_ms']:8.1f} "
+		f"{result['throughput_per_s']:9.1f}/s {result['heap_peak_kb']:9.0f} KB {result['rss_kb'] / 1024:7.0f} MB{delta}"
+	)
+
+
+def failed_scenarios(results: Dict[str, Dict[str, Any]], errors_injected: bool) -> List[str]:
+	"""
+	Scenarios that must fail the run: every run raised, or any run raised
+	while the fake backend was not injecting errors.
+	"""
+	failing = []
+	for name, result in results.items():
+		if "error" in result:
+			continue
+		failed = result.get("failed_runs", 0)
+		if result.get("p50_ms") is None:
+			failing.append(f"{name}: every run failed; first error {result.get('first_error')}")
+		elif failed and not errors_injected:
+			failing.append(f"{name}: {failed} run(s) failed; first error {result.get('first_error')}")
+	return failing
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Benchmark the sample entry points against an offline fake backend")
+	parser.add_argument("scenarios", nargs="*", help=f"default: all of {', '.join(SCENARIOS)}")
+	parser.add_argument("--iterations", type=int, default=20)
+	parser.add_argument("--warmup", type=int, default=2)
+	parser.add_argument("--concurrency", type=int, default=8)
+	parser.add_argument("--latency", type=float, default=0.05, help="fake time to first token (seconds)")
+	parser.add_argument("--chunk-interval", type=float, default=0.005, help="fake delay between stream chunks")
+	parser.add_argument("--chunk-size", type=int, default=16, help="characters per stream chunk")
+	parser.add_argument("--error-rate", type=float, default=0.0)
+	parser.add_argument("--throttle-rate", type=float, default=0.0)
+	parser.add_argument("--memory-indexing-delay", type=float, default=0.0, help="fake lag before a turn is searchable in memory")
+	parser.add_argument("--baseline", default=os.path.join(HERE, "bench_baselines.json"))
+	parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+	parser.add_argument("--tolerance", type=float, default=0.15, help="allowed regression vs baseline (fraction)")
+	parser.add_argument("--child", help=argparse.SUPPRESS)
+	args = parser.parse_args()
+
+	if args.child:
+		result = asyncio.run(_measure(SCENARIOS[args.child], _backend(args), args.iterations, args.warmup, args.concurrency))
+		print(json.dumps(result))
+		return
+
+	names = args.scenarios or list(SCENARIOS)
+	unknown = [name for name in names if name not in SCENARIOS]
+	if unknown:
+		parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+	baseline: Dict[str, Dict[str, Any]] = {}
+	if os.path.exists(args.baseline):
+		with open(args.baseline, "r", encoding="utf-8") as f:
+			baseline = json.load(f).get("scenarios", {})
+
+	print(
+		f"fake backend: {args.latency * 1000:.0f} ms first token, {args.chunk_interval * 1000:.1f} ms/chunk of "
+		f"{args.chunk_size} chars; {args.iterations} iterations, concurrency {args.concurrency}\n"
+	)
+	print(f"{'scenario':<38} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'throughput':>11} {'heap peak':>12} {'rss':>10}")
+	results: Dict[str, Dict[str, Any]] = {}
+	for name in names:
+		results[name] = _run_child(name, args)
+		print(_format_row(name, results[name], baseline.get(name)), flush=True)
+
+	regressions = compare(results, baseline, args.tolerance)
+	if regressions:
+		print("\nRegressions vs baseline:")
+		for line in regressions:
+			print(f"  {line}")
+
+	failing = failed_scenarios(results, errors_injected=bool(args.error_rate or args.throttle_rate))
+	if failing:
+		print("\nFailed scenarios:")
+		for line in failing:
+			print(f"  {line}")
+
+	if args.save_baseline:
+		merged = dict(baseline)
+		merged.update({name: result for name, result in results.items() if "error" not in result and result["p50_ms"] is not None})
+		settings = {k: v for k, v in vars(args).items() if k not in ("scenarios", "baseline", "save_baseline", "child")}
+		with open(args.baseline, "w", encoding="utf-8") as f:
+			json.dump({"settings": settings, "scenarios": merged}, f, indent=2, sort_keys=True)
+		print(f"\nBaseline written to {args.baseline}")
+
+	if regressions or failing or any("error" in result for result in results.values()):
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,124 @@
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from agent_framework import ChatMessage, Role
+
+from conversation_store import open_conversation_store
+from session_manager import SessionManager
+
+
+def _turn(rng: random.Random, words: int) -> List[ChatMessage]:
+	text = lambda: " ".join(f"w{rng.randrange(5000)}" for _ in range(words))
+	return [ChatMessage(role=Role.USER, text=text()), ChatMessage(role=Role.ASSISTANT, text=text())]
+
+
+def _users(rng: random.Random, sessions: int, turns: int, skew: float) -> List[str]:
+	"""Zipf-like access: a few users talk a lot, most come back rarely."""
+	weights = [1.0 / (rank + 1) ** skew for rank in range(sessions)]
+	return [f"user-{i}" for i in rng.choices(range(sessions), weights=weights, k=turns)]
+
+
+def bench_unbounded(users: List[str], words: int) -> int:
+	"""The `multi_turn_async` baseline: every conversation stays a `List[ChatMessage]`; returns bytes held."""
+	rng = random.Random(0)
+	tracemalloc.start()
+	histories: Dict[str, List[ChatMessage]] = {}
+	for user in users:
+		histories.setdefault(user, []).extend(_turn(rng, words))
+	held, _ = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return held
+
+
+async def bench_managed(
+	users: List[str],
+	store_path: str,
+	words: int,
+	max_bytes: int,
+	concurrency: int,
+	window: int,
+	rehydrate_last_n: Optional[int],
+	trace: bool,
+) -> int:
+	"""
+	Replay `users` through a `SessionManager`; returns bytes held when `trace`.
+
+	Timings are only printed for untraced runs: tracemalloc slows every allocation
+	several times over and would swamp the rehydrate/spill latencies.
+	"""
+	rng = random.Random(0)
+	store = open_conversation_store(store_path)
+	manager = SessionManager(store, max_bytes=max_bytes, rehydrate_last_n=rehydrate_last_n)
+	queue = iter(users)
+	latencies: List[float] = []
+
+	async def worker() -> None:
+		for user in queue:
+			started = time.perf_counter()
+			async with manager.session(user) as session:
+				session.chat_messages(window)
+				session.append(*_turn(rng, words))
+			latencies.append(time.perf_counter() - started)
+
+	held = 0
+	if trace:
+		tracemalloc.start()
+	started = time.perf_counter()
+	await asyncio.gather(*(worker() for _ in range(concurrency)))
+	elapsed = time.perf_counter() - started
+	if trace:
+		held, _ = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+	else:
+		latencies.sort()
+		print(
+			f"managed    {len(users) / elapsed:8.0f} turns/s  turn p50 {latencies[len(latencies) // 2] * 1000:.2f} ms  "
+			f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms"
+		)
+		print(f"           {manager.format_stats()}")
+	await manager.aclose()
+	store.close()
+	return held
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Benchmark the session manager against unbounded per-user histories")
+	parser.add_argument("--sessions", type=int, default=20_000)
+	parser.add_argument("--turns", type=int, default=100_000)
+	parser.add_argument("--words", type=int, default=30, help="words per message")
+	parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of the access pattern")
+	parser.add_argument("--budget-mb", type=float, default=16.0)
+	parser.add_argument("--concurrency", type=int, default=64)
+	parser.add_argument("--window", type=int, default=20, help="messages sent to the model per turn")
+	parser.add_argument("--rehydrate-last-n", type=int, default=None, help="reload only this many messages of a spilled session")
+	parser.add_argument("--store", default="sqlite", choices=["sqlite", "jsonl"])
+	args = parser.parse_args()
+
+	users = _users(random.Random(1), args.sessions, args.turns, args.skew)
+	print(f"{args.turns} turns over {len(set(users))} of {args.sessions} sessions\n")
+
+	unbounded = bench_unbounded(users, args.words)
+	print(f"unbounded  {unbounded / 1e6:8.1f} MB held")
+
+	directory = tempfile.mkdtemp(prefix="session_manager_")
+	try:
+		extension = ".db" if args.store == "sqlite" else ".jsonl"
+		path = lambda run: os.path.join(directory, run + extension)
+		budget = int(args.budget_mb * 1024 * 1024)
+		settings = (args.words, budget, args.concurrency, args.window, args.rehydrate_last_n)
+		asyncio.run(bench_managed(users, path("timed"), *settings, trace=False))
+		managed = asyncio.run(bench_managed(users, path("traced"), *settings, trace=True))
+		print(f"           {managed / 1e6:8.1f} MB held ({managed / unbounded:.1%} of unbounded)")
+	finally:
+		shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,327 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Protocol
+from urllib.parse import quote, unquote
+
+import message_codec
+
+
+Record = Dict[str, Any]
+
+
+class ConversationStore(Protocol):
+	"""
+	Minimal interface for persisting conversation threads turn by turn.
+
+	- `append` writes only the new records of a thread
+	- `load` resumes a thread, optionally just its last `last_n` records
+	- `compact` reclaims space left behind by deleted threads
+	"""
+
+	def append(self, thread_id: str, records: Iterable[Record]) -> None: ...
+
+	def load(self, thread_id: str, last_n: Optional[int] = None) -> List[Record]: ...
+
+	def delete(self, thread_id: str) -> None: ...
+
+	def compact(self) -> None: ...
+
+	def close(self) -> None: ...
+
+
+class JsonlConversationStore:
+	"""
+	Append-only JSONL log shared by every thread.
+
+	Each line is `{"t": thread_id, "r": record}` (or `{"t": thread_id, "d": 1}` for a delete).
+	The log is replayed once on open to build an in-memory index of byte offsets per
+	thread, so `load` seeks straight to a thread's lines instead of parsing the whole file.
+	`compact` rewrites the log without deleted threads and swaps it in atomically.
+	"""
+
+	def __init__(self, path: str) -> None:
+		self.path = path
+		self._lock = threading.RLock()
+		self._index: Dict[str, List[int]] = {}
+		self._dead_lines = 0
+		self._live_lines = 0
+		self._compactor: Optional[threading.Thread] = None
+		self._stop = threading.Event()
+		open(path, "ab").close()
+		self._replay()
+		self._fh = open(path, "ab")
+
+	def _replay(self) -> None:
+		self._index.clear()
+		self._dead_lines = 0
+		self._live_lines = 0
+		with open(self.path, "rb") as f:
+			offset = 0
+			for line in f:
+				if not line.endswith(b"\n"):
+					# Torn write from a crash: the partial trailing line is cut off below
+					break
+				try:
+					entry = json.loads(line)
+				except ValueError:
+					break
+				thread_id = entry["t"]
+				if entry.get("d"):
+					self._dead_lines += len(self._index.pop(thread_id, [])) + 1
+				else:
+					self._index.setdefault(thread_id, []).append(offset)
+					self._live_lines += 1
+				offset += len(line)
+		if offset != os.path.getsize(self.path):
+			# Appending after a fragment would fuse the next record into it and lose
+			# everything after it on the following replay
+			with open(self.path, "r+b") as f:
+				f.truncate(offset)
+
+	def append(self, thread_id: str, records: Iterable[Record]) -> None:
+		lines = [
+			json.dumps({"t": thread_id, "r": record}, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+			for record in records
+		]
+		if not lines:
+			return
+		with self._lock:
+			offset = self._fh.seek(0, os.SEEK_END)
+			self._fh.write(b"".join(lines))
+			self._fh.flush()
+			offsets = self._index.setdefault(thread_id, [])
+			for line in lines:
+				offsets.append(offset)
+				offset += len(line)
+			self._live_lines += len(lines)
+
+	def load(self, thread_id: str, last_n: Optional[int] = None) -> List[Record]:
+		with self._lock:
+			offsets = list(self._index.get(thread_id, []))
+			if last_n is not None:
+				offsets = offsets[-last_n:] if last_n > 0 else []
+			records: List[Record] = []
+			with open(self.path, "rb") as f:
+				for offset in offsets:
+					f.seek(offset)
+					records.append(json.loads(f.readline())["r"])
+			return records
+
+	def delete(self, thread_id: str) -> None:
+		with self._lock:
+			removed = self._index.pop(thread_id, None)
+			if removed is None:
+				return
+			self._fh.write(json.dumps({"t": thread_id, "d": 1}).encode("utf-8") + b"\n")
+			self._fh.flush()
+			self._live_lines -= len(removed)
+			self._dead_lines += len(removed) + 1
+
+	def thread_ids(self) -> List[str]:
+		with self._lock:
+			return list(self._index)
+
+	def garbage_ratio(self) -> float:
+		total = self._live_lines + self._dead_lines
+		return self._dead_lines / total if total else 0.0
+
+	def compact(self) -> None:
+		with self._lock:
+			tmp_path = self.path + ".compact"
+			with open(self.path, "rb") as src, open(tmp_path, "wb") as dst:
+				for offsets in self._index.values():
+					for offset in offsets:
+						src.seek(offset)
+						dst.write(src.readline())
+				dst.flush()
+				os.fsync(dst.fileno())
+			self._fh.close()
+			os.replace(tmp_path, self.path)
+			self._fh = open(self.path, "ab")
+			self._replay()
+
+	def start_background_compaction(self, interval: float = 60.0, min_garbage_ratio: float = 0.5) -> None:
+		"""Compact from a daemon thread whenever deleted lines exceed `min_garbage_ratio`."""
+		if self._compactor is not None:
+			return
+
+		def _loop() -> None:
+			while not self._stop.wait(interval):
+				if self.garbage_ratio() >= min_garbage_ratio:
+					self.compact()
+
+		self._compactor = threading.Thread(target=_loop, name="jsonl-compactor", daemon=True)
+		self._compactor.start()
+
+	def close(self) -> None:
+		self._stop.set()
+		if self._compactor is not None:
+			self._compactor.join()
+			self._compactor = None
+		with self._lock:
+			self._fh.close()
+
+
+class SqliteConversationStore:
+	"""
+	SQLite store in WAL mode: one row per record, keyed by (thread_id, seq).
+
+	WAL lets readers resume threads while another connection appends, and the
+	primary key makes `load(..., last_n=...)` an index seek rather than a scan.
+	`compact` checkpoints the WAL and returns free pages to the OS.
+	"""
+
+	def __init__(self, path: str) -> None:
+		self.path = path
+		self._lock = threading.RLock()
+		self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+		self._conn.execute("PRAGMA journal_mode=WAL")
+		self._conn.execute("PRAGMA synchronous=NORMAL")
+		self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+		self._conn.execute(
+			"CREATE TABLE IF NOT EXISTS records ("
+			" thread_id TEXT NOT NULL,"
+			" seq INTEGER NOT NULL,"
+			" payload TEXT NOT NULL,"
+			" PRIMARY KEY (thread_id, seq)"
+			") WITHOUT ROWID"
+		)
+		self._compactor: Optional[threading.Thread] = None
+		self._stop = threading.Event()
+
+	def append(self, thread_id: str, records: Iterable[Record]) -> None:
+		payloads = [json.dumps(record, ensure_ascii=False, separators=(",", ":")) for record in records]
+		if not payloads:
+			return
+		with self._lock:
+			self._conn.execute("BEGIN IMMEDIATE")
+			try:
+				row = self._conn.execute(
+					"SELECT COALESCE(MAX(seq), -1) FROM records WHERE thread_id = ?", (thread_id,)
+				).fetchone()
+				start = row[0] + 1
+				self._conn.executemany(
+					"INSERT INTO records (thread_id, seq, payload) VALUES (?, ?, ?)",
+					[(thread_id, start + i, payload) for i, payload in enumerate(payloads)],
+				)
+				self._conn.execute("COMMIT")
+			except BaseException:
+				self._conn.execute("ROLLBACK")
+				raise
+
+	def load(self, thread_id: str, last_n: Optional[int] = None) -> List[Record]:
+		with self._lock:
+			if last_n is None:
+				rows = self._conn.execute(
+					"SELECT payload FROM records WHERE thread_id = ? ORDER BY seq", (thread_id,)
+				).fetchall()
+			else:
+				rows = self._conn.execute(
+					"SELECT payload FROM records WHERE thread_id = ? ORDER BY seq DESC LIMIT ?",
+					(thread_id, max(last_n, 0)),
+				).fetchall()
+				rows.reverse()
+		return [json.loads(payload) for (payload,) in rows]
+
+	def delete(self, thread_id: str) -> None:
+		with self._lock:
+			self._conn.execute("DELETE FROM records WHERE thread_id = ?", (thread_id,))
+
+	def thread_ids(self) -> List[str]:
+		with self._lock:
+			return [row[0] for row in self._conn.execute("SELECT DISTINCT thread_id FROM records")]
+
+	def compact(self) -> None:
+		with self._lock:
+			self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+			self._conn.execute("PRAGMA incremental_vacuum")
+
+	def start_background_compaction(self, interval: float = 60.0) -> None:
+		"""Checkpoint and vacuum from a daemon thread every `interval` seconds."""
+		if self._compactor is not None:
+			return
+
+		def _loop() -> None:
+			while not self._stop.wait(interval):
+				self.compact()
+
+		self._compactor = threading.Thread(target=_loop, name="sqlite-compactor", daemon=True)
+		self._compactor.start()
+
+	def close(self) -> None:
+		self._stop.set()
+		if self._compactor is not None:
+			self._compactor.join()
+			self._compactor = None
+		with self._lock:
+			self._conn.close()
+
+
+class MessageLogConversationStore:
+	"""
+	Directory of binary message logs (`message_codec`), one file per thread.
+
+	Records keep full `ChatMessage.to_dict()` fidelity in the compact codec, and
+	`load(..., last_n=...)` memory-maps the thread's log and decodes only its
+	last `last_n` records. A delete removes the file, so `compact` has nothing to do.
+	"""
+
+	SUFFIX = ".cmh"
+
+	def __init__(self, directory: str) -> None:
+		self.directory = directory
+		self._lock = threading.RLock()
+		os.makedirs(directory, exist_ok=True)
+
+	def _path(self, thread_id: str) -> str:
+		return os.path.join(self.directory, quote(thread_id, safe="") + self.SUFFIX)
+
+	def append(self, thread_id: str, records: Iterable[Record]) -> None:
+		records = list(records)
+		if not records:
+			return
+		with self._lock:
+			message_codec.append(records, self._path(thread_id))
+
+	def load(self, thread_id: str, last_n: Optional[int] = None) -> List[Record]:
+		path = self._path(thread_id)
+		with self._lock:
+			if not os.path.exists(path):
+				return []
+			with message_codec.MappedMessageLog(path) as log:
+				if last_n is None:
+					return list(log)
+				return log.tail(last_n)
+
+	def delete(self, thread_id: str) -> None:
+		with self._lock:
+			try:
+				os.remove(self._path(thread_id))
+			except FileNotFoundError:
+				pass
+
+	def thread_ids(self) -> List[str]:
+		with self._lock:
+			return [
+				unquote(name[: -len(self.SUFFIX)]) for name in os.listdir(self.directory) if name.endswith(self.SUFFIX)
+			]
+
+	def compact(self) -> None:
+		pass
+
+	def close(self) -> None:
+		pass
+
+
+def open_conversation_store(path: str) -> ConversationStore:
+	"""
+	Pick a backend from the path: `.jsonl` for the log, a `.cmh` directory for
+	binary message logs, anything else for SQLite.
+	"""
+	if path.endswith(".jsonl"):
+		return JsonlConversationStore(path)
+	if path.endswith(MessageLogConversationStore.SUFFIX):
+		return MessageLogConversationStore(path)
+	return SqliteConversationStore(path)
@@ -0,0 +1,293 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+from azure.core.credentials import AccessToken
+
+try:
+	import fcntl
+except ImportError:  # Windows: the disk cache still works, just without cross-process refresh locking
+	fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+# Refresh this long before expiry; the cached token is still served meanwhile.
+DEFAULT_REFRESH_MARGIN = 300.0
+# Below this remaining lifetime a cached token is not handed out at all.
+MIN_VALIDITY = 30.0
+
+
+def _cache_key(scopes: Tuple[str, ...], kwargs: Dict[str, Any]) -> Optional[str]:
+	"""Key tokens by scopes, tenant and CAE flag; claims challenges always bypass the cache."""
+	if kwargs.get("claims"):
+		return None
+	parts = [" ".join(sorted(scopes)), kwargs.get("tenant_id") or "", str(bool(kwargs.get("enable_cae")))]
+	return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+class DiskTokenCache:
+	"""
+	JSON file of tokens shared by every process of the same user.
+
+	Writes go through an atomic rename and the file is created with 0600
+	permissions. `refresh_lock(key)` is an exclusive file lock so only one process
+	refreshes a given scope at a time; the rest re-read the file afterwards.
+	`async_refresh_lock(key)` is the same lock for coroutines: it polls with a
+	non-blocking flock, so waiting never blocks the event loop and a cancelled
+	waiter never ends up holding the lock.
+	"""
+
+	def __init__(self, path: str) -> None:
+		self.path = path
+		self._lock = threading.Lock()
+
+	def _read(self) -> Dict[str, Any]:
+		try:
+			with open(self.path, "r", encoding="utf-8") as f:
+				return json.load(f)
+		except (OSError, ValueError):
+			return {}
+
+	def get(self, key: str) -> Optional[AccessToken]:
+		entry = self._read().get(key)
+		if not entry:
+			return None
+		return AccessToken(entry["token"], int(entry["expires_on"]))
+
+	def put(self, key: str, token: AccessToken) -> None:
+		with self._lock, self.refresh_lock("__file__"):
+			data = self._read()
+			now = time.time()
+			data = {k: v for k, v in data.items() if v.get("expires_on", 0) > now}
+			data[key] = {"token": token.token, "expires_on": token.expires_on}
+			tmp_path = f"{self.path}.{os.getpid()}.tmp"
+			fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+			with os.fdopen(fd, "w", encoding="utf-8") as f:
+				json.dump(data, f)
+			os.replace(tmp_path, self.path)
+
+	def _lock_fd(self, key: str) -> int:
+		return os.open(f"{self.path}.{key[:16]}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+
+	@contextmanager
+	def refresh_lock(self, key: str) -> Iterator[None]:
+		if fcntl is None:
+			yield
+			return
+		fd = self._lock_fd(key)
+		try:
+			fcntl.flock(fd, fcntl.LOCK_EX)
+			try:
+				yield
+			finally:
+				fcntl.flock(fd, fcntl.LOCK_UN)
+		finally:
+			os.close(fd)
+
+	@asynccontextmanager
+	async def async_refresh_lock(self, key: str, poll: float = 0.05) -> AsyncIterator[None]:
+		if fcntl is None:
+			yield
+			return
+		fd = self._lock_fd(key)
+		try:
+			while True:
+				try:
+					fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+					break
+				except BlockingIOError:
+					await asyncio.sleep(poll)
+			try:
+				yield
+			finally:
+				fcntl.flock(fd, fcntl.LOCK_UN)
+		finally:
+			os.close(fd)
+
+
+class _TokenCache:
+	"""In-memory tokens per key plus the freshness rules shared by both wrappers."""
+
+	def __init__(self, refresh_margin: float, disk: Optional[DiskTokenCache]) -> None:
+		self.refresh_margin = refresh_margin
+		self.disk = disk
+		self.tokens: Dict[str, AccessToken] = {}
+		self.refreshes = 0
+
+	def lookup(self, key: str) -> Tuple[Optional[AccessToken], bool]:
+		"""Return (usable token or None, whether a refresh should be started)."""
+		token = self.tokens.get(key)
+		if token is None and self.disk is not None:
+			token = self.disk.get(key)
+			if token is not None:
+				self.tokens[key] = token
+		if token is None:
+			return None, True
+		remaining = token.expires_on - time.time()
+		if remaining <= MIN_VALIDITY:
+			return None, True
+		return token, remaining <= self.refresh_margin
+
+	def store(self, key: str, token: AccessToken, persist: bool = True) -> None:
+		"""Remember `token`; `persist=False` leaves the (blocking) disk write to the caller."""
+		self.refreshes += 1
+		self.tokens[key] = token
+		if persist and self.disk is not None:
+			self.disk.put(key, token)
+
+
+class CachedAsyncCredential:
+	"""
+	Wraps an async credential (e.g. `azure.identity.aio.AzureCliCredential`) with a token cache.
+
+	- Tokens are cached per scope in memory and, if `disk_cache_path` is set, on disk
+	- Within `refresh_margin` seconds of expiry the cached token is served while a
+	  single background refresh runs
+	- Concurrent requests for the same scope share one call to the wrapped credential
+	"""
+
+	def __init__(
+		self,
+		credential: Any,
+		refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+		disk_cache_path: Optional[str] = None,
+	) -> None:
+		self._credential = credential
+		self._cache = _TokenCache(refresh_margin, DiskTokenCache(disk_cache_path) if disk_cache_path else None)
+		self._inflight: Dict[str, asyncio.Task] = {}
+
+	@property
+	def refreshes(self) -> int:
+		return self._cache.refreshes
+
+	async def get_token(self, *scopes: str, **kwargs: Any) -> AccessToken:
+		key = _cache_key(scopes, kwargs)
+		if key is None:
+			return await self._credential.get_token(*scopes, **kwargs)
+		token, needs_refresh = self._cache.lookup(key)
+		if not needs_refresh:
+			return token
+		task = self._inflight.get(key)
+		if task is None:
+			task = asyncio.get_running_loop().create_task(self._refresh(key, scopes, kwargs))
+			self._inflight[key] = task
+			task.add_done_callback(lambda t, k=key: self._refresh_done(k, t))
+		if token is not None:
+			# Refresh ahead: keep serving the still-valid token
+			return token
+		return await asyncio.shield(task)
+
+	def _refresh_done(self, key: str, task: asyncio.Task) -> None:
+		self._inflight.pop(key, None)
+		# A refresh-ahead task may have no waiter: observe its outcome here
+		if not task.cancelled() and task.exception() is not None:
+			logger.warning("token refresh failed; serving the cached token until it expires", exc_info=task.exception())
+
+	async def _refresh(self, key: str, scopes: Tuple[str, ...], kwargs: Dict[str, Any]) -> AccessToken:
+		disk = self._cache.disk
+		if disk is None:
+			token = await self._credential.get_token(*scopes, **kwargs)
+			self._cache.store(key, token)
+			return token
+		async with disk.async_refresh_lock(key):
+			# Another process may have refreshed while we waited for the lock
+			self._cache.tokens.pop(key, None)
+			fresh, needs_refresh = self._cache.lookup(key)
+			if fresh is not None and not needs_refresh:
+				return fresh
+			token = await self._credential.get_token(*scopes, **kwargs)
+			self._cache.store(key, token, persist=False)
+			# `put` takes the file lock and writes with blocking I/O
+			await asyncio.to_thread(disk.put, key, token)
+			return token
+
+	async def close(self) -> None:
+		for task in list(self._inflight.values()):
+			task.cancel()
+		await self._credential.close()
+
+	async def __aenter__(self) -> "CachedAsyncCredential":
+		await self._credential.__aenter__()
+		return self
+
+	async def __aexit__(self, *exc) -> None:
+		await self.close()
+
+
+class CachedCredential:
+	"""Synchronous counterpart of `CachedAsyncCredential` for `AIProjectClient` and other sync clients."""
+
+	def __init__(
+		self,
+		credential: Any,
+		refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+		disk_cache_path: Optional[str] = None,
+	) -> None:
+		self._credential = credential
+		self._cache = _TokenCache(refresh_margin, DiskTokenCache(disk_cache_path) if disk_cache_path else None)
+		self._lock = threading.Lock()
+		self._key_locks: Dict[str, threading.Lock] = {}
+		self._background: Dict[str, threading.Thread] = {}
+
+	@property
+	def refreshes(self) -> int:
+		return self._cache.refreshes
+
+	def get_token(self, *scopes: str, **kwargs: Any) -> AccessToken:
+		key = _cache_key(scopes, kwargs)
+		if key is None:
+			return self._credential.get_token(*scopes, **kwargs)
+		with self._lock:
+			token, needs_refresh = self._cache.lookup(key)
+			key_lock = self._key_locks.setdefault(key, threading.Lock())
+			if token is not None and needs_refresh and key not in self._background:
+				thread = threading.Thread(target=self._refresh, args=(key, key_lock, scopes, kwargs), daemon=True)
+				self._background[key] = thread
+				thread.start()
+		if token is not None:
+			return token
+		return self._refresh(key, key_lock, scopes, kwargs)
+
+	def _refresh(self, key: str, key_lock: threading.Lock, scopes: Tuple[str, ...], kwargs: Dict[str, Any]) -> AccessToken:
+		try:
+			with key_lock:
+				# Whoever held the lock before us may already have refreshed
+				with self._lock:
+					fresh, needs_refresh = self._cache.lookup(key)
+				if fresh is not None and not needs_refresh:
+					return fresh
+				disk = self._cache.disk
+				if disk is None:
+					token = self._credential.get_token(*scopes, **kwargs)
+				else:
+					with disk.refresh_lock(key):
+						with self._lock:
+							self._cache.tokens.pop(key, None)
+							fresh, needs_refresh = self._cache.lookup(key)
+						if fresh is not None and not needs_refresh:
+							return fresh
+						token = self._credential.get_token(*scopes, **kwargs)
+				with self._lock:
+					self._cache.store(key, token)
+				return token
+		finally:
+			if threading.current_thread() is self._background.get(key):
+				with self._lock:
+					self._background.pop(key, None)
+
+	def close(self) -> None:
+		self._credential.close()
+
+	def __enter__(self) -> "CachedCredential":
+		self._credential.__enter__()
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
@@ -0,0 +1,230 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from agent_framework import (
+	AgentExecutor,
+	AgentExecutorRequest,
+	AgentExecutorResponse,
+	ChatMessage,
+	Executor,
+	ExecutorCompletedEvent,
+	ExecutorInvokedEvent,
+	Role,
+	WorkflowBuilder,
+	WorkflowContext,
+	handler,
+)
+
+
+INPUT = "input"
+_INPUT_STATE_KEY = "dag_workflow.input"
+
+
+@dataclass
+class Stage:
+	name: str
+	agent: Any
+	inputs: Sequence[str]
+
+
+class _InputDispatcher(Executor):
+	"""Start executor: remembers the original text and hands it to every root stage at once."""
+
+	@handler
+	async def dispatch(self, text: str, ctx: WorkflowContext[AgentExecutorRequest]) -> None:
+		await ctx.set_shared_state(_INPUT_STATE_KEY, text)
+		await ctx.send_message(
+			AgentExecutorRequest(messages=[ChatMessage(role=Role.USER, text=text)], should_respond=True)
+		)
+
+
+class _StageJoin(Executor):
+	"""Waits for a stage's upstream outputs and builds its prompt from exactly the inputs it declared."""
+
+	def __init__(self, stage: Stage) -> None:
+		super().__init__(id=f"join:{stage.name}")
+		self.stage = stage
+
+	async def _forward(self, responses: List[AgentExecutorResponse], ctx: WorkflowContext[AgentExecutorRequest]) -> None:
+		outputs = {r.executor_id: r.agent_run_response.text for r in responses}
+		sections = []
+		for name in self.stage.inputs:
+			if name == INPUT:
+				sections.append(f"Original text:\n{await ctx.get_shared_state(_INPUT_STATE_KEY)}")
+			else:
+				sections.append(f"{name} output:\n{outputs.get(name) or ''}")
+		await ctx.send_message(
+			AgentExecutorRequest(
+				messages=[ChatMessage(role=Role.USER, text="\n\n".join(sections))],
+				should_respond=True,
+			)
+		)
+
+	@handler
+	async def join_one(self, response: AgentExecutorResponse, ctx: WorkflowContext[AgentExecutorRequest]) -> None:
+		await self._forward([response], ctx)
+
+	@handler
+	async def join_many(self, responses: list[AgentExecutorResponse], ctx: WorkflowContext[AgentExecutorRequest]) -> None:
+		await self._forward(responses, ctx)
+
+
+class DagWorkflowBuilder:
+	"""
+	Builds a `WorkflowBuilder` graph from the data each stage reads instead of a fixed chain.
+
+	Each stage lists its `inputs`: `INPUT` (the original text) and/or the names of
+	other stages. Stages whose inputs are all available run concurrently (fan-out),
+	and a stage with several upstream stages waits for all of them (fan-in) before
+	receiving one prompt that contains each declared input.
+
+		workflow = (
+			DagWorkflowBuilder()
+			.add_stage(french_agent)
+			.add_stage(spanish_agent)
+			.add_stage(quality_agent, inputs=[INPUT, "FrenchAgent", "SpanishAgent"])
+			.build()
+		)
+	"""
+
+	def __init__(self) -> None:
+		self._stages: Dict[str, Stage] = {}
+
+	def add_stage(self, agent: Any, inputs: Sequence[str] = (INPUT,), name: Optional[str] = None) -> "DagWorkflowBuilder":
+		name = name or getattr(agent, "name", None) or getattr(agent, "id", None)
+		if not name:
+			raise ValueError("stage needs a name; pass name= or give the agent one")
+		if name in self._stages or name == INPUT:
+			raise ValueError(f"duplicate stage name {name!r}")
+		self._stages[name] = Stage(name=name, agent=agent, inputs=list(inputs))
+		return self
+
+	@property
+	def stages(self) -> Dict[str, Stage]:
+		return dict(self._stages)
+
+	def levels(self) -> List[List[str]]:
+		"""Topological levels: every stage in a level only depends on earlier levels."""
+		for stage in self._stages.values():
+			unknown = [d for d in stage.inputs if d != INPUT and d not in self._stages]
+			if unknown:
+				raise ValueError(f"stage {stage.name!r} reads unknown stage(s) {unknown}")
+		remaining = {name: {d for d in s.inputs if d != INPUT} for name, s in self._stages.items()}
+		levels: List[List[str]] = []
+		done: set = set()
+		while remaining:
+			ready = [name for name, deps in remaining.items() if deps <= done]
+			if not ready:
+				raise ValueError(f"dependency cycle between stages {sorted(remaining)}")
+			levels.append(ready)
+			done.update(ready)
+			for name in ready:
+				del remaining[name]
+		return levels
+
+	def build(self):
+		"""
+		Build the workflow. Stages no other stage reads are the sinks: their
+		responses are yielded as `WorkflowOutputEvent`s.
+		"""
+		levels = self.levels()
+		read = {d for stage in self._stages.values() for d in stage.inputs}
+		# Explicit executors so each stage's executor id is its stage name
+		executors = {
+			name: AgentExecutor(stage.agent, id=name, output_response=name not in read)
+			for name, stage in self._stages.items()
+		}
+		roots = [executors[name] for name in levels[0]]
+		dispatcher = _InputDispatcher(id="dag_input")
+
+		builder = WorkflowBuilder().set_start_executor(dispatcher)
+		if len(roots) == 1:
+			builder = builder.add_edge(dispatcher, roots[0])
+		else:
+			builder = builder.add_fan_out_edges(dispatcher, roots)
+
+		for level in levels[1:]:
+			for name in level:
+				stage = self._stages[name]
+				join = _StageJoin(stage)
+				upstream = [executors[d] for d in stage.inputs if d != INPUT]
+				if len(upstream) == 1:
+					builder = builder.add_edge(upstream[0], join)
+				else:
+					builder = builder.add_fan_in_edges(upstream, join)
+				builder = builder.add_edge(join, executors[name])
+		return builder.build()
+
+
+@dataclass
+class CriticalPathReport:
+	durations: Dict[str, float] = field(default_factory=dict)
+	critical_path: List[str] = field(default_factory=list)
+	critical_path_seconds: float = 0.0
+	sequential_seconds: float = 0.0
+	wall_seconds: float = 0.0
+
+	def format(self) -> str:
+		lines = [f"  {name}: {seconds:.2f}s" for name, seconds in self.durations.items()]
+		lines.append(f"  critical path ({' -> '.join(self.critical_path)}): {self.critical_path_seconds:.2f}s")
+		lines.append(f"  sequential baseline (sum of stages): {self.sequential_seconds:.2f}s")
+		lines.append(f"  observed wall time: {self.wall_seconds:.2f}s")
+		return "\n".join(lines)
+
+
+class StageTimer:
+	"""
+	Records per-stage durations from a workflow event stream and computes the critical path.
+
+		timer = StageTimer(dag)
+		async for evt in timer.observe(workflow.run_stream(text)):
+			...
+		print(timer.report().format())
+	"""
+
+	def __init__(self, dag: DagWorkflowBuilder) -> None:
+		self._stages = dag.stages
+		self._levels = dag.levels()
+		self._started: Dict[str, float] = {}
+		self._durations: Dict[str, float] = {}
+		self._wall_start: Optional[float] = None
+		self._wall_end: Optional[float] = None
+
+	async def observe(self, events: AsyncIterator[Any]) -> AsyncIterator[Any]:
+		self._wall_start = time.perf_counter()
+		async for evt in events:
+			executor_id = getattr(evt, "executor_id", None)
+			if executor_id in self._stages:
+				now = time.perf_counter()
+				if isinstance(evt, ExecutorCompletedEvent):
+					if executor_id in self._started:
+						self._durations[executor_id] = now - self._started[executor_id]
+				elif isinstance(evt, ExecutorInvokedEvent):
+					self._started.setdefault(executor_id, now)
+			yield evt
+		self._wall_end = time.perf_counter()
+
+	def report(self) -> CriticalPathReport:
+		# Longest path through the DAG, weighting each stage by its observed duration
+		finish: Dict[str, float] = {}
+		via: Dict[str, Optional[str]] = {}
+		for level in self._levels:
+			for name in level:
+				deps = [d for d in self._stages[name].inputs if d != INPUT]
+				before = max(deps, key=lambda d: finish[d], default=None)
+				finish[name] = (finish[before] if before else 0.0) + self._durations.get(name, 0.0)
+				via[name] = before
+		end = max(finish, key=finish.get, default=None)
+		path: List[str] = []
+		while end is not None:
+			path.append(end)
+			end = via[end]
+		path.reverse()
+		return CriticalPathReport(
+			durations={name: self._durations.get(name, 0.0) for level in self._levels for name in level},
+			critical_path=path,
+			critical_path_seconds=finish[path[-1]] if path else 0.0,
+			sequential_seconds=sum(self._durations.values()),
+			wall_seconds=(self._wall_end or 0.0) - (self._wall_start or 0.0),
+		)
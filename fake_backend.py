@@ -0,0 +1,580 @@
+import asyncio
+import itertools
+import json
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, AsyncIterable, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Union
+
+from azure.core.credentials import AccessToken
+from azure.ai.agents.models import AgentStreamEvent, ListSortOrder, MessageDeltaChunk, RunStatus
+from agent_framework import (
+	BaseChatClient,
+	ChatMessage,
+	ChatResponse,
+	ChatResponseUpdate,
+	FunctionCallContent,
+	FunctionResultContent,
+	Role,
+	TextContent,
+	use_chat_middleware,
+	use_function_invocation,
+)
+from agent_framework.exceptions import ServiceResponseException
+
+from memory_readiness import FakeMemoryService
+
+
+Delay = Union[float, Callable[[], float]]
+Responder = Callable[[List[ChatMessage], Any], str]
+
+
+class FakeServiceError(ServiceResponseException):
+	"""Injected 5xx-style failure."""
+
+	status_code = 500
+
+
+class FakeThrottledError(ServiceResponseException):
+	"""Injected 429 with a `retry_after` hint in seconds, like the real service returns."""
+
+	status_code = 429
+
+	def __init__(self, message: str, retry_after: float) -> None:
+		super().__init__(message)
+		self.retry_after = retry_after
+
+
+@dataclass
+class BackendStats:
+	requests: int = 0
+	streamed: int = 0
+	tool_calls: int = 0
+	errors: int = 0
+	throttled: int = 0
+
+
+def sample_from_schema(schema: Mapping[str, Any], defs: Optional[Mapping[str, Any]] = None) -> Any:
+	"""A small valid instance of a JSON schema (objects, arrays, scalars, `$ref`, `anyOf`, `enum`)."""
+	defs = defs if defs is not None else schema.get("$defs", {})
+	if "$ref" in schema:
+		return sample_from_schema(defs[schema["$ref"].rsplit("/", 1)[-1]], defs)
+	if "enum" in schema:
+		return schema["enum"][0]
+	for key in ("anyOf", "oneOf"):
+		if key in schema:
+			options = [s for s in schema[key] if s.get("type") != "null"] or schema[key]
+			return sample_from_schema(options[0], defs)
+	kind = schema.get("type")
+	if kind == "object" or "properties" in schema:
+		return {name: sample_from_schema(sub, defs) for name, sub in schema.get("properties", {}).items()}
+	if kind == "array":
+		return [sample_from_schema(schema.get("items", {}), defs)]
+	return {"string": "sample", "integer": 1, "number": 1.0, "boolean": True, "null": None}.get(kind, "sample")
+
+
+def _last_user_text(messages: Sequence[ChatMessage]) -> str:
+	for message in reversed(messages):
+		if message.role == Role.USER and message.text:
+			return message.text
+	return ""
+
+
+class FakeBackend:
+	"""
+	Configurable offline stand-in for the Foundry services used by the samples.
+
+	One `FakeBackend` hands out fakes that share its settings, RNG and counters:
+
+	- `chat_client()`: an `AzureAIAgentClient`-compatible `BaseChatClient`, so
+	  `client.create_agent(...)` returns a real `ChatAgent` with middleware and tools
+	- `project_client()`: an `AIProjectClient`-shaped object (agents, threads,
+	  messages, runs incl. streaming, and `get_openai_client()`)
+	- `credential()` / `async_credential()`: token credentials that never expire
+	- `patch(module)`: swap those into a sample module for the duration of a block
+
+	Timing model: `latency` before the first chunk, then `chunk_interval` per
+	`chunk_size` characters. `error_rate` and `throttle_rate` inject failures per
+	request; `quota` requests per `quota_window` seconds behaves like a deployment's
+	rate limit (429 with the real wait as `retry_after` once exceeded);
+	`tool_args` scripts the arguments of tool calls by tool name. Items sent to a
+	fake memory store land in `memory` and become searchable after
+	`memory_indexing_delay`.
+	"""
+
+	def __init__(
+		self,
+		latency: Delay = 0.05,
+		chunk_interval: Delay = 0.005,
+		chunk_size: int = 16,
+		reply_words: int = 40,
+		responder: Optional[Responder] = None,
+		tool_args: Optional[Mapping[str, Mapping[str, Any]]] = None,
+		error_rate: float = 0.0,
+		throttle_rate: float = 0.0,
+		retry_after: float = 1.0,
+		quota: Optional[int] = None,
+		quota_window: float = 60.0,
+		memory_indexing_delay: Delay = 0.0,
+		seed: Optional[int] = 0,
+	) -> None:
+		self.latency = latency
+		self.chunk_interval = chunk_interval
+		self.chunk_size = chunk_size
+		self.reply_words = reply_words
+		self.responder = responder
+		self.tool_args = dict(tool_args or {})
+		self.error_rate = error_rate
+		self.throttle_rate = throttle_rate
+		self.retry_after = retry_after
+		self.quota = quota
+		self.quota_window = quota_window
+		self._admitted: deque = deque()
+		self.memory = FakeMemoryService(indexing_delay=memory_indexing_delay)
+		self.stats = BackendStats()
+		self._rng = random.Random(seed)
+		self._lock = threading.Lock()
+		self._ids = itertools.count(1)
+
+	def next_id(self, prefix: str) -> str:
+		return f"{prefix}_{next(self._ids):06d}"
+
+	def _delay(self, value: Delay) -> float:
+		return value() if callable(value) else value
+
+	def first_token_delay(self) -> float:
+		return self._delay(self.latency)
+
+	def chunk_delay(self) -> float:
+		return self._delay(self.chunk_interval)
+
+	def chunks(self, text: str) -> List[str]:
+		size = max(1, self.chunk_size)
+		return [text[i : i + size] for i in range(0, len(text), size)] or [""]
+
+	def begin_request(self, streamed: bool = False) -> None:
+		"""Count a request and raise an injected failure if one is due."""
+		with self._lock:
+			self.stats.requests += 1
+			self.stats.streamed += streamed
+			if self.quota is not None:
+				now = time.monotonic()
+				while self._admitted and now - self._admitted[0] >= self.quota_window:
+					self._admitted.popleft()
+				if len(self._admitted) >= self.quota:
+					self.stats.throttled += 1
+					wait = self._admitted[0] + self.quota_window - now
+					raise FakeThrottledError("429 Too Many Requests (quota exceeded)", round(wait, 3))
+				self._admitted.append(now)
+			roll = self._rng.random()
+			if roll < self.throttle_rate:
+				self.stats.throttled += 1
+				raise FakeThrottledError("429 Too Many Requests (injected)", self.retry_after)
+			if roll < self.throttle_rate + self.error_rate:
+				self.stats.errors += 1
+				raise FakeServiceError("500 Internal Server Error (injected)")
+
+	def reply_text(self, messages: Sequence[ChatMessage], response_format: Any = None) -> str:
+		if self.responder is not None:
+			return self.responder(list(messages), response_format)
+		if response_format is not None and hasattr(response_format, "model_json_schema"):
+			return json.dumps(sample_from_schema(response_format.model_json_schema()))
+		prompt = _last_user_text(messages) or "hello"
+		words = (prompt.split() * (self.reply_words // max(1, len(prompt.split())) + 1))[: self.reply_words]
+		return "(fake) " + " ".join(words)
+
+	def tool_call(self, tools: Sequence[Any], messages: Sequence[ChatMessage]) -> Optional[FunctionCallContent]:
+		"""Call the first tool once per user turn; answer in text after its result comes back."""
+		if not tools:
+			return None
+		for message in reversed(messages):
+			if any(isinstance(c, FunctionResultContent) for c in message.contents):
+				return None
+			if message.role == Role.USER:
+				break
+		tool = tools[0]
+		name = getattr(tool, "name", None)
+		if name is None:
+			return None
+		if name in self.tool_args:
+			arguments = dict(self.tool_args[name])
+		else:
+			schema = tool.parameters() if hasattr(tool, "parameters") else {"type": "object"}
+			arguments = sample_from_schema(schema)
+		with self._lock:
+			self.stats.tool_calls += 1
+		return FunctionCallContent(call_id=self.next_id("call"), name=name, arguments=arguments)
+
+	def chat_client(self, **kwargs: Any) -> "FakeChatClient":
+		return FakeChatClient(backend=self, **kwargs)
+
+	def project_client(self, **kwargs: Any) -> "FakeProjectClient":
+		return FakeProjectClient(self)
+
+	def credential(self, *args: Any, **kwargs: Any) -> "FakeCredential":
+		return FakeCredential()
+
+	def async_credential(self, *args: Any, **kwargs: Any) -> "FakeAsyncCredential":
+		return FakeAsyncCredential()
+
+	@contextmanager
+	def patch(self, module: Any) -> Iterator["FakeBackend"]:
+		"""
+		Point a sample module's client and credential names at this backend.
+
+		Covers `AzureAIAgentClient`, `AIProjectClient` and `AzureCliCredential`
+		(sync or aio, picked from where the module imported it).
+		"""
+		replacements: Dict[str, Any] = {}
+		if hasattr(module, "AzureAIAgentClient"):
+			replacements["AzureAIAgentClient"] = self.chat_client
+		if hasattr(module, "AIProjectClient"):
+			replacements["AIProjectClient"] = self.project_client
+		credential = getattr(module, "AzureCliCredential", None)
+		if credential is not None:
+			is_async = ".aio" in getattr(credential, "__module__", "")
+			replacements["AzureCliCredential"] = self.async_credential if is_async else self.credential
+		originals = {name: getattr(module, name) for name in replacements}
+		for name, value in replacements.items():
+			setattr(module, name, value)
+		try:
+			yield self
+		finally:
+			for name, value in originals.items():
+				setattr(module, name, value)
+
+
+@use_function_invocation
+@use_chat_middleware
+class FakeChatClient(BaseChatClient):
+	"""
+	`BaseChatClient` served by a `FakeBackend`; drop-in for `AzureAIAgentClient`.
+
+	Like the real client, every response carries the service thread id as
+	`conversation_id`: the request's, or a new one per run without a thread.
+	"""
+
+	OTEL_PROVIDER_NAME = "fake"
+
+	def __init__(self, *, backend: Optional[FakeBackend] = None, **kwargs: Any) -> None:
+		# Accept and ignore the real client's connection settings (credential, endpoint, ...)
+		middleware = kwargs.pop("middleware", None)
+		super().__init__(middleware=middleware)
+		self.backend = backend or FakeBackend()
+
+	async def _inner_get_response(self, *, messages, chat_options, **kwargs: Any) -> ChatResponse:
+		backend = self.backend
+		backend.begin_request()
+		thread_id = self._thread_id(chat_options)
+		await asyncio.sleep(backend.first_token_delay())
+		call = backend.tool_call(chat_options.tools or [], messages)
+		if call is not None:
+			return ChatResponse(
+				messages=[ChatMessage(role=Role.ASSISTANT, contents=[call])],
+				response_id=backend.next_id("resp"),
+				conversation_id=thread_id,
+			)
+		text = backend.reply_text(messages, chat_options.response_format)
+		for _ in backend.chunks(text)[1:]:
+			await asyncio.sleep(backend.chunk_delay())
+		return ChatResponse(
+			messages=[ChatMessage(role=Role.ASSISTANT, text=text)],
+			response_id=backend.next_id("resp"),
+			conversation_id=thread_id,
+			response_format=chat_options.response_format,
+		)
+
+	async def _inner_get_streaming_response(
+		self, *, messages, chat_options, **kwargs: Any
+	) -> AsyncIterable[ChatResponseUpdate]:
+		backend = self.backend
+		backend.begin_request(streamed=True)
+		thread_id = self._thread_id(chat_options)
+		await asyncio.sleep(backend.first_token_delay())
+		response_id = backend.next_id("resp")
+		call = backend.tool_call(chat_options.tools or [], messages)
+		if call is not None:
+			yield ChatResponseUpdate(
+				role=Role.ASSISTANT, contents=[call], response_id=response_id, conversation_id=thread_id
+			)
+			return
+		for index, piece in enumerate(backend.chunks(backend.reply_text(messages, chat_options.response_format))):
+			if index:
+				await asyncio.sleep(backend.chunk_delay())
+			yield ChatResponseUpdate(
+				role=Role.ASSISTANT, contents=[TextContent(text=piece)], response_id=response_id, conversation_id=thread_id
+			)
+
+	def _thread_id(self, chat_options: Any) -> str:
+		return getattr(chat_options, "conversation_id", None) or self.backend.next_id("thread")
+
+
+class FakeCredential:
+	def get_token(self, *scopes: str, **kwargs: Any) -> AccessToken:
+		return AccessToken("fake-token", int(time.time()) + 3600)
+
+	def close(self) -> None:
+		pass
+
+	def __enter__(self) -> "FakeCredential":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		pass
+
+
+class FakeAsyncCredential:
+	async def get_token(self, *scopes: str, **kwargs: Any) -> AccessToken:
+		return AccessToken("fake-token", int(time.time()) + 3600)
+
+	async def close(self) -> None:
+		pass
+
+	async def __aenter__(self) -> "FakeAsyncCredential":
+		return self
+
+	async def __aexit__(self, *exc) -> None:
+		pass
+
+
+# --- AIProjectClient-shaped fake (sync, as used by samply / agent_with_memory) ---
+
+
+class _HttpResponse:
+	def __init__(self, payload: Any) -> None:
+		self._body = json.dumps(payload, default=str).encode("utf-8")
+		self.headers = {"Content-Length": str(len(self._body))}
+
+	def body(self) -> bytes:
+		return self._body
+
+
+def _hook(raw_response_hook: Optional[Callable], payload: Any) -> None:
+	if raw_response_hook is not None:
+		raw_response_hook(SimpleNamespace(http_response=_HttpResponse(payload)))
+
+
+def _message(message_id: str, role: str, text: str) -> SimpleNamespace:
+	block = SimpleNamespace(type="text", text=SimpleNamespace(value=text))
+	return SimpleNamespace(id=message_id, role=role, content=[block])
+
+
+class _Agents:
+	def __init__(self, project: "FakeProjectClient") -> None:
+		self._project = project
+		backend = project.backend
+		self.threads = SimpleNamespace(create=lambda **kwargs: SimpleNamespace(id=backend.next_id("thread")))
+		self.messages = _Messages(project)
+		self.runs = _Runs(project)
+
+	def create_agent(self, model: str = "", name: str = "", instructions: str = "", **kwargs: Any) -> SimpleNamespace:
+		self._project.backend.begin_request()
+		return SimpleNamespace(id=self._project.backend.next_id("asst"), name=name, model=model, instructions=instructions)
+
+	def delete_agent(self, agent_id: str, **kwargs: Any) -> None:
+		self._project.backend.begin_request()
+
+	# New-style prompt agents (`client.agents.create(name=..., definition=...)`)
+	def create(self, name: str = "", definition: Any = None, **kwargs: Any) -> SimpleNamespace:
+		self._project.backend.begin_request()
+		return SimpleNamespace(id=self._project.backend.next_id("agent"), name=name, definition=definition)
+
+	def delete(self, agent_id: str, **kwargs: Any) -> None:
+		self._project.backend.begin_request()
+
+
+class _Messages:
+	def __init__(self, project: "FakeProjectClient") -> None:
+		self._project = project
+
+	def create(self, thread_id: str, role: str, content: str, **kwargs: Any) -> SimpleNamespace:
+		message = _message(self._project.backend.next_id("msg"), role, content)
+		self._project.threads[thread_id].append(message)
+		return message
+
+	def list(
+		self,
+		thread_id: str,
+		run_id: Optional[str] = None,
+		order: Any = None,
+		limit: Optional[int] = None,
+		raw_response_hook: Optional[Callable] = None,
+		**kwargs: Any,
+	) -> List[SimpleNamespace]:
+		self._project.backend.begin_request()
+		messages = list(self._project.threads[thread_id])
+		if order == ListSortOrder.DESCENDING:
+			messages.reverse()
+		if limit is not None:
+			messages = messages[:limit]
+		_hook(raw_response_hook, [m.content[0].text.value for m in messages])
+		return messages
+
+
+class _Runs:
+	def __init__(self, project: "FakeProjectClient") -> None:
+		self._project = project
+		self._runs: Dict[str, SimpleNamespace] = {}
+
+	def _reply(self, thread_id: str) -> str:
+		history = [
+			ChatMessage(role=Role.USER if m.role == "user" else Role.ASSISTANT, text=m.content[0].text.value)
+			for m in self._project.threads[thread_id]
+		]
+		return self._project.backend.reply_text(history)
+
+	def _generation_seconds(self, text: str) -> float:
+		backend = self._project.backend
+		return backend.first_token_delay() + sum(backend.chunk_delay() for _ in backend.chunks(text)[1:])
+
+	def _complete(self, run: SimpleNamespace) -> None:
+		self._project.threads[run.thread_id].append(_message(self._project.backend.next_id("msg"), "assistant", run.reply))
+		run.status = RunStatus.COMPLETED
+
+	def create(self, thread_id: str, agent_id: str, raw_response_hook: Optional[Callable] = None, **kwargs: Any):
+		backend = self._project.backend
+		backend.begin_request()
+		reply = self._reply(thread_id)
+		run = SimpleNamespace(
+			id=backend.next_id("run"),
+			thread_id=thread_id,
+			status=RunStatus.QUEUED,
+			reply=reply,
+			ready_at=time.monotonic() + self._generation_seconds(reply),
+			last_error=None,
+		)
+		self._runs[run.id] = run
+		_hook(raw_response_hook, {"id": run.id, "status": str(run.status)})
+		return run
+
+	def get(self, thread_id: str, run_id: str, raw_response_hook: Optional[Callable] = None, **kwargs: Any):
+		self._project.backend.begin_request()
+		run = self._runs[run_id]
+		if run.status != RunStatus.COMPLETED:
+			if time.monotonic() >= run.ready_at:
+				self._complete(run)
+			else:
+				run.status = RunStatus.IN_PROGRESS
+		_hook(raw_response_hook, {"id": run.id, "status": str(run.status)})
+		return run
+
+	def create_and_process(self, thread_id: str, agent_id: str, raw_response_hook: Optional[Callable] = None, **kwargs: Any):
+		run = self.create(thread_id, agent_id, raw_response_hook=raw_response_hook)
+		time.sleep(max(0.0, run.ready_at - time.monotonic()))
+		self._complete(run)
+		return run
+
+	@contextmanager
+	def stream(self, thread_id: str, agent_id: str, raw_response_hook: Optional[Callable] = None, **kwargs: Any):
+		backend = self._project.backend
+		backend.begin_request(streamed=True)
+		reply = self._reply(thread_id)
+		message_id = backend.next_id("msg")
+
+		def _events():
+			time.sleep(backend.first_token_delay())
+			for index, piece in enumerate(backend.chunks(reply)):
+				if index:
+					time.sleep(backend.chunk_delay())
+				chunk = MessageDeltaChunk({
+					"id": message_id,
+					"object": "thread.message.delta",
+					"delta": {"role": "assistant", "content": [{"index": 0, "type": "text", "text": {"value": piece}}]},
+				})
+				yield AgentStreamEvent.THREAD_MESSAGE_DELTA, chunk, None
+			self._project.threads[thread_id].append(_message(message_id, "assistant", reply))
+			yield AgentStreamEvent.DONE, "[DONE]", None
+
+		yield _events()
+
+
+class _OpenAIClient:
+	"""The slice of the OpenAI client used for conversations and responses."""
+
+	def __init__(self, project: "FakeProjectClient") -> None:
+		self._project = project
+		self._conversations: Dict[str, List[SimpleNamespace]] = defaultdict(list)
+		self.conversations = SimpleNamespace(
+			create=self._create_conversation,
+			items=SimpleNamespace(list=self._list_items),
+		)
+		self.responses = SimpleNamespace(create=self._create_response)
+
+	def with_options(self, **kwargs: Any) -> "_OpenAIClient":
+		return self
+
+	def _create_conversation(self, **kwargs: Any) -> SimpleNamespace:
+		backend = self._project.backend
+		backend.begin_request()
+		time.sleep(backend.first_token_delay())
+		conversation_id = backend.next_id("conv")
+		self._conversations[conversation_id] = []
+		return SimpleNamespace(id=conversation_id)
+
+	def _list_items(self, conversation_id: str, **kwargs: Any) -> List[SimpleNamespace]:
+		backend = self._project.backend
+		backend.begin_request()
+		time.sleep(backend.first_token_delay())
+		return list(self._conversations[conversation_id])
+
+	def _create_response(self, model: str = "", instructions: str = "", conversation: Any = None, input: Any = "", **kwargs: Any):
+		backend = self._project.backend
+		backend.begin_request()
+		conversation_id = conversation.get("id") if isinstance(conversation, dict) else conversation
+		history = [ChatMessage(role=Role.USER, text=str(input))]
+		text = backend.reply_text(history)
+		time.sleep(backend.first_token_delay() + sum(backend.chunk_delay() for _ in backend.chunks(text)[1:]))
+		if conversation_id is not None:
+			items = self._conversations[conversation_id]
+			items.append(SimpleNamespace(type="message", role="user", content=str(input)))
+			items.append(SimpleNamespace(type="message", role="assistant", content=text))
+		return SimpleNamespace(id=backend.next_id("resp"), output_text=text)
+
+
+class _MemoryStores:
+	"""The slice of `client.memory_stores` used to write and search memories."""
+
+	def __init__(self, project: "FakeProjectClient") -> None:
+		self._project = project
+
+	def begin_update_memories(self, name: str, scope: str, items: Sequence[Any] = (), **kwargs: Any) -> SimpleNamespace:
+		backend = self._project.backend
+		backend.begin_request()
+		time.sleep(backend.first_token_delay())
+		for item in items:
+			backend.memory.add(f"{name}/{scope}", str(getattr(item, "content", item)))
+		return SimpleNamespace(done=lambda: False)
+
+	def search_memories(self, name: str, scope: str, **kwargs: Any) -> SimpleNamespace:
+		backend = self._project.backend
+		backend.begin_request()
+		time.sleep(backend.first_token_delay())
+		found = backend.memory.search(f"{name}/{scope}")
+		return SimpleNamespace(memories=[SimpleNamespace(memory_item=SimpleNamespace(content=text)) for text in found])
+
+
+class FakeProjectClient:
+	"""Synchronous `AIProjectClient` stand-in; see `FakeBackend.project_client`."""
+
+	def __init__(self, backend: FakeBackend) -> None:
+		self.backend = backend
+		self.threads: Dict[str, List[SimpleNamespace]] = defaultdict(list)
+		self.agents = _Agents(self)
+		self.memory_stores = _MemoryStores(self)
+		self._openai = _OpenAIClient(self)
+
+	def get_openai_client(self, **kwargs: Any) -> _OpenAIClient:
+		return self._openai
+
+	def close(self) -> None:
+		pass
+
+	def __enter__(self) -> "FakeProjectClient":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		pass
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, List, Optional, Tuple
+
+from agent_framework import ChatMessage, Role
+
+
+logger = logging.getLogger(__name__)
+
+# Loaded on the first count: getting the encoding may download its BPE file,
+# which importing this module (or anything that imports it) must not do
+_ENCODING: Any = None
+_ENCODING_LOADED = False
+
+
+def _encoding() -> Any:
+	global _ENCODING, _ENCODING_LOADED
+	if not _ENCODING_LOADED:
+		try:
+			import tiktoken
+
+			_ENCODING = tiktoken.get_encoding("o200k_base")
+		except Exception:  # tiktoken is optional; fall back to a character heuristic
+			_ENCODING = None
+		_ENCODING_LOADED = True
+	return _ENCODING
+
+
+# Per-message framing overhead charged by chat models (role, separators).
+MESSAGE_OVERHEAD_TOKENS = 4
+
+Summarizer = Callable[[Optional[str], List[ChatMessage]], Awaitable[str]]
+
+
+def count_tokens(text: str) -> int:
+	"""Count tokens locally: exact with tiktoken if installed, else ~4 characters per token."""
+	if not text:
+		return 0
+	encoding = _encoding()
+	if encoding is not None:
+		return len(encoding.encode(text, disallowed_special=()))
+	return (len(text) + 3) // 4
+
+
+def message_tokens(message: ChatMessage) -> int:
+	return count_tokens(message.text or "") + MESSAGE_OVERHEAD_TOKENS
+
+
+def agent_summarizer(agent, max_words: int = 150) -> Summarizer:
+	"""Build a summarizer that asks `agent` to fold evicted turns into the running summary."""
+
+	async def _summarize(previous: Optional[str], evicted: List[ChatMessage]) -> str:
+		transcript = "\n".join(
+			f"{(m.role.value if hasattr(m.role, 'value') else str(m.role))}: {m.text}" for m in evicted if m.text
+		)
+		prompt = (
+			f"Update the running summary of a conversation in at most {max_words} words. "
+			"Keep names, facts, decisions and open questions; drop small talk.\n\n"
+			f"Current summary:\n{previous or '(none)'}\n\nNew turns:\n{transcript}"
+		)
+		response = await agent.run([ChatMessage(role=Role.USER, text=prompt)])
+		return response.text or previous or ""
+
+	return _summarize
+
+
+class HistoryManager:
+	"""
+	Keeps a conversation under a token budget before it is sent to `agent.run`.
+
+	- System messages and the first `pin_first` turns are always kept
+	- Recent turns are kept in a sliding window, evicting the oldest first
+	- Evicted turns are folded into a rolling summary by a background task, so
+	  `messages()` never waits on the summarizer
+	"""
+
+	def __init__(
+		self,
+		budget_tokens: int,
+		summarizer: Optional[Summarizer] = None,
+		pin_first: int = 1,
+		counter: Callable[[ChatMessage], int] = message_tokens,
+	) -> None:
+		self.budget_tokens = budget_tokens
+		self.summarizer = summarizer
+		self.pin_first = pin_first
+		self.counter = counter
+		self.summary: Optional[str] = None
+		self._pinned: List[Tuple[ChatMessage, int]] = []
+		self._recent: Deque[Tuple[ChatMessage, int]] = deque()
+		self._pending: List[ChatMessage] = []
+		self._pinned_turns = 0
+		self._task: Optional[asyncio.Task] = None
+
+	@property
+	def tokens(self) -> int:
+		summary_tokens = count_tokens(self.summary) + MESSAGE_OVERHEAD_TOKENS if self.summary else 0
+		return sum(t for _, t in self._pinned) + sum(t for _, t in self._recent) + summary_tokens
+
+	def append(self, message: ChatMessage) -> None:
+		entry = (message, self.counter(message))
+		if message.role == Role.SYSTEM:
+			self._pinned.append(entry)
+		elif self._pinned_turns < self.pin_first:
+			self._pinned.append(entry)
+			self._pinned_turns += 1
+		else:
+			self._recent.append(entry)
+		self._evict()
+
+	def extend(self, messages: List[ChatMessage]) -> None:
+		for message in messages:
+			self.append(message)
+
+	def _evict(self) -> None:
+		evicted: List[ChatMessage] = []
+		# Always keep the newest message so the model sees the current turn
+		while self.tokens > self.budget_tokens and len(self._recent) > 1:
+			evicted.append(self._recent.popleft()[0])
+			# Don't leave tool results orphaned from the call that produced them
+			while len(self._recent) > 1 and self._recent[0][0].role == Role.TOOL:
+				evicted.append(self._recent.popleft()[0])
+		if evicted:
+			self._pending.extend(evicted)
+			self._schedule_summary()
+
+	def _schedule_summary(self) -> None:
+		if self.summarizer is None:
+			self._pending.clear()
+			return
+		if self._task is None or self._task.done():
+			try:
+				loop = asyncio.get_running_loop()
+			except RuntimeError:
+				# Evicted outside a loop (e.g. pre-loading history): `flush` starts the summary
+				return
+			self._task = loop.create_task(self._summarize_pending())
+
+	async def _summarize_pending(self) -> None:
+		while self._pending:
+			batch, self._pending = self._pending, []
+			try:
+				self.summary = await self.summarizer(self.summary, batch)
+			except Exception:
+				# Nobody awaits this task: log, and keep the turns for the next eviction's attempt
+				logger.exception("summarizing %d evicted messages failed; will retry", len(batch))
+				self._pending[:0] = batch
+				return
+			self._evict()
+
+	def messages(self) -> List[ChatMessage]:
+		"""Return the windowed history to send: pinned turns, the summary, then recent turns."""
+		window = [m for m, _ in self._pinned]
+		if self.summary:
+			window.append(ChatMessage(role=Role.SYSTEM, text=f"Summary of the earlier conversation:\n{self.summary}"))
+		window.extend(m for m, _ in self._recent)
+		return window
+
+	async def flush(self) -> None:
+		"""Summarize any queued evicted turns and wait for in-flight summarization to finish."""
+		if self._pending:
+			self._schedule_summary()
+		if self._task is not None:
+			await self._task
+
+	async def aclose(self) -> None:
+		if self._task is not None and not self._task.done():
+			self._task.cancel()
+			try:
+				await self._task
+			except asyncio.CancelledError:
+				pass
@@ -0,0 +1,501 @@
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, AsyncIterable, AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+
+from agent_framework import (
+	AgentRunContext,
+	AgentRunUpdateEvent,
+	ChatContext,
+	ExecutorCompletedEvent,
+	ExecutorInvokedEvent,
+	FunctionInvocationContext,
+	agent_middleware,
+	chat_middleware,
+	function_middleware,
+)
+
+
+# Stage names used as the `stage` label
+AGENT_RUN = "agent.run"
+AGENT_TTFT = "agent.time_to_first_update"
+AGENT_STREAM = "agent.streaming"
+MIDDLEWARE = "middleware"
+CHAT_REQUEST = "chat.request"
+CHAT_TTFT = "chat.time_to_first_token"
+CHAT_STREAM = "chat.streaming"
+TOOL = "tool"
+EXECUTOR = "workflow.executor"
+EXECUTOR_TTFT = "workflow.executor.time_to_first_update"
+
+# Prometheus `le` boundaries in seconds
+PROMETHEUS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class Histogram:
+	"""
+	Log-linear (HDR-style) histogram of durations with ~6% relative precision.
+
+	Values are kept in microseconds: below 32 µs one bucket per µs, above that
+	16 buckets per power of two. That is 544 counters covering 1 µs to ~19 hours,
+	so `record` is a few integer ops and memory is fixed no matter how many
+	samples arrive.
+	"""
+
+	SUB_BITS = 4
+	SUB = 1 << SUB_BITS
+	SIZE = 34 * SUB
+
+	__slots__ = ("_lock", "_counts", "count", "total", "min", "max")
+
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+		self._counts = [0] * self.SIZE
+		self.count = 0
+		self.total = 0.0
+		self.min = float("inf")
+		self.max = 0.0
+
+	@classmethod
+	def _index(cls, micros: int) -> int:
+		if micros < 2 * cls.SUB:
+			return micros
+		shift = micros.bit_length() - (cls.SUB_BITS + 1)
+		return min((shift + 1) * cls.SUB + (micros >> shift) - cls.SUB, cls.SIZE - 1)
+
+	@classmethod
+	def _bounds(cls, index: int) -> Tuple[float, float]:
+		"""Bucket `[low, high)` in seconds."""
+		if index < 2 * cls.SUB:
+			return index / 1e6, (index + 1) / 1e6
+		shift = index // cls.SUB - 1
+		low = (cls.SUB + index % cls.SUB) << shift
+		return low / 1e6, (low + (1 << shift)) / 1e6
+
+	def record(self, seconds: float) -> None:
+		index = self._index(max(0, int(seconds * 1e6)))
+		with self._lock:
+			self._counts[index] += 1
+			self.count += 1
+			self.total += seconds
+			if seconds < self.min:
+				self.min = seconds
+			if seconds > self.max:
+				self.max = seconds
+
+	def percentile(self, q: float) -> float:
+		"""Value at quantile `q` (0..1), reported as the midpoint of its bucket."""
+		with self._lock:
+			if not self.count:
+				return 0.0
+			target = max(1, int(q * self.count + 0.5))
+			seen = 0
+			for index, n in enumerate(self._counts):
+				seen += n
+				if seen >= target:
+					low, high = self._bounds(index)
+					return min(max((low + high) / 2, self.min), self.max)
+		return self.max
+
+	def cumulative(self, boundaries: Tuple[float, ...]) -> List[int]:
+		"""Counts of samples whose bucket ends at or below each boundary (Prometheus `le`)."""
+		with self._lock:
+			counts = list(self._counts)
+		out, seen, index = [], 0, 0
+		for boundary in boundaries:
+			while index < len(counts) and self._bounds(index)[1] <= boundary + 1e-12:
+				seen += counts[index]
+				index += 1
+			out.append(seen)
+		return out
+
+
+@dataclass
+class Span:
+	name: str
+	trace_id: str
+	span_id: str
+	parent_id: Optional[str]
+	start_ns: int
+	end_ns: int = 0
+	attributes: Dict[str, Any] = field(default_factory=dict)
+	error: Optional[str] = None
+	sampled: bool = True
+	# perf_counter() at start; durations come from this, wall-clock times from start_ns
+	t0: float = field(default=0.0, repr=False)
+
+	def to_otlp(self) -> Dict[str, Any]:
+		span = {
+			"traceId": self.trace_id,
+			"spanId": self.span_id,
+			"name": self.name,
+			"kind": 1,
+			"startTimeUnixNano": str(self.start_ns),
+			"endTimeUnixNano": str(self.end_ns),
+			"attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+			"status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+		}
+		if self.parent_id:
+			span["parentSpanId"] = self.parent_id
+		return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+	if isinstance(value, bool):
+		return {"key": key, "value": {"boolValue": value}}
+	if isinstance(value, int):
+		return {"key": key, "value": {"intValue": str(value)}}
+	if isinstance(value, float):
+		return {"key": key, "value": {"doubleValue": value}}
+	return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _escape_label(value: str) -> str:
+	return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Instrumentation:
+	"""
+	Per-stage latency for agent runs: always-on histograms plus sampled spans.
+
+	- Every span's duration goes into a histogram keyed by (stage, name), whether
+	  or not its trace is sampled, so percentiles stay exact-to-bucket at full rate
+	- Span objects are only kept for `sample_rate` of traces (decided at the root,
+	  inherited by children) and buffered up to `max_spans` for export
+	- Hooks: `agent_middleware()`, `chat_middleware()`, `function_middleware()`,
+	  `instrument(existing_middleware)` and `observe_workflow(events)`
+	- Export: `export_otlp_json(path)`, `prometheus_text()` / `serve_prometheus(port)`
+
+		instr = Instrumentation(sample_rate=0.05)
+		agent = client.create_agent(..., middleware=[*instr.middleware(), my_middleware])
+	"""
+
+	def __init__(self, sample_rate: float = 0.01, max_spans: int = 10000, service_name: str = "agent-samples") -> None:
+		self.sample_rate = sample_rate
+		self.service_name = service_name
+		self._spans: Deque[Span] = deque(maxlen=max_spans)
+		self._histograms: Dict[Tuple[str, str], Histogram] = {}
+		self._lock = threading.Lock()
+		self._current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+			f"instrumentation_span_{id(self)}", default=None
+		)
+
+	# --- histograms ---
+
+	def histogram(self, stage: str, name: str = "") -> Histogram:
+		key = (stage, name)
+		histogram = self._histograms.get(key)
+		if histogram is None:
+			with self._lock:
+				histogram = self._histograms.setdefault(key, Histogram())
+		return histogram
+
+	def record(self, stage: str, seconds: float, name: str = "") -> None:
+		self.histogram(stage, name).record(seconds)
+
+	# --- spans ---
+
+	def _start(self, stage: str, name: str, attributes: Dict[str, Any]) -> Tuple[Span, contextvars.Token]:
+		parent = self._current.get()
+		if parent is None:
+			sampled = random.random() < self.sample_rate
+			trace_id = f"{random.getrandbits(128):032x}" if sampled else ""
+		else:
+			sampled, trace_id = parent.sampled, parent.trace_id
+		span = Span(
+			name=f"{stage} {name}".strip(),
+			trace_id=trace_id,
+			span_id=f"{random.getrandbits(64):016x}" if sampled else "",
+			parent_id=parent.span_id if parent is not None else None,
+			start_ns=time.time_ns(),
+			attributes={"stage": stage, "name": name, **attributes} if sampled else {},
+			sampled=sampled,
+		)
+		span.t0 = time.perf_counter()
+		return span, self._current.set(span)
+
+	def _finish(self, span: Span, stage: str, name: str, error: Optional[BaseException] = None) -> float:
+		elapsed = time.perf_counter() - span.t0
+		self.record(stage, elapsed, name)
+		if span.sampled:
+			span.end_ns = span.start_ns + int(elapsed * 1e9)
+			if error is not None:
+				span.error = f"{type(error).__name__}: {error}"
+			self._spans.append(span)
+		return elapsed
+
+	def _child(self, parent: Span, stage: str, name: str, start: float, end: float) -> None:
+		"""Record a derived interval (e.g. time to first token) under `parent`."""
+		self.record(stage, end - start, name)
+		if parent.sampled:
+			offset = int((start - parent.t0) * 1e9)
+			self._spans.append(Span(
+				name=f"{stage} {name}".strip(),
+				trace_id=parent.trace_id,
+				span_id=f"{random.getrandbits(64):016x}",
+				parent_id=parent.span_id,
+				start_ns=parent.start_ns + offset,
+				end_ns=parent.start_ns + offset + int((end - start) * 1e9),
+				attributes={"stage": stage, "name": name},
+			))
+
+	@contextmanager
+	def span(self, stage: str, name: str = "", **attributes: Any) -> Iterator[Span]:
+		span, token = self._start(stage, name, attributes)
+		try:
+			yield span
+		except BaseException as e:
+			self._current.reset(token)
+			self._finish(span, stage, name, e)
+			raise
+		self._current.reset(token)
+		self._finish(span, stage, name)
+
+	def _timed_stream(
+		self, stream: AsyncIterable[Any], span: Span, stage: str, name: str, ttft_stage: str, stream_stage: str
+	) -> AsyncIterator[Any]:
+		async def _wrapped() -> AsyncIterator[Any]:
+			first: Optional[float] = None
+			error: Optional[BaseException] = None
+			iterator = stream.__aiter__()
+			try:
+				while True:
+					# The stream is consumed after `next` returned, so re-enter the span for
+					# each pull; spans opened downstream (model requests, tools) nest under it
+					token = self._current.set(span)
+					try:
+						update = await iterator.__anext__()
+					except StopAsyncIteration:
+						break
+					finally:
+						self._current.reset(token)
+					if first is None:
+						first = time.perf_counter()
+						self._child(span, ttft_stage, name, span.t0, first)
+					yield update
+			except BaseException as e:
+				error = e
+				raise
+			finally:
+				if first is not None:
+					self._child(span, stream_stage, name, first, time.perf_counter())
+				self._finish(span, stage, name, error)
+
+		return _wrapped()
+
+	# --- agent_framework hooks ---
+
+	def agent_middleware(self):
+		"""Span per `agent.run` / `run_stream`, including streaming time to first update."""
+
+		@agent_middleware
+		async def _instrument_agent(context: AgentRunContext, next) -> None:
+			name = getattr(context.agent, "name", None) or ""
+			span, token = self._start(AGENT_RUN, name, {"streaming": context.is_streaming})
+			try:
+				await next(context)
+			except BaseException as e:
+				self._current.reset(token)
+				self._finish(span, AGENT_RUN, name, e)
+				raise
+			self._current.reset(token)
+			if context.is_streaming and context.result is not None and hasattr(context.result, "__aiter__"):
+				context.result = self._timed_stream(context.result, span, AGENT_RUN, name, AGENT_TTFT, AGENT_STREAM)
+			else:
+				self._finish(span, AGENT_RUN, name)
+
+		return _instrument_agent
+
+	def chat_middleware(self):
+		"""Span per model request; streaming requests also record TTFT and streaming duration."""
+
+		@chat_middleware
+		async def _instrument_chat(context: ChatContext, next) -> None:
+			name = getattr(context.chat_client, "OTEL_PROVIDER_NAME", "") or ""
+			span, token = self._start(CHAT_REQUEST, name, {"streaming": context.is_streaming})
+			try:
+				await next(context)
+			except BaseException as e:
+				self._current.reset(token)
+				self._finish(span, CHAT_REQUEST, name, e)
+				raise
+			self._current.reset(token)
+			if context.is_streaming and context.result is not None and hasattr(context.result, "__aiter__"):
+				context.result = self._timed_stream(context.result, span, CHAT_REQUEST, name, CHAT_TTFT, CHAT_STREAM)
+			else:
+				self._finish(span, CHAT_REQUEST, name)
+
+		return _instrument_chat
+
+	def function_middleware(self):
+		"""Span per tool invocation, named after the tool."""
+
+		@function_middleware
+		async def _instrument_function(context: FunctionInvocationContext, next) -> None:
+			with self.span(TOOL, getattr(context.function, "name", "") or ""):
+				await next(context)
+
+		return _instrument_function
+
+	def middleware(self) -> List[Any]:
+		return [self.agent_middleware(), self.chat_middleware(), self.function_middleware()]
+
+	def instrument(self, middleware, name: Optional[str] = None):
+		"""
+		Wrap an existing function middleware so its own time (excluding `next`) is recorded.
+
+		The wrapper keeps the original's `_middleware_type` and signature, so the
+		framework still routes it as agent, chat or function middleware.
+		"""
+		label = name or getattr(middleware, "__name__", type(middleware).__name__)
+
+		async def _own_time(context, next) -> None:
+			downstream = 0.0
+
+			async def _timed_next(ctx) -> None:
+				nonlocal downstream
+				started = time.perf_counter()
+				try:
+					await next(ctx)
+				finally:
+					downstream += time.perf_counter() - started
+
+			started = time.perf_counter()
+			try:
+				await middleware(context, _timed_next)
+			finally:
+				self.record(MIDDLEWARE, time.perf_counter() - started - downstream, label)
+
+		_own_time.__name__ = label
+		_own_time.__annotations__ = dict(getattr(middleware, "__annotations__", {}))
+		if hasattr(middleware, "_middleware_type"):
+			_own_time._middleware_type = middleware._middleware_type
+		return _own_time
+
+	async def observe_workflow(self, events: AsyncIterable[Any]) -> AsyncIterator[Any]:
+		"""Pass workflow events through, recording a span per executor and its time to first update."""
+		open_spans: Dict[str, Tuple[Span, bool]] = {}
+		root, token = self._start("workflow", "", {})
+		try:
+			async for event in events:
+				executor_id = getattr(event, "executor_id", None)
+				if isinstance(event, ExecutorCompletedEvent) and executor_id in open_spans:
+					span, _ = open_spans.pop(executor_id)
+					self._finish(span, EXECUTOR, executor_id)
+				elif isinstance(event, ExecutorInvokedEvent):
+					span = self._new_child_span(root, EXECUTOR, executor_id)
+					open_spans[executor_id] = (span, False)
+				elif isinstance(event, AgentRunUpdateEvent) and executor_id in open_spans:
+					span, seen = open_spans[executor_id]
+					if not seen:
+						now = time.perf_counter()
+						self._child(span, EXECUTOR_TTFT, executor_id, span.t0, now)
+						open_spans[executor_id] = (span, True)
+				yield event
+		finally:
+			for executor_id, (span, _) in open_spans.items():
+				self._finish(span, EXECUTOR, executor_id)
+			self._current.reset(token)
+			self._finish(root, "workflow", "")
+
+	def _new_child_span(self, parent: Span, stage: str, name: str) -> Span:
+		# Executors overlap, so they are siblings under the workflow span rather than context-nested
+		span = Span(
+			name=f"{stage} {name}".strip(),
+			trace_id=parent.trace_id,
+			span_id=f"{random.getrandbits(64):016x}" if parent.sampled else "",
+			parent_id=parent.span_id,
+			start_ns=time.time_ns(),
+			attributes={"stage": stage, "name": name} if parent.sampled else {},
+			sampled=parent.sampled,
+		)
+		span.t0 = time.perf_counter()
+		return span
+
+	# --- export ---
+
+	def drain_spans(self) -> List[Span]:
+		spans = []
+		while self._spans:
+			try:
+				spans.append(self._spans.popleft())
+			except IndexError:
+				break
+		return spans
+
+	def export_otlp_json(self, path: str) -> int:
+		"""
+		Append buffered spans to `path` as one OTLP/JSON `ExportTraceServiceRequest`
+		per line (the OpenTelemetry Collector file exporter format). Returns the span count.
+		"""
+		spans = self.drain_spans()
+		if not spans:
+			return 0
+		request = {
+			"resourceSpans": [{
+				"resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+				"scopeSpans": [{"scope": {"name": "instrumentation"}, "spans": [s.to_otlp() for s in spans]}],
+			}]
+		}
+		directory = os.path.dirname(os.path.abspath(path))
+		os.makedirs(directory, exist_ok=True)
+		with open(path, "a", encoding="utf-8") as f:
+			f.write(json.dumps(request, separators=(",", ":")) + "\n")
+		return len(spans)
+
+	def prometheus_text(self, metric: str = "agent_stage_seconds") -> str:
+		"""All histograms in the Prometheus text exposition format."""
+		lines = [f"# HELP {metric} Latency of agent run stages.", f"# TYPE {metric} histogram"]
+		with self._lock:
+			items = sorted(self._histograms.items())
+		for (stage, name), histogram in items:
+			labels = f'stage="{_escape_label(stage)}",name="{_escape_label(name)}"'
+			for boundary, count in zip(PROMETHEUS_BUCKETS, histogram.cumulative(PROMETHEUS_BUCKETS)):
+				lines.append(f'{metric}_bucket{{{labels},le="{boundary:g}"}} {count}')
+			lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+			lines.append(f"{metric}_sum{{{labels}}} {histogram.total:.6f}")
+			lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+		return "\n".join(lines) + "\n"
+
+	def serve_prometheus(self, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+		"""Serve `/metrics` from a daemon thread; call `.shutdown()` on the result to stop."""
+		instrumentation = self
+
+		class _Handler(BaseHTTPRequestHandler):
+			def do_GET(self) -> None:
+				if self.path.split("?", 1)[0] != "/metrics":
+					self.send_error(404)
+					return
+				body = instrumentation.prometheus_text().encode("utf-8")
+				self.send_response(200)
+				self.send_header("Content-Type", "text/plain; version=0.0.4")
+				self.send_header("Content-Length", str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+			def log_message(self, *args: Any) -> None:
+				pass
+
+		server = ThreadingHTTPServer((host, port), _Handler)
+		threading.Thread(target=server.serve_forever, name="prometheus-metrics", daemon=True).start()
+		return server
+
+	def summary(self) -> str:
+		"""p50/p95/p99 per stage, for printing."""
+		with self._lock:
+			items = sorted(self._histograms.items())
+		lines = []
+		for (stage, name), h in items:
+			label = f"{stage} [{name}]" if name else stage
+			lines.append(
+				f"  {label:<56} n={h.count:<6} p50={h.percentile(0.5) * 1000:8.2f} ms  "
+				f"p95={h.percentile(0.95) * 1000:8.2f} ms  p99={h.percentile(0.99) * 1000:8.2f} ms"
+			)
+		return "\n".join(lines)
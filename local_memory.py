@@ -0,0 +1,327 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+
+Embedder = Callable[[Sequence[str]], np.ndarray]
+FactExtractor = Callable[[str], List[str]]
+
+_WORD = re.compile(r"[a-z0-9']+")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+# Sentences that say something about the user rather than ask for something
+_PERSONAL = re.compile(r"\b(i|i'm|i've|i'd|my|me|we|we're|our|us)\b", re.IGNORECASE)
+_STOPWORDS = frozenset(
+	"a an and are as at be but by can do does for from have how i i'm in is it me my of on or our so "
+	"that the there this to us was we what when where which who will with you your".split()
+)
+
+
+def hashing_embedder(dim: int = 128) -> Embedder:
+	"""
+	Deterministic, offline embedder: hashed bag of content words and word bigrams.
+
+	Vectors are L2-normalised float32, so a dot product is cosine similarity.
+	Good enough for keyword-level recall; swap in a model embedder for semantics.
+	"""
+
+	def _bucket(token: str) -> tuple:
+		digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+		value = int.from_bytes(digest, "little")
+		return value % dim, 1.0 if value >> 63 else -1.0
+
+	def _embed(texts: Sequence[str]) -> np.ndarray:
+		out = np.zeros((len(texts), dim), dtype=np.float32)
+		for row, text in enumerate(texts):
+			words = [w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+			for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+				index, sign = _bucket(token)
+				out[row, index] += sign
+		norms = np.linalg.norm(out, axis=1, keepdims=True)
+		np.divide(out, norms, out=out, where=norms > 0)
+		return out
+
+	return _embed
+
+
+def extract_facts(text: str) -> List[str]:
+	"""Default extractor: keep first-person statements, drop questions."""
+	facts = []
+	for sentence in _SENTENCE.split(text.strip()):
+		sentence = sentence.strip()
+		if sentence and not sentence.endswith("?") and _PERSONAL.search(sentence):
+			facts.append(sentence)
+	return facts
+
+
+@dataclass
+class Memory:
+	text: str
+	score: float
+	index: int
+
+
+class VectorIndex:
+	"""
+	Append-only float32 vector index persisted as memory-mapped files.
+
+	- `vectors.f32`: row-major `capacity x dim` matrix, grown by doubling
+	- `signs.u64`: one sign bit per dimension per row, the search prefilter
+	- `texts.jsonl`: one JSON string per row; its line count is the row count,
+	  so a crash between the writes just leaves an unused slot
+
+	Up to `exact_below` rows, search is one exact matrix-vector product. Above it,
+	rows are shortlisted by Hamming distance between sign sketches (16 bytes per
+	row at dim=128, instead of 512) and only the shortlist is scored exactly,
+	which keeps 1M rows in single-digit milliseconds on one core.
+
+	With `path=None` the index lives in anonymous memory.
+	"""
+
+	def __init__(
+		self,
+		dim: int = 128,
+		path: Optional[str] = None,
+		initial_capacity: int = 1024,
+		exact_below: int = 65536,
+		candidates: int = 512,
+	) -> None:
+		self.dim = dim
+		self.path = path
+		self.exact_below = exact_below
+		self.candidates = candidates
+		self._words = (dim + 63) // 64
+		self._lock = threading.RLock()
+		self._count = 0
+		self._offsets: List[int] = []
+		self._texts: List[str] = []
+		self._text_file = None
+		if path is None:
+			self._vectors = np.zeros((initial_capacity, dim), dtype=np.float32)
+			self._signs = np.zeros((initial_capacity, self._words), dtype=np.uint64)
+			return
+
+		os.makedirs(path, exist_ok=True)
+		meta_path = os.path.join(path, "meta.json")
+		if os.path.exists(meta_path):
+			with open(meta_path, "r", encoding="utf-8") as f:
+				stored_dim = json.load(f)["dim"]
+			if stored_dim != dim:
+				raise ValueError(f"index at {path} has dim={stored_dim}, expected {dim}")
+		else:
+			with open(meta_path, "w", encoding="utf-8") as f:
+				json.dump({"dim": dim, "dtype": "float32"}, f)
+
+		self._text_file = open(os.path.join(path, "texts.jsonl"), "a+b")
+		self._text_file.seek(0)
+		offset = 0
+		for line in self._text_file:
+			if not line.endswith(b"\n"):
+				# Torn final write: drop it so the next append starts on a clean line
+				self._text_file.truncate(offset)
+				break
+			self._offsets.append(offset)
+			offset += len(line)
+		self._count = len(self._offsets)
+		capacity = max(initial_capacity, self._count)
+		self._vectors = self._map("vectors.f32", np.float32, capacity, dim)
+		self._signs = self._map("signs.u64", np.uint64, capacity, self._words)
+
+	def _map(self, name: str, dtype, rows: int, width: int) -> np.ndarray:
+		file_path = os.path.join(self.path, name)
+		size = rows * width * np.dtype(dtype).itemsize
+		with open(file_path, "ab") as f:
+			if f.tell() < size:
+				f.truncate(size)
+		return np.memmap(file_path, dtype=dtype, mode="r+", shape=(rows, width))
+
+	def _sign_sketch(self, vectors: np.ndarray) -> np.ndarray:
+		bits = np.zeros((vectors.shape[0], self._words * 64), dtype=bool)
+		bits[:, : self.dim] = vectors > 0
+		return np.packbits(bits, axis=1).view(np.uint64)
+
+	def _ensure_capacity(self, needed: int) -> None:
+		capacity = self._vectors.shape[0]
+		if needed <= capacity:
+			return
+		while capacity < needed:
+			capacity *= 2
+		if self.path is None:
+			vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+			vectors[: self._count] = self._vectors[: self._count]
+			signs = np.zeros((capacity, self._words), dtype=np.uint64)
+			signs[: self._count] = self._signs[: self._count]
+			self._vectors, self._signs = vectors, signs
+		else:
+			self.flush()
+			del self._vectors, self._signs
+			self._vectors = self._map("vectors.f32", np.float32, capacity, self.dim)
+			self._signs = self._map("signs.u64", np.uint64, capacity, self._words)
+
+	def __len__(self) -> int:
+		return self._count
+
+	def add(self, texts: Sequence[str], vectors: np.ndarray) -> range:
+		"""Append rows; `vectors` must be `len(texts) x dim` and L2-normalised."""
+		vectors = np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dim)
+		with self._lock:
+			start = self._count
+			end = start + len(texts)
+			self._ensure_capacity(end)
+			self._vectors[start:end] = vectors
+			self._signs[start:end] = self._sign_sketch(vectors)
+			if self._text_file is None:
+				self._texts.extend(texts)
+			else:
+				self._text_file.seek(0, os.SEEK_END)
+				offset = self._text_file.tell()
+				lines = []
+				for text in texts:
+					line = (json.dumps(text, ensure_ascii=False) + "\n").encode("utf-8")
+					self._offsets.append(offset)
+					offset += len(line)
+					lines.append(line)
+				self._text_file.write(b"".join(lines))
+				self._text_file.flush()
+			self._count = end
+			return range(start, end)
+
+	def text(self, index: int) -> str:
+		if self._text_file is None:
+			return self._texts[index]
+		with self._lock:
+			self._text_file.seek(self._offsets[index])
+			return json.loads(self._text_file.readline())
+
+	def _shortlist(self, query: np.ndarray, count: int, size: int) -> np.ndarray:
+		"""Rows whose sign sketch is within the Hamming radius that admits `size` rows."""
+		signs = self._signs[:count]
+		sketch = self._sign_sketch(query.reshape(1, -1))[0]
+		# uint16: distances reach `dim` bits, which wraps a uint8 from dim 256 up
+		distance = np.bitwise_count(signs[:, 0] ^ sketch[0]).astype(np.uint16)
+		for word in range(1, self._words):
+			distance += np.bitwise_count(signs[:, word] ^ sketch[word])
+		# Histogram-based cutoff instead of argpartition: one pass over small integer counts
+		cumulative = np.cumsum(np.bincount(distance, minlength=self._words * 64 + 1))
+		radius = int(np.searchsorted(cumulative, size))
+		return np.flatnonzero(distance <= radius)
+
+	def search(self, query: np.ndarray, k: int = 5, min_score: float = 0.0) -> List[Memory]:
+		"""Top-`k` rows by cosine similarity to `query`, best first (approximate above `exact_below`)."""
+		query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+		with self._lock:
+			count = self._count
+			if count == 0 or k <= 0:
+				return []
+			if count <= self.exact_below:
+				rows = np.arange(count)
+				scores = self._vectors[:count] @ query
+			else:
+				rows = self._shortlist(query, count, max(self.candidates, k))
+				scores = self._vectors[rows] @ query
+		k = min(k, len(rows))
+		top = np.argpartition(scores, len(rows) - k)[len(rows) - k :] if k < len(rows) else np.arange(len(rows))
+		top = top[np.argsort(scores[top])[::-1]]
+		return [
+			Memory(self.text(int(rows[i])), float(scores[i]), int(rows[i])) for i in top if scores[i] >= min_score
+		]
+
+	def flush(self) -> None:
+		with self._lock:
+			for array in (self._vectors, self._signs):
+				if isinstance(array, np.memmap):
+					array.flush()
+
+	def close(self) -> None:
+		with self._lock:
+			self.flush()
+			if self._text_file is not None:
+				self._text_file.close()
+				self._text_file = None
+
+	def __enter__(self) -> "VectorIndex":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+
+class LocalMemory:
+	"""
+	Client-side user memory: extract facts from turns, recall the relevant ones locally.
+
+		memory = LocalMemory(path="memories/taylor")
+		memory.remember("My name is Taylor and I'm hiking in Patagonia.")
+		instructions = memory.instructions_for(base_instructions, user_text)
+
+	- Facts are searchable as soon as `remember` returns; there is no indexing lag
+	- Near-duplicates (cosine >= `dedupe_threshold`) are skipped
+	- `embedder` and `extractor` are pluggable; defaults work offline
+	"""
+
+	def __init__(
+		self,
+		path: Optional[str] = None,
+		embedder: Optional[Embedder] = None,
+		extractor: FactExtractor = extract_facts,
+		dim: int = 128,
+		dedupe_threshold: float = 0.95,
+	) -> None:
+		self.embedder = embedder or hashing_embedder(dim)
+		self.extractor = extractor
+		self.dedupe_threshold = dedupe_threshold
+		self.index = VectorIndex(dim=dim, path=path)
+
+	def remember(self, text: str) -> List[str]:
+		"""Store the facts found in `text`; returns the ones that were new."""
+		facts = self.extractor(text)
+		if not facts:
+			return []
+		vectors = self.embedder(facts)
+		added, added_vectors = [], []
+		for fact, vector in zip(facts, vectors):
+			best = self.index.search(vector, k=1)
+			if best and best[0].score >= self.dedupe_threshold:
+				continue
+			if any(float(vector @ other) >= self.dedupe_threshold for other in added_vectors):
+				continue
+			added.append(fact)
+			added_vectors.append(vector)
+		if added:
+			self.index.add(added, np.stack(added_vectors))
+		return added
+
+	def recall(self, query: str, k: int = 5, min_score: float = 0.2) -> List[Memory]:
+		return self.index.search(self.embedder([query])[0], k=k, min_score=min_score)
+
+	def recent(self, n: int = 5) -> List[Memory]:
+		count = len(self.index)
+		return [Memory(self.index.text(i), 0.0, i) for i in range(count - 1, max(count - n, 0) - 1, -1)]
+
+	def instructions_for(self, instructions: str, query: str, k: int = 5) -> str:
+		"""
+		`instructions` with up to `k` memories appended: the ones relevant to
+		`query` first, topped up with the most recent so broad questions
+		("what do you know about me?") still get context.
+		"""
+		memories = self.recall(query, k=k)
+		seen = {m.index for m in memories}
+		memories += [m for m in self.recent(k) if m.index not in seen][: k - len(memories)]
+		if not memories:
+			return instructions
+		known = "\n".join(f"- {m.text}" for m in memories)
+		return f"{instructions}\n\nKnown memories about the user:\n{known}"
+
+	def close(self) -> None:
+		self.index.close()
+
+	def __enter__(self) -> "LocalMemory":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
@@ -0,0 +1,193 @@
+import asyncio
+import inspect
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+
+@dataclass
+class ReadinessResult:
+	ready: bool
+	lag_seconds: float
+	attempts: int
+
+
+class IndexingLagStats:
+	"""Running summary of observed indexing lag, exposed as a metric."""
+
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+		self.count = 0
+		self.timeouts = 0
+		self.total_seconds = 0.0
+		self.max_seconds = 0.0
+		self.last_seconds: Optional[float] = None
+
+	def record(self, result: ReadinessResult) -> None:
+		with self._lock:
+			if not result.ready:
+				self.timeouts += 1
+				return
+			self.count += 1
+			self.total_seconds += result.lag_seconds
+			self.max_seconds = max(self.max_seconds, result.lag_seconds)
+			self.last_seconds = result.lag_seconds
+
+	def snapshot(self) -> Dict[str, Any]:
+		with self._lock:
+			return {
+				"count": self.count,
+				"timeouts": self.timeouts,
+				"mean_seconds": self.total_seconds / self.count if self.count else None,
+				"max_seconds": self.max_seconds if self.count else None,
+				"last_seconds": self.last_seconds,
+			}
+
+
+# Process-wide lag metric; pass `stats=` to keep a separate one.
+indexing_lag = IndexingLagStats()
+
+
+def _next_delay(delay: float, factor: float, max_delay: float, jitter: float) -> float:
+	return min(delay * factor, max_delay) * (1 + random.uniform(-jitter, jitter))
+
+
+def wait_until_ready(
+	probe: Callable[[], bool],
+	deadline: float = 10.0,
+	initial_delay: float = 0.05,
+	max_delay: float = 1.0,
+	factor: float = 2.0,
+	jitter: float = 0.1,
+	since: Optional[float] = None,
+	stats: Optional[IndexingLagStats] = None,
+) -> ReadinessResult:
+	"""
+	Poll `probe` with exponential backoff until it returns True or `deadline` seconds pass.
+
+	The first check happens immediately, so an already-indexed scope costs one
+	probe and no sleep. `since` (a `time.monotonic()` timestamp, e.g. when the last
+	turn was written) makes `lag_seconds` measure indexing lag rather than wait time.
+	"""
+	start = time.monotonic()
+	since = start if since is None else since
+	delay = initial_delay
+	attempts = 0
+	while True:
+		attempts += 1
+		if probe():
+			result = ReadinessResult(True, time.monotonic() - since, attempts)
+			break
+		remaining = start + deadline - time.monotonic()
+		if remaining <= 0:
+			result = ReadinessResult(False, time.monotonic() - since, attempts)
+			break
+		time.sleep(min(delay, remaining))
+		delay = _next_delay(delay, factor, max_delay, jitter)
+	(stats or indexing_lag).record(result)
+	return result
+
+
+async def wait_until_ready_async(
+	probe: Callable[[], Union[bool, Awaitable[bool]]],
+	deadline: float = 10.0,
+	initial_delay: float = 0.05,
+	max_delay: float = 1.0,
+	factor: float = 2.0,
+	jitter: float = 0.1,
+	since: Optional[float] = None,
+	stats: Optional[IndexingLagStats] = None,
+) -> ReadinessResult:
+	"""Async counterpart of `wait_until_ready`; `probe` may be sync or async."""
+	start = time.monotonic()
+	since = start if since is None else since
+	delay = initial_delay
+	attempts = 0
+	while True:
+		attempts += 1
+		ready = probe()
+		if inspect.isawaitable(ready):
+			ready = await ready
+		if ready:
+			result = ReadinessResult(True, time.monotonic() - since, attempts)
+			break
+		remaining = start + deadline - time.monotonic()
+		if remaining <= 0:
+			result = ReadinessResult(False, time.monotonic() - since, attempts)
+			break
+		await asyncio.sleep(min(delay, remaining))
+		delay = _next_delay(delay, factor, max_delay, jitter)
+	(stats or indexing_lag).record(result)
+	return result
+
+
+def _item_text(item: Any) -> str:
+	if isinstance(item, str):
+		return item
+	if isinstance(item, dict):
+		return str(item.get("memory") or item.get("text") or item)
+	return str(getattr(item, "memory", None) or getattr(item, "text", None) or item)
+
+
+def fact_probe(
+	search: Callable[[], Union[Iterable[Any], Awaitable[Iterable[Any]]]],
+	fact: str,
+) -> Callable[[], Union[bool, Awaitable[bool]]]:
+	"""
+	Probe that passes once `search()` returns an item mentioning `fact` (case-insensitive).
+
+	`search` queries the memory store itself, e.g. `lambda: mem0.search("trip", user_id=...)`;
+	results may be strings, `{"memory": ...}` dicts or objects with `memory`/`text`.
+	Pick a distinctive fragment of what was just written, since memory services
+	often rewrite facts. An async `search` gives an async probe, for
+	`wait_until_ready_async`.
+	"""
+	needle = fact.lower()
+
+	def _matches(items: Iterable[Any]) -> bool:
+		if isinstance(items, dict) and "results" in items:
+			items = items["results"]
+		return any(needle in _item_text(item).lower() for item in items)
+
+	def _probe() -> Union[bool, Awaitable[bool]]:
+		items = search()
+		if inspect.isawaitable(items):
+
+			async def _resolve() -> bool:
+				return _matches(await items)
+
+			return _resolve()
+		return _matches(items)
+
+	return _probe
+
+
+class FakeMemoryService:
+	"""
+	Local stand-in for a memory service whose writes become searchable after a delay.
+
+	`indexing_delay` may be a number or a zero-argument callable (e.g. a random
+	distribution) to simulate load-dependent lag.
+	"""
+
+	def __init__(self, indexing_delay: Union[float, Callable[[], float]] = 0.5) -> None:
+		self.indexing_delay = indexing_delay
+		self._lock = threading.Lock()
+		self._items: Dict[str, List[tuple]] = defaultdict(list)
+
+	def add(self, scope: str, item: Any) -> None:
+		delay = self.indexing_delay() if callable(self.indexing_delay) else self.indexing_delay
+		with self._lock:
+			self._items[scope].append((time.monotonic() + delay, item))
+
+	def search(self, scope: str) -> List[Any]:
+		now = time.monotonic()
+		with self._lock:
+			return [item for visible_at, item in self._items[scope] if visible_at <= now]
+
+	def is_indexed(self, scope: str, count: int) -> bool:
+		"""True once at least `count` items written to `scope` are searchable."""
+		return len(self.search(scope)) >= count
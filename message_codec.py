@@ -0,0 +1,317 @@
+import mmap
+import os
+import struct
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+# File layout (version 1):
+#   header:  b"CMH" + version byte
+#   records: u32 length | payload | u32 length
+# The trailing length lets a reader walk backwards from EOF, so resuming a thread
+# only decodes the last N records instead of parsing the whole history.
+MAGIC = b"CMH"
+VERSION = 1
+HEADER = MAGIC + bytes([VERSION])
+
+_LEN = struct.Struct("<I")
+_F64 = struct.Struct("<d")
+
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _BYTES, _LIST, _DICT, _KNOWN = range(10)
+
+# Strings that show up in almost every serialized ChatMessage. They are encoded as a
+# one-byte tag plus a small index. The table is part of the format: only append to it
+# together with a VERSION bump.
+_KNOWN_STRINGS: Tuple[str, ...] = (
+	"type", "role", "contents", "text", "value", "call_id", "name", "arguments", "result",
+	"exception", "additional_properties", "author_name", "message_id", "annotations",
+	"uri", "media_type", "data", "usage_details", "user", "assistant", "system", "tool",
+	"chat_message", "text_content", "function_call", "function_result", "data_content",
+	"uri_content", "error_content", "usage_content", "text_reasoning", "hosted_file",
+	"input_token_count", "output_token_count", "total_token_count", "error", "details",
+)
+_KNOWN_INDEX = {s: i for i, s in enumerate(_KNOWN_STRINGS)}
+
+
+class CodecError(ValueError):
+	"""Raised when a buffer is not a valid, supported message log."""
+
+
+def _write_varint(out: bytearray, n: int) -> None:
+	while n > 0x7F:
+		out.append((n & 0x7F) | 0x80)
+		n >>= 7
+	out.append(n)
+
+
+def _read_varint(buf, pos: int) -> Tuple[int, int]:
+	result = 0
+	shift = 0
+	while True:
+		b = buf[pos]
+		pos += 1
+		result |= (b & 0x7F) << shift
+		if b < 0x80:
+			return result, pos
+		shift += 7
+
+
+def _encode(out: bytearray, value: Any) -> None:
+	if value is None:
+		out.append(_NONE)
+	elif value is True:
+		out.append(_TRUE)
+	elif value is False:
+		out.append(_FALSE)
+	elif isinstance(value, int):
+		out.append(_INT)
+		_write_varint(out, (value << 1) if value >= 0 else ((-value << 1) - 1))
+	elif isinstance(value, float):
+		out.append(_FLOAT)
+		out += _F64.pack(value)
+	elif isinstance(value, str):
+		known = _KNOWN_INDEX.get(value)
+		if known is not None:
+			out.append(_KNOWN)
+			out.append(known)
+		else:
+			raw = value.encode("utf-8")
+			out.append(_STR)
+			_write_varint(out, len(raw))
+			out += raw
+	elif isinstance(value, (bytes, bytearray, memoryview)):
+		raw = bytes(value)
+		out.append(_BYTES)
+		_write_varint(out, len(raw))
+		out += raw
+	elif isinstance(value, (list, tuple)):
+		out.append(_LIST)
+		_write_varint(out, len(value))
+		for item in value:
+			_encode(out, item)
+	elif isinstance(value, dict):
+		out.append(_DICT)
+		_write_varint(out, len(value))
+		for key, item in value.items():
+			if not isinstance(key, str):
+				raise TypeError(f"dict keys must be str, got {type(key).__name__}")
+			_encode(out, key)
+			_encode(out, item)
+	else:
+		raise TypeError(f"cannot encode value of type {type(value).__name__}")
+
+
+def _decode(buf, pos: int) -> Tuple[Any, int]:
+	tag = buf[pos]
+	pos += 1
+	if tag == _NONE:
+		return None, pos
+	if tag == _TRUE:
+		return True, pos
+	if tag == _FALSE:
+		return False, pos
+	if tag == _INT:
+		n, pos = _read_varint(buf, pos)
+		return (n >> 1) if not n & 1 else -((n + 1) >> 1), pos
+	if tag == _FLOAT:
+		return _F64.unpack_from(buf, pos)[0], pos + 8
+	if tag == _KNOWN:
+		return _KNOWN_STRINGS[buf[pos]], pos + 1
+	if tag == _STR:
+		n, pos = _read_varint(buf, pos)
+		return bytes(buf[pos:pos + n]).decode("utf-8"), pos + n
+	if tag == _BYTES:
+		n, pos = _read_varint(buf, pos)
+		return bytes(buf[pos:pos + n]), pos + n
+	if tag == _LIST:
+		n, pos = _read_varint(buf, pos)
+		items = []
+		for _ in range(n):
+			item, pos = _decode(buf, pos)
+			items.append(item)
+		return items, pos
+	if tag == _DICT:
+		n, pos = _read_varint(buf, pos)
+		obj = {}
+		for _ in range(n):
+			key, pos = _decode(buf, pos)
+			obj[key], pos = _decode(buf, pos)
+		return obj, pos
+	raise CodecError(f"unknown tag {tag} at offset {pos - 1}")
+
+
+def encode_record(record: Any) -> bytes:
+	"""Encode one JSON-like value (typically `ChatMessage.to_dict()`) into a framed record."""
+	payload = bytearray()
+	_encode(payload, record)
+	size = _LEN.pack(len(payload))
+	return size + bytes(payload) + size
+
+
+def decode_payload(payload) -> Any:
+	value, _ = _decode(payload, 0)
+	return value
+
+
+def dumps(records: Iterable[Any]) -> bytes:
+	return HEADER + b"".join(encode_record(r) for r in records)
+
+
+def dump(records: Iterable[Any], path: str) -> None:
+	with open(path, "wb") as f:
+		f.write(HEADER)
+		for record in records:
+			f.write(encode_record(record))
+
+
+def _frame_at(buf, pos: int, end: int) -> Optional[int]:
+	"""Size of the well-formed frame starting at `pos`, or None if it is torn or corrupt."""
+	if pos + 2 * _LEN.size > end:
+		return None
+	(size,) = _LEN.unpack_from(buf, pos)
+	if pos + size + 2 * _LEN.size > end:
+		return None
+	(trailer,) = _LEN.unpack_from(buf, pos + _LEN.size + size)
+	return size if trailer == size else None
+
+
+def _scan(buf) -> Tuple[List[int], int]:
+	"""Offsets of the well-formed frames from the start, and where the last one ends."""
+	offsets = []
+	pos = len(HEADER)
+	end = len(buf)
+	while pos < end:
+		size = _frame_at(buf, pos, end)
+		if size is None:
+			break
+		offsets.append(pos)
+		pos += size + 2 * _LEN.size
+	return offsets, pos
+
+
+def append(records: Iterable[Any], path: str) -> None:
+	"""
+	Append records to a log, creating it (with header) if it does not exist.
+
+	A torn frame left at the end by a crashed append is cut off first, so new
+	records stay reachable instead of landing behind unreadable bytes.
+	"""
+	with open(path, "a+b") as f:
+		end = f.seek(0, os.SEEK_END)
+		if end == 0:
+			f.write(HEADER)
+		else:
+			f.seek(0)
+			with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+				_check_header(buf)
+				good = end if _last_frame_ok(buf) else _scan(buf)[1]
+			if good != end:
+				f.truncate(good)
+		for record in records:
+			f.write(encode_record(record))
+
+
+def _last_frame_ok(buf) -> bool:
+	end = len(buf)
+	if end == len(HEADER):
+		return True
+	if end < len(HEADER) + 2 * _LEN.size:
+		return False
+	(size,) = _LEN.unpack_from(buf, end - _LEN.size)
+	start = end - size - 2 * _LEN.size
+	return start >= len(HEADER) and _frame_at(buf, start, end) == size
+
+
+def _check_header(buf) -> None:
+	if len(buf) < len(HEADER) or bytes(buf[:3]) != MAGIC:
+		raise CodecError("not a message log")
+	if buf[3] != VERSION:
+		raise CodecError(f"unsupported message log version {buf[3]}")
+
+
+def loads(data: bytes) -> List[Any]:
+	_check_header(data)
+	view = memoryview(data)
+	offsets, end = _scan(view)
+	if end != len(view):
+		raise CodecError(f"torn or corrupt frame at offset {end}")
+	return [decode_payload(view[o + _LEN.size:o + _LEN.size + _LEN.unpack_from(view, o)[0]]) for o in offsets]
+
+
+class MappedMessageLog(Sequence):
+	"""
+	Read-only, memory-mapped view over a message log.
+
+	Records are decoded on access. `tail(n)` walks backwards from EOF using the
+	trailing length of each frame, so it touches only the last `n` records.
+	Indexing by position builds a frame-offset table on first use.
+
+	Every frame's leading and trailing lengths must agree. Forward reads stop at
+	the first frame where they do not (a torn append), as if the log ended there;
+	`tail` checks each frame it walks over and falls back to a forward read when
+	the end of the log or a frame on the way is bad.
+	"""
+
+	def __init__(self, path: str) -> None:
+		self._file = open(path, "rb")
+		try:
+			size = os.fstat(self._file.fileno()).st_size
+			self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+			_check_header(self._map)
+		except BaseException:
+			self.close()
+			raise
+		self._offsets: Optional[List[int]] = None
+
+	def _payload(self, offset: int) -> memoryview:
+		(size,) = _LEN.unpack_from(self._map, offset)
+		start = offset + _LEN.size
+		return memoryview(self._map)[start:start + size]
+
+	def _frame_offsets(self) -> List[int]:
+		if self._offsets is None:
+			self._offsets = _scan(self._map)[0]
+		return self._offsets
+
+	def __len__(self) -> int:
+		return len(self._frame_offsets())
+
+	def __getitem__(self, index):
+		offsets = self._frame_offsets()
+		if isinstance(index, slice):
+			return [decode_payload(self._payload(o)) for o in offsets[index]]
+		return decode_payload(self._payload(offsets[index]))
+
+	def __iter__(self) -> Iterator[Any]:
+		for offset in self._frame_offsets():
+			yield decode_payload(self._payload(offset))
+
+	def tail(self, n: int) -> List[Any]:
+		"""Decode only the last `n` records, oldest first."""
+		if n <= 0:
+			return []
+		if not _last_frame_ok(self._map):
+			# Torn end: the backward walk has no trustworthy starting point
+			return self[-n:]
+		records = []
+		pos = len(self._map)
+		while n > 0 and pos > len(HEADER):
+			(size,) = _LEN.unpack_from(self._map, pos - _LEN.size)
+			start = pos - size - 2 * _LEN.size
+			if start < len(HEADER) or _frame_at(self._map, start, pos) != size:
+				return self[-(len(records) + n):]
+			records.append(decode_payload(self._payload(start)))
+			pos = start
+			n -= 1
+		records.reverse()
+		return records
+
+	def close(self) -> None:
+		if isinstance(getattr(self, "_map", None), mmap.mmap):
+			self._map.close()
+		self._file.close()
+
+	def __enter__(self) -> "MappedMessageLog":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
@@ -1,19 +1,35 @@
 import asyncio
 import os
-from typing import List
+from contextlib import AsyncExitStack
+from typing import Optional
 
 from azure.identity.aio import AzureCliCredential
 from agent_framework.azure import AzureAIAgentClient
 from agent_framework import ChatMessage, Role
 
+from credential_cache import CachedAsyncCredential
+from history_manager import HistoryManager, agent_summarizer
+from session_manager import SessionManager
 
-async def multi_turn_async(deployment_name: str, joker_instructions: str, joker_name: str) -> None:
+
+async def multi_turn_async(
+	deployment_name: str,
+	joker_instructions: str,
+	joker_name: str,
+	history_budget_tokens: int = 4000,
+	sessions: Optional[SessionManager] = None,
+	session_id: str = "default",
+) -> None:
 	"""
 	Python equivalent of the C# MultiTurn behavior using Agent Framework.
 
 	- Creates an agent with given instructions and name
 	- Maintains a conversation "thread" by appending messages
+	- Keeps the thread under `history_budget_tokens`, summarizing evicted turns in the background
 	- Runs twice on the same logical thread and prints both responses
+	- With `sessions`, the conversation is `session_id` in that `SessionManager`:
+	  earlier turns are replayed into the thread and new ones are kept there, so
+	  many users can share one memory budget
 	- Agent is cleaned up automatically
 	"""
 	os.environ.setdefault(
@@ -22,35 +38,54 @@ async def multi_turn_async(deployment_name: str, joker_instructions: str, joker_
 	)
 	os.environ.setdefault("AZURE_AI_MODEL_DEPLOYMENT_NAME", deployment_name)
 
-	async with AzureCliCredential() as credential:
+	async with CachedAsyncCredential(AzureCliCredential()) as credential:
 		client = AzureAIAgentClient(credential=credential)
 
 		async with client.create_agent(
 			name=joker_name,
 			instructions=joker_instructions,
 		) as agent:
-			messages: List[ChatMessage] = []
-
-			# Turn 1
-			messages.append(ChatMessage(role=Role.USER, text="Tell me a joke about a pirate."))
-			res1 = await agent.run(messages)
-			print(res1.text or "<no assistant reply>")
-
-			# Maintain thread by appending assistant reply
-			if res1.text:
-				messages.append(ChatMessage(role=Role.ASSISTANT, text=res1.text))
-
-			# Turn 2
-			messages.append(
-				ChatMessage(
-					role=Role.USER,
-					text=(
-						"Now add some emojis to the joke and tell it in the voice of a pirate's parrot."
-					),
-				)
+			history = HistoryManager(
+				budget_tokens=history_budget_tokens,
+				summarizer=agent_summarizer(agent),
 			)
-			res2 = await agent.run(messages)
-			print(res2.text or "<no assistant reply>")
+
+			async with AsyncExitStack() as stack:
+				session = None
+				if sessions is not None:
+					session = await stack.enter_async_context(sessions.session(session_id))
+					history.extend(session.chat_messages())
+
+				def record(message: ChatMessage) -> None:
+					history.append(message)
+					if session is not None:
+						session.append(message)
+
+				try:
+					# Turn 1
+					record(ChatMessage(role=Role.USER, text="Tell me a joke about a pirate."))
+					res1 = await agent.run(history.messages())
+					print(res1.text or "<no assistant reply>")
+
+					# Maintain thread by appending assistant reply
+					if res1.text:
+						record(ChatMessage(role=Role.ASSISTANT, text=res1.text))
+
+					# Turn 2
+					record(
+						ChatMessage(
+							role=Role.USER,
+							text=(
+								"Now add some emojis to the joke and tell it in the voice of a pirate's parrot."
+							),
+						)
+					)
+					res2 = await agent.run(history.messages())
+					print(res2.text or "<no assistant reply>")
+					if res2.text:
+						record(ChatMessage(role=Role.ASSISTANT, text=res2.text))
+				finally:
+					await history.aclose()
 
 
 def main() -> None:
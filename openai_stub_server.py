@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+class OpenAIStubServer:
+	"""
+	Minimal local stand-in for the OpenAI-compatible Conversations/Responses endpoints.
+
+	Speaks just enough HTTP/1.1 (keep-alive, Content-Length bodies) for the
+	`openai` client to talk to it with `base_url=server.url`. Every response is
+	delayed by `latency` seconds to model service time without burning CPU.
+	`throttle_rate` / `error_rate` answer that fraction of requests with
+	429 (+ `Retry-After`) / 500 instead.
+
+	- POST /conversations                 -> conversation object
+	- GET  /conversations/{id}/items      -> list of items posted so far
+	- POST /responses                     -> response echoing the input
+	"""
+
+	def __init__(
+		self,
+		host: str = "127.0.0.1",
+		port: int = 0,
+		latency: float = 0.05,
+		error_rate: float = 0.0,
+		throttle_rate: float = 0.0,
+		retry_after: float = 1.0,
+		seed: int = 0,
+	) -> None:
+		self.host = host
+		self.port = port
+		self.latency = latency
+		self.error_rate = error_rate
+		self.throttle_rate = throttle_rate
+		self.retry_after = retry_after
+		self.requests = 0
+		self._rng = random.Random(seed)
+		self._ids = itertools.count(1)
+		self._conversations: Dict[str, List[Dict[str, Any]]] = {}
+		self._server: Optional[asyncio.AbstractServer] = None
+		self._connections: Set[asyncio.Task] = set()
+
+	@property
+	def url(self) -> str:
+		return f"http://{self.host}:{self.port}"
+
+	async def start(self) -> None:
+		self._server = await asyncio.start_server(self._serve, self.host, self.port)
+		self.port = self._server.sockets[0].getsockname()[1]
+
+	async def close(self) -> None:
+		if self._server is not None:
+			self._server.close()
+			# Idle keep-alive connections would otherwise be torn down with the loop
+			for task in list(self._connections):
+				task.cancel()
+			await asyncio.gather(*self._connections, return_exceptions=True)
+			await self._server.wait_closed()
+
+	async def __aenter__(self) -> "OpenAIStubServer":
+		await self.start()
+		return self
+
+	async def __aexit__(self, *exc) -> None:
+		await self.close()
+
+	async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+		task = asyncio.current_task()
+		self._connections.add(task)
+		try:
+			while True:
+				request_line = await reader.readline()
+				if not request_line:
+					break
+				method, path, _ = request_line.decode("latin-1").split(" ", 2)
+				headers: Dict[str, str] = {}
+				while True:
+					line = await reader.readline()
+					if line in (b"\r\n", b"\n", b""):
+						break
+					name, _, value = line.decode("latin-1").partition(":")
+					headers[name.strip().lower()] = value.strip()
+				body = await reader.readexactly(int(headers.get("content-length", "0") or 0))
+				self.requests += 1
+				status, payload = await self._route(method, path.split("?", 1)[0], json.loads(body) if body else None)
+				data = json.dumps(payload).encode("utf-8")
+				extra = f"Retry-After: {self.retry_after:g}\r\n" if status == 429 else ""
+				writer.write(
+					f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+					"Content-Type: application/json\r\n"
+					f"Content-Length: {len(data)}\r\n{extra}"
+					"Connection: keep-alive\r\n\r\n".encode("latin-1") + data
+				)
+				await writer.drain()
+				if headers.get("connection", "").lower() == "close":
+					break
+		except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+			pass
+		finally:
+			self._connections.discard(task)
+			writer.close()
+
+	async def _route(self, method: str, path: str, body: Any) -> Tuple[int, Any]:
+		await asyncio.sleep(self.latency)
+		roll = self._rng.random()
+		if roll < self.throttle_rate:
+			return 429, {"error": {"message": "Rate limit exceeded (injected)", "type": "rate_limit_exceeded"}}
+		if roll < self.throttle_rate + self.error_rate:
+			return 500, {"error": {"message": "Internal error (injected)", "type": "server_error"}}
+		parts = [p for p in path.split("/") if p]
+		if parts and parts[0] == "v1":
+			parts = parts[1:]
+		if method == "POST" and parts == ["conversations"]:
+			conv_id = f"conv_{next(self._ids)}"
+			self._conversations[conv_id] = []
+			return 200, {"id": conv_id, "object": "conversation", "created_at": int(time.time()), "metadata": {}}
+		if method == "GET" and len(parts) == 3 and parts[0] == "conversations" and parts[2] == "items":
+			items = self._conversations.get(parts[1])
+			if items is None:
+				return 404, {"error": {"message": "conversation not found", "type": "not_found"}}
+			return 200, {"object": "list", "data": items, "first_id": None, "last_id": None, "has_more": False}
+		if method == "POST" and parts == ["responses"]:
+			return 200, self._respond(body or {})
+		return 404, {"error": {"message": f"no route for {method} {path}", "type": "not_found"}}
+
+	def _respond(self, body: Dict[str, Any]) -> Dict[str, Any]:
+		user_text = body.get("input") if isinstance(body.get("input"), str) else json.dumps(body.get("input"))
+		reply = f"(stub) You said: {user_text}"
+		conversation = body.get("conversation")
+		conv_id = conversation.get("id") if isinstance(conversation, dict) else conversation
+		if conv_id in self._conversations:
+			items = self._conversations[conv_id]
+			for role, text, kind in (("user", user_text, "input_text"), ("assistant", reply, "output_text")):
+				items.append({
+					"type": "message",
+					"id": f"msg_{next(self._ids)}",
+					"role": role,
+					"status": "completed",
+					"content": [{"type": kind, "text": text, "annotations": []}],
+				})
+		return {
+			"id": f"resp_{next(self._ids)}",
+			"object": "response",
+			"created_at": int(time.time()),
+			"model": body.get("model", "stub"),
+			"status": "completed",
+			"instructions": body.get("instructions"),
+			"output": [{
+				"type": "message",
+				"id": f"msg_{next(self._ids)}",
+				"role": "assistant",
+				"status": "completed",
+				"content": [{"type": "output_text", "text": reply, "annotations": []}],
+			}],
+			"parallel_tool_calls": True,
+			"tool_choice": "auto",
+			"tools": [],
+		}
+
+
+async def _serve_forever(host: str, port: int, latency: float, error_rate: float, throttle_rate: float) -> None:
+	async with OpenAIStubServer(host, port, latency, error_rate=error_rate, throttle_rate=throttle_rate) as server:
+		print(server.url, flush=True)
+		await asyncio.Event().wait()
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Local OpenAI Conversations/Responses stub")
+	parser.add_argument("--host", default="127.0.0.1")
+	parser.add_argument("--port", type=int, default=0)
+	parser.add_argument("--latency", type=float, default=0.05)
+	parser.add_argument("--error-rate", type=float, default=0.0)
+	parser.add_argument("--throttle-rate", type=float, default=0.0)
+	args = parser.parse_args()
+	try:
+		asyncio.run(_serve_forever(args.host, args.port, args.latency, args.error_rate, args.throttle_rate))
+	except KeyboardInterrupt:
+		pass
+
+
+if __name__ == "__main__":
+	main()
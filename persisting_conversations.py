@@ -1,13 +1,26 @@
 import asyncio
-import json
 import os
 import tempfile
-from typing import List
+import uuid
+from typing import Any, Dict, List
 
 from azure.identity.aio import AzureCliCredential
 from agent_framework.azure import AzureAIAgentClient
 from agent_framework import ChatMessage, Role
 
+from conversation_store import open_conversation_store
+from credential_cache import CachedAsyncCredential
+
+
+def _message_to_record(message: ChatMessage) -> Dict[str, Any]:
+	"""Serialize a message to a store record, keeping tool calls, results and roles."""
+	return message.to_dict()
+
+
+def _record_to_message(record: Dict[str, Any]) -> ChatMessage:
+	"""Deserialize a store record back into the exact ChatMessage that was saved."""
+	return ChatMessage.from_dict(record)
+
 
 async def persisting_conversations(deployment_name: str, joker_instructions: str, joker_name: str) -> None:
 	"""
@@ -15,8 +28,8 @@ async def persisting_conversations(deployment_name: str, joker_instructions: str
 
 	- Creates an agent with given instructions and name
 	- Starts a conversation and gets an assistant reply
-	- Serializes the in-memory conversation (messages) to JSON and saves it to a temp file
-	- Reloads from JSON to resume the conversation
+	- Appends the new turns to a binary message log per thread in a temp dir
+	- Reloads the thread from the store to resume the conversation
 	- Runs again on the resumed conversation and prints the response
 	- Agent is cleaned up automatically via async context manager
 	"""
@@ -28,57 +41,45 @@ async def persisting_conversations(deployment_name: str, joker_instructions: str
 	)
 	os.environ.setdefault("AZURE_AI_MODEL_DEPLOYMENT_NAME", deployment_name)
 
-	async with AzureCliCredential() as credential:
+	async with CachedAsyncCredential(AzureCliCredential()) as credential:
 		client = AzureAIAgentClient(credential=credential)
 
-		async with client.create_agent(name=joker_name, instructions=joker_instructions) as agent:
-			# Start a new logical thread as an in-memory list of messages
-			messages: List[ChatMessage] = []
-
-			# Turn 1: user asks for a short pirate joke
-			messages.append(ChatMessage(role=Role.USER, text="Tell me a short pirate joke."))
-			res1 = await agent.run(messages)
-			print(res1.text or "<no assistant reply>")
-
-			# Append assistant reply to maintain the logical thread
-			if res1.text:
-				messages.append(ChatMessage(role=Role.ASSISTANT, text=res1.text))
-
-			# Serialize the conversation to JSON (role/text only)
-			serialized = [
-				{
-					"role": (m.role.value if hasattr(m.role, "value") else str(m.role)).lower(),
-					"text": m.text,
-				}
-				for m in messages
-			]
-
-			# Save to a local temp file (replace with DB or blob storage in production)
-			file_path = os.path.join(tempfile.gettempdir(), "agent_thread.json")
-			with open(file_path, "w", encoding="utf-8") as f:
-				json.dump(serialized, f, ensure_ascii=False)
-
-			# Load back from disk
-			with open(file_path, "r", encoding="utf-8") as f:
-				loaded = json.load(f)
-
-			# Deserialize into ChatMessage list tied to the same agent type
-			resumed_messages: List[ChatMessage] = []
-			for item in loaded:
-				role_str = str(item.get("role", "user")).lower()
-				text = item.get("text", "")
-				if role_str in ("assistant", "agent"):
-					role_enum = Role.ASSISTANT
-				else:
-					role_enum = Role.USER
-				resumed_messages.append(ChatMessage(role=role_enum, text=text))
-
-			# Continue the conversation with resumed thread
-			resumed_messages.append(
-				ChatMessage(role=Role.USER, text="Now tell that joke in the voice of a pirate.")
-			)
-			res2 = await agent.run(resumed_messages)
-			print(res2.text or "<no assistant reply>")
+		# One binary message log per thread (see message_codec): full-fidelity records,
+		# and resuming decodes only the records it asks for (replace with DB or blob storage in production)
+		store = open_conversation_store(os.path.join(tempfile.gettempdir(), "agent_threads.cmh"))
+
+		try:
+			async with client.create_agent(name=joker_name, instructions=joker_instructions) as agent:
+				# Start a new logical thread as an in-memory list of messages
+				messages: List[ChatMessage] = []
+				thread_id = uuid.uuid4().hex
+
+				# Turn 1: user asks for a short pirate joke
+				messages.append(ChatMessage(role=Role.USER, text="Tell me a short pirate joke."))
+				res1 = await agent.run(messages)
+				print(res1.text or "<no assistant reply>")
+
+				# Append assistant reply to maintain the logical thread
+				if res1.text:
+					messages.append(ChatMessage(role=Role.ASSISTANT, text=res1.text))
+
+				# Persist the turns written so far
+				store.append(thread_id, (_message_to_record(m) for m in messages))
+
+				# Resume the thread from the store
+				resumed_messages = [_record_to_message(r) for r in store.load(thread_id)]
+
+				# Continue the conversation with resumed thread
+				new_turns = [ChatMessage(role=Role.USER, text="Now tell that joke in the voice of a pirate.")]
+				res2 = await agent.run(resumed_messages + new_turns)
+				print(res2.text or "<no assistant reply>")
+
+				# Only the new turns are written; earlier records are never rewritten
+				if res2.text:
+					new_turns.append(ChatMessage(role=Role.ASSISTANT, text=res2.text))
+				store.append(thread_id, (_message_to_record(m) for m in new_turns))
+		finally:
+			store.close()
 
 
 def main() -> None:
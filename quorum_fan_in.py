@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
+
+from agent_framework import (
+	AgentExecutorResponse,
+	ExecutorCompletedEvent,
+	ExecutorFailedEvent,
+	ExecutorInvokedEvent,
+	WorkflowErrorDetails,
+	WorkflowEvent,
+	WorkflowFailedEvent,
+	WorkflowOutputEvent,
+	WorkflowRunResult,
+)
+
+
+logger = logging.getLogger(__name__)
+
+FINAL_SOURCE_ID = "quorum"
+
+
+class QuorumNotMetError(RuntimeError):
+	"""Fewer than `min_results` participants answered; carries what did arrive and why the rest failed."""
+
+	def __init__(self, results: List[AgentExecutorResponse], failures: Dict[str, BaseException], min_results: int) -> None:
+		detail = "; ".join(f"{name}: {type(e).__name__}: {e}" for name, e in failures.items()) or "deadline or cancellation"
+		super().__init__(f"quorum not met: {len(results)} of {min_results} required results ({detail})")
+		self.results = results
+		self.failures = failures
+		self.min_results = min_results
+
+
+class QuorumWorkflow:
+	"""
+	Fan-out to every participant, fan-in incrementally.
+
+	This replaces `ConcurrentBuilder`'s workflow rather than plugging into the
+	framework's `WorkflowBuilder`: the superstep runner cannot cancel executors
+	that are still running, which a quorum needs. It speaks the same event
+	vocabulary so stream consumers (e.g. `Instrumentation.observe_workflow`) work
+	unchanged; participants are agents, so agent middleware (rate limiter, cache)
+	still applies to each run.
+
+	- `run_stream` yields `ExecutorInvokedEvent` per participant, then as each one
+	  finishes an `ExecutorCompletedEvent` and a `WorkflowOutputEvent`
+	  (`source_executor_id` is that participant, `data` the aggregate so far), or an
+	  `ExecutorFailedEvent` carrying its error
+	- Once the quorum is met, one final `WorkflowOutputEvent` from `FINAL_SOURCE_ID`;
+	  participants still running are cancelled
+	- With fewer than `min_results` answers it yields `WorkflowFailedEvent` and
+	  raises `QuorumNotMetError`
+	- `run` collects the events into a `WorkflowRunResult`; failures of the last
+	  run are also kept in `last_failures`
+	"""
+
+	def __init__(
+		self,
+		participants: Sequence[Any],
+		aggregator: Callable[[List[AgentExecutorResponse]], Any],
+		first_k: int,
+		deadline: Optional[float],
+		min_results: int,
+	) -> None:
+		self.participants = list(participants)
+		self.aggregator = aggregator
+		self.first_k = first_k
+		self.deadline = deadline
+		self.min_results = min_results
+		self.last_latencies: Dict[str, float] = {}
+		self.last_failures: Dict[str, BaseException] = {}
+
+	async def run(self, message: Any) -> WorkflowRunResult:
+		"""Run to completion and return every event, like `Workflow.run`."""
+		return WorkflowRunResult([event async for event in self.run_stream(message)])
+
+	async def run_stream(self, message: Any) -> AsyncIterator[WorkflowEvent]:
+		started = time.perf_counter()
+		tasks: Dict[asyncio.Task, str] = {}
+		for index, agent in enumerate(self.participants):
+			name = getattr(agent, "name", None) or f"participant_{index}"
+			tasks[asyncio.create_task(agent.run(message))] = name
+
+		results: List[AgentExecutorResponse] = []
+		failures: Dict[str, BaseException] = {}
+		pending = set(tasks)
+		self.last_latencies = {}
+		self.last_failures = failures
+		try:
+			for name in tasks.values():
+				yield ExecutorInvokedEvent(name)
+			while pending and len(results) < self.first_k:
+				timeout = None
+				if self.deadline is not None and len(results) >= self.min_results:
+					timeout = max(0.0, started + self.deadline - time.perf_counter())
+				done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+				if not done:
+					# Deadline passed with enough results: stop waiting on stragglers
+					break
+				for task in done:
+					name = tasks[task]
+					self.last_latencies[name] = time.perf_counter() - started
+					error = task.exception()
+					if error is not None:
+						failures[name] = error
+						logger.warning("quorum participant %s failed: %s: %s", name, type(error).__name__, error)
+						yield ExecutorFailedEvent(name, WorkflowErrorDetails.from_exception(error, executor_id=name))
+						continue
+					response = AgentExecutorResponse(executor_id=name, agent_run_response=task.result())
+					results.append(response)
+					yield ExecutorCompletedEvent(name, response)
+					yield WorkflowOutputEvent(data=self.aggregator(list(results)), source_executor_id=name)
+				if len(results) + len(pending) < self.min_results:
+					break
+		finally:
+			for task in pending:
+				task.cancel()
+			if pending:
+				await asyncio.gather(*pending, return_exceptions=True)
+
+		if len(results) < self.min_results:
+			error = QuorumNotMetError(results, failures, self.min_results)
+			yield WorkflowFailedEvent(WorkflowErrorDetails.from_exception(error, executor_id=FINAL_SOURCE_ID))
+			raise error
+		yield WorkflowOutputEvent(data=self.aggregator(results), source_executor_id=FINAL_SOURCE_ID)
+
+
+class QuorumConcurrentBuilder:
+	"""
+	Drop-in alternative to `ConcurrentBuilder` with a streaming, quorum-aware aggregator.
+
+		workflow = (
+			QuorumConcurrentBuilder()
+			.participants([physicist, chemist])
+			.with_aggregator(aggregate)
+			.with_quorum(first_k=1, deadline=10.0)
+			.build()
+		)
+
+	- `first_k`: finish as soon as this many participants have answered (default: all)
+	- `deadline`: seconds after which to finish with whatever has arrived, as long
+	  as at least `min_results` answers are in
+	"""
+
+	def __init__(self) -> None:
+		self._participants: List[Any] = []
+		self._aggregator: Optional[Callable[[List[AgentExecutorResponse]], Any]] = None
+		self._first_k: Optional[int] = None
+		self._deadline: Optional[float] = None
+		self._min_results = 1
+
+	def participants(self, participants: Sequence[Any]) -> "QuorumConcurrentBuilder":
+		if not participants:
+			raise ValueError("participants cannot be empty")
+		self._participants = list(participants)
+		return self
+
+	def with_aggregator(self, aggregator: Callable[[List[AgentExecutorResponse]], Any]) -> "QuorumConcurrentBuilder":
+		self._aggregator = aggregator
+		return self
+
+	def with_quorum(
+		self,
+		first_k: Optional[int] = None,
+		deadline: Optional[float] = None,
+		min_results: int = 1,
+	) -> "QuorumConcurrentBuilder":
+		self._first_k = first_k
+		self._deadline = deadline
+		self._min_results = min_results
+		return self
+
+	def build(self) -> QuorumWorkflow:
+		if not self._participants:
+			raise ValueError("call participants([...]) before build()")
+		count = len(self._participants)
+		first_k = self._first_k or count
+		if not 1 <= first_k <= count:
+			raise ValueError(f"first_k must be between 1 and {count}")
+		aggregator = self._aggregator or (lambda results: [r.agent_run_response for r in results])
+		return QuorumWorkflow(self._participants, aggregator, first_k, self._deadline, min(self._min_results, first_k))
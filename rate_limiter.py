@@ -0,0 +1,489 @@
+import asyncio
+import email.utils
+import random
+import re
+import threading
+import time
+import weakref
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+from agent_framework import AgentRunResponseUpdate, UsageContent
+from agent_framework._middleware import AgentRunContext, agent_middleware
+
+from history_manager import count_tokens, message_tokens
+
+
+T = TypeVar("T")
+U = TypeVar("U")
+
+# Status codes worth retrying: throttling, timeouts and transient server errors
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+# A run that fails server-side surfaces its `last_error` as a status-less exception,
+# e.g. "Rate limit is exceeded. Try again in 21 seconds."
+_RATE_LIMIT_MESSAGE = re.compile(r"rate[ _]limit", re.IGNORECASE)
+_TRY_AGAIN = re.compile(r"try again in (\d+(?:\.\d+)?)\s*(ms|millisecond|s\b|sec|second)", re.IGNORECASE)
+
+
+def _causes(exc: Optional[BaseException]) -> Iterator[BaseException]:
+	"""`exc` and whatever it wraps (`__cause__`, `__context__`, azure-core's `inner_exception`)."""
+	seen = set()
+	while exc is not None and id(exc) not in seen:
+		seen.add(id(exc))
+		yield exc
+		exc = exc.__cause__ or getattr(exc, "inner_exception", None) or exc.__context__
+
+
+def _is_rate_limited_run(exc: BaseException) -> bool:
+	"""A run-level failure whose error code or message says the deployment is rate limited."""
+	code = getattr(exc, "code", None)
+	if isinstance(code, str) and code.lower() == "rate_limit_exceeded":
+		return True
+	return bool(_RATE_LIMIT_MESSAGE.search(str(exc)))
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+	"""HTTP status behind `exc`; 429 for a run that failed on a rate limit without one."""
+	for cause in _causes(exc):
+		status = getattr(cause, "status_code", None)
+		if status is None:
+			status = getattr(getattr(cause, "response", None), "status_code", None)
+		if isinstance(status, int):
+			return status
+	if any(_is_rate_limited_run(cause) for cause in _causes(exc)):
+		return 429
+	return None
+
+
+def is_throttled(exc: BaseException) -> bool:
+	return status_code(exc) == 429
+
+
+def _header_wait(headers: Any) -> Optional[float]:
+	if not headers:
+		return None
+	for name in ("retry-after-ms", "x-ms-retry-after-ms"):
+		raw = headers.get(name)
+		if raw is not None:
+			try:
+				return max(0.0, float(raw) / 1000)
+			except ValueError:
+				pass
+	raw = headers.get("retry-after")
+	if raw is None:
+		return None
+	try:
+		return max(0.0, float(raw))
+	except ValueError:
+		pass
+	try:
+		parsed = email.utils.parsedate_to_datetime(raw)
+	except (TypeError, ValueError):
+		# Malformed: neither seconds nor an HTTP date
+		return None
+	return max(0.0, parsed.timestamp() - time.time())
+
+
+def _message_wait(exc: BaseException) -> Optional[float]:
+	match = _TRY_AGAIN.search(str(exc))
+	if match is None:
+		return None
+	value = float(match.group(1))
+	return value / 1000 if match.group(2).lower().startswith("m") else value
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+	"""
+	Seconds the service asked us to wait, if it said.
+
+	Reads a `retry_after` attribute (the fake backend), else the response's
+	`retry-after-ms` / `x-ms-retry-after-ms` / `Retry-After` headers, where
+	`Retry-After` may be seconds or an HTTP date, else a "Try again in N seconds"
+	in the error message (run-level failures carry no headers).
+	"""
+	for cause in _causes(exc):
+		value = getattr(cause, "retry_after", None)
+		if isinstance(value, (int, float)):
+			return max(0.0, float(value))
+		wait = _header_wait(getattr(getattr(cause, "response", None), "headers", None))
+		if wait is None:
+			wait = _message_wait(cause)
+		if wait is not None:
+			return wait
+	return None
+
+
+def _is_retryable(exc: BaseException) -> bool:
+	if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+		return True
+	status = status_code(exc)
+	return status in RETRYABLE_STATUS
+
+
+class TokenBucket:
+	"""
+	Async token bucket refilled continuously at `per_minute`, holding at most `capacity`.
+
+	- `capacity` defaults to one second of refill: services enforce per-minute
+	  quotas over short windows, so a full minute's burst up front gets throttled
+	- Waiters are served in arrival order; a request larger than `capacity`
+	  waits for a full bucket and leaves it in debt, which later callers wait out
+	- `adjust` settles an estimate once the real cost is known
+	"""
+
+	def __init__(self, per_minute: float, capacity: Optional[float] = None) -> None:
+		self.rate = per_minute / 60.0
+		self.capacity = capacity if capacity is not None else max(1.0, self.rate)
+		self.tokens = self.capacity
+		self._updated = time.monotonic()
+		self._lock = asyncio.Lock()
+
+	def _refill(self) -> None:
+		now = time.monotonic()
+		self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+		self._updated = now
+
+	async def acquire(self, amount: float = 1.0) -> float:
+		"""Take `amount` once available; returns seconds waited."""
+		needed = min(amount, self.capacity)
+		waited = 0.0
+		async with self._lock:
+			while True:
+				self._refill()
+				if self.tokens >= needed:
+					self.tokens -= amount
+					return waited
+				delay = (needed - self.tokens) / self.rate
+				waited += delay
+				await asyncio.sleep(delay)
+
+	def adjust(self, amount: float) -> None:
+		"""Give back (`amount` > 0) or charge (`amount` < 0) tokens after the fact."""
+		self._refill()
+		self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AIMDLimiter:
+	"""
+	Concurrency limit found by additive increase / multiplicative decrease.
+
+	- Each success that finishes under `latency_target` (when set) grows the
+	  limit by `increase / limit`, i.e. about `increase` per window of requests
+	- A throttle, or a success slower than `latency_target`, multiplies it by
+	  `backoff`; decreases are at most one per `cooldown` seconds, so one burst
+	  of 429s shrinks the window once rather than collapsing it to the minimum
+	"""
+
+	def __init__(
+		self,
+		initial: int = 8,
+		minimum: int = 1,
+		maximum: int = 256,
+		increase: float = 1.0,
+		backoff: float = 0.5,
+		latency_target: Optional[float] = None,
+		cooldown: float = 1.0,
+	) -> None:
+		self.limit = float(initial)
+		self.minimum = minimum
+		self.maximum = maximum
+		self.increase = increase
+		self.backoff = backoff
+		self.latency_target = latency_target
+		self.cooldown = cooldown
+		self.in_flight = 0
+		self.decreases = 0
+		self._last_decrease = float("-inf")
+		self._changed = asyncio.Condition()
+
+	async def acquire(self) -> None:
+		async with self._changed:
+			while self.in_flight >= int(self.limit):
+				await self._changed.wait()
+			self.in_flight += 1
+
+	async def release(self, latency: Optional[float] = None, throttled: bool = False) -> None:
+		"""Free a slot; `latency` is given for successes, `throttled` for 429s."""
+		async with self._changed:
+			self.in_flight -= 1
+			slow = latency is not None and self.latency_target is not None and latency > self.latency_target
+			if throttled or slow:
+				now = time.monotonic()
+				if now - self._last_decrease >= self.cooldown:
+					self.limit = max(float(self.minimum), self.limit * self.backoff)
+					self._last_decrease = now
+					self.decreases += 1
+			elif latency is not None:
+				self.limit = min(float(self.maximum), self.limit + self.increase / self.limit)
+			self._changed.notify_all()
+
+
+class RateLimiter:
+	"""
+	Client-side limits for one deployment, shared by everything that calls it.
+
+	- `rpm` / `tpm` token buckets: a request takes one request token and its
+	  estimated tokens up front; the estimate is settled with the response's usage
+	- An `AIMDLimiter` caps in-flight requests and adapts to 429s and latency
+	- A 429 pauses every caller of the deployment for its `Retry-After`, then the
+	  request retries with jittered exponential backoff (also for 5xx, timeouts
+	  and connection errors) up to `max_retries` times
+	- `call(...)` wraps any coroutine (custom workflow executors);
+	  `agent_middleware()` wraps `agent.run` / `run_stream`, which also covers
+	  agents used as workflow participants
+
+		limiter = deployment_limiter("gpt-4.1", rpm=600, tpm=90_000)
+		agent = client.create_agent(..., middleware=[limiter.agent_middleware()])
+	"""
+
+	def __init__(
+		self,
+		name: str = "default",
+		rpm: Optional[float] = None,
+		tpm: Optional[float] = None,
+		concurrency: Optional[AIMDLimiter] = None,
+		max_retries: int = 5,
+		base_delay: float = 0.5,
+		max_delay: float = 30.0,
+		output_tokens: int = 512,
+	) -> None:
+		self.name = name
+		self.requests = TokenBucket(rpm) if rpm else None
+		self.tokens = TokenBucket(tpm) if tpm else None
+		self.concurrency = concurrency or AIMDLimiter()
+		self.max_retries = max_retries
+		self.base_delay = base_delay
+		self.max_delay = max_delay
+		# Reserved per request for the reply until usage says otherwise
+		self.output_tokens = output_tokens
+		self._paused_until = 0.0
+		self.stats_counts = {"calls": 0, "attempts": 0, "throttled": 0, "retries": 0, "failed": 0}
+		self.queued_seconds = 0.0
+
+	def backoff_delay(self, attempt: int, hint: Optional[float] = None) -> float:
+		"""Full-jitter exponential backoff, never shorter than the service's `Retry-After`."""
+		delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+		if hint is not None:
+			# Spread the herd a little past the hint so it does not return in lockstep
+			delay = hint + random.uniform(0, min(self.max_delay, hint * 0.2 + self.base_delay))
+		return delay
+
+	async def _admit(self, tokens: int) -> None:
+		started = time.monotonic()
+		if self.requests is not None:
+			await self.requests.acquire(1)
+		if self.tokens is not None:
+			await self.tokens.acquire(tokens)
+		await self.concurrency.acquire()
+		try:
+			# Checked last, so callers already queued for a slot also honor a fresh Retry-After
+			while (pause := self._paused_until - time.monotonic()) > 0:
+				await asyncio.sleep(pause)
+		except BaseException:
+			await self.concurrency.release()
+			raise
+		self.queued_seconds += time.monotonic() - started
+
+	def settle(self, estimated: int, used: Optional[int]) -> None:
+		if self.tokens is not None and used is not None:
+			self.tokens.adjust(estimated - used)
+
+	async def _lease(self, tokens: int) -> "_Lease":
+		await self._admit(tokens)
+		self.stats_counts["attempts"] += 1
+		return _Lease(self, tokens)
+
+	async def _retry_or_raise(self, lease: "_Lease", exc: Exception, attempt: int) -> None:
+		"""Release a failed attempt's slot, then back off if `exc` deserves another try, else raise it."""
+		throttled = is_throttled(exc)
+		hint = None
+		if throttled:
+			self.stats_counts["throttled"] += 1
+			hint = retry_after(exc)
+			if hint:
+				self._paused_until = max(self._paused_until, time.monotonic() + hint)
+		await lease.release(throttled=throttled)
+		if not _is_retryable(exc) or attempt == self.max_retries:
+			self.stats_counts["failed"] += 1
+			raise exc
+		self.stats_counts["retries"] += 1
+		await asyncio.sleep(self.backoff_delay(attempt, hint))
+
+	async def call(self, fn: Callable[..., Awaitable[T]], *args: Any, tokens: Optional[int] = None, **kwargs: Any) -> T:
+		"""Run `await fn(*args, **kwargs)` under the limits, retrying as configured."""
+		tokens = self.output_tokens if tokens is None else tokens
+		self.stats_counts["calls"] += 1
+		for attempt in range(self.max_retries + 1):
+			lease = await self._lease(tokens)
+			try:
+				result = await fn(*args, **kwargs)
+			except Exception as e:
+				await self._retry_or_raise(lease, e, attempt)
+				continue
+			except BaseException:
+				# Cancelled mid-attempt: free the slot without judging the deployment
+				await lease.release()
+				raise
+			await lease.release(ok=True, used=_usage_tokens(result))
+			return result
+		raise AssertionError("unreachable")
+
+	async def stream(
+		self, start: Callable[[], AsyncIterable[U]], tokens: Optional[int] = None
+	) -> AsyncIterator[U]:
+		"""
+		Iterate `start()` under the limits, holding a slot until the stream ends.
+
+		Retries (calling `start()` again) only until the first item arrives;
+		after that errors propagate, so a consumer never sees a reply start twice.
+		"""
+		tokens = self.output_tokens if tokens is None else tokens
+		self.stats_counts["calls"] += 1
+		for attempt in range(self.max_retries + 1):
+			lease = await self._lease(tokens)
+			iterator = start().__aiter__()
+			try:
+				first = await iterator.__anext__()
+			except StopAsyncIteration:
+				await lease.release(ok=True)
+				return
+			except Exception as e:
+				await self._retry_or_raise(lease, e, attempt)
+				continue
+			except BaseException:
+				await lease.release()
+				raise
+			break
+		else:
+			raise AssertionError("unreachable")
+
+		# Streams are judged on time to first token: total time depends on reply length
+		lease.first_item()
+		used = _update_usage(first, None)
+		try:
+			yield first
+			async for item in iterator:
+				used = _update_usage(item, used)
+				yield item
+		except Exception:
+			self.stats_counts["failed"] += 1
+			await lease.release()
+			raise
+		else:
+			await lease.release(ok=True, used=used)
+		finally:
+			# Consumer stopped early or was cancelled
+			await lease.release()
+
+	def estimate(self, context: AgentRunContext) -> int:
+		instructions = getattr(getattr(context.agent, "chat_options", None), "instructions", None) or ""
+		return sum(message_tokens(m) for m in context.messages) + count_tokens(instructions) + self.output_tokens
+
+	def agent_middleware(self):
+		"""Agent middleware applying these limits to every `run` / `run_stream`."""
+		limiter = self
+
+		@agent_middleware
+		async def RateLimitMiddleware(context: AgentRunContext, next):
+			tokens = limiter.estimate(context)
+			if not context.is_streaming:
+
+				async def attempt() -> Any:
+					await next(context)
+					return context.result
+
+				await limiter.call(attempt, tokens=tokens)
+				return
+
+			async def start() -> AsyncIterator[AgentRunResponseUpdate]:
+				await next(context)
+				async for update in context.result:
+					yield update
+
+			context.result = limiter.stream(start, tokens=tokens)
+
+		return RateLimitMiddleware
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"name": self.name,
+			**self.stats_counts,
+			"limit": round(self.concurrency.limit, 2),
+			"in_flight": self.concurrency.in_flight,
+			"decreases": self.concurrency.decreases,
+			"queued_s": round(self.queued_seconds, 3),
+		}
+
+	def format_stats(self) -> str:
+		s = self.stats()
+		return (
+			f"{s['name']}: {s['calls']} calls, {s['attempts']} attempts, {s['throttled']} throttled, "
+			f"{s['retries']} retries, {s['failed']} failed; concurrency limit {s['limit']:g} "
+			f"({s['decreases']} decreases), {s['queued_s']:.1f}s queued"
+		)
+
+
+class _Lease:
+	"""One attempt's concurrency slot and token estimate; released exactly once."""
+
+	__slots__ = ("limiter", "tokens", "started", "latency", "finished")
+
+	def __init__(self, limiter: RateLimiter, tokens: int) -> None:
+		self.limiter = limiter
+		self.tokens = tokens
+		self.started = time.monotonic()
+		self.latency: Optional[float] = None
+		self.finished = False
+
+	def first_item(self) -> None:
+		self.latency = time.monotonic() - self.started
+
+	async def release(self, ok: bool = False, used: Optional[int] = None, throttled: bool = False) -> None:
+		"""
+		Free the slot; later calls are no-ops.
+
+		Only successes (`ok`) feed a latency sample to the AIMD limit and settle the
+		token estimate against `used`; other errors and abandoned attempts just leave.
+		"""
+		if self.finished:
+			return
+		self.finished = True
+		latency = None
+		if ok:
+			latency = self.latency if self.latency is not None else time.monotonic() - self.started
+			self.limiter.settle(self.tokens, used)
+		await self.limiter.concurrency.release(latency=latency, throttled=throttled)
+
+
+def _usage_tokens(result: Any) -> Optional[int]:
+	usage = getattr(result, "usage_details", None)
+	return getattr(usage, "total_token_count", None) if usage is not None else None
+
+
+def _update_usage(update: AgentRunResponseUpdate, used: Optional[int]) -> Optional[int]:
+	for content in getattr(update, "contents", None) or []:
+		if isinstance(content, UsageContent):
+			total = getattr(content.details, "total_token_count", None)
+			if total is not None:
+				used = (used or 0) + total
+	return used
+
+
+# asyncio locks and conditions belong to one event loop, so limiters are shared per loop
+_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, RateLimiter]]" = weakref.WeakKeyDictionary()
+_limiters_lock = threading.Lock()
+
+
+def deployment_limiter(deployment: str, **settings: Any) -> RateLimiter:
+	"""
+	The `RateLimiter` for `deployment` shared by everything on the running event loop.
+
+	`settings` apply when it is first created; call from a coroutine.
+	"""
+	loop = asyncio.get_running_loop()
+	with _limiters_lock:
+		limiters = _limiters.setdefault(loop, {})
+		limiter = limiters.get(deployment)
+		if limiter is None:
+			limiter = limiters[deployment] = RateLimiter(deployment, **settings)
+		return limiter
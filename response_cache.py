@@ -0,0 +1,225 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from agent_framework import ChatResponse, FunctionApprovalRequestContent, FunctionCallContent
+from agent_framework._middleware import chat_middleware, ChatContext
+
+
+# ChatOptions fields that change what the model returns and therefore belong in the key.
+_KEYED_OPTIONS = (
+	"model_id", "instructions", "temperature", "top_p", "max_tokens", "seed", "stop",
+	"frequency_penalty", "presence_penalty", "tool_choice", "logit_bias", "user",
+)
+
+
+def _canonical_message(message: Any) -> Any:
+	to_dict = getattr(message, "to_dict", None)
+	if callable(to_dict):
+		return to_dict()
+	if isinstance(message, str):
+		return {"role": "user", "text": message}
+	role = getattr(message, "role", None)
+	return {"role": str(getattr(role, "value", role)), "text": getattr(message, "text", None)}
+
+
+def _canonical_tool(tool: Any) -> Any:
+	name = getattr(tool, "name", None) or getattr(tool, "__name__", None) or repr(tool)
+	parameters = getattr(tool, "parameters", None)
+	schema = parameters() if callable(parameters) else parameters
+	return {"name": name, "description": getattr(tool, "description", None), "parameters": schema}
+
+
+def _canonical_format(response_format: Any) -> Any:
+	if response_format is None:
+		return None
+	schema = getattr(response_format, "model_json_schema", None)
+	if callable(schema):
+		return {"name": getattr(response_format, "__name__", None), "schema": schema()}
+	return response_format
+
+
+def cache_key(
+	messages: Iterable[Any],
+	options: Any = None,
+	instructions: Optional[str] = None,
+	tools: Optional[Iterable[Any]] = None,
+	response_format: Any = None,
+	scope: Optional[str] = None,
+) -> str:
+	"""
+	Canonical SHA-256 over everything that determines a model response.
+
+	Values not passed explicitly are read from `options` (a `ChatOptions` or any
+	object with the same attribute names). `scope` separates otherwise identical
+	requests, e.g. two agents sharing one cache.
+	"""
+	if tools is None:
+		tools = getattr(options, "tools", None)
+	if response_format is None:
+		response_format = getattr(options, "response_format", None)
+	keyed_options = {}
+	for name in _KEYED_OPTIONS:
+		value = getattr(options, name, None)
+		if value is not None:
+			keyed_options[name] = value
+	if instructions is not None:
+		keyed_options["instructions"] = instructions
+	payload = {
+		"scope": scope,
+		"messages": [_canonical_message(m) for m in messages],
+		"options": keyed_options,
+		"tools": [_canonical_tool(t) for t in (tools or [])],
+		"response_format": _canonical_format(response_format),
+	}
+	encoded = json.dumps(payload, sort_keys=True, default=repr, separators=(",", ":"), ensure_ascii=False)
+	return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+	"""
+	Two-tier cache of serialized responses.
+
+	- A bounded in-memory LRU serves repeats without touching disk
+	- An optional SQLite file (`path`) survives restarts and is shared across
+	  processes; disk hits are promoted into memory
+	- Every entry expires after `ttl` seconds (per-entry override on `set`)
+	"""
+
+	def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 3600.0, path: Optional[str] = None) -> None:
+		self.max_entries = max_entries
+		self.ttl = ttl
+		self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+		self._lock = threading.Lock()
+		self._db: Optional[sqlite3.Connection] = None
+		self.hits = 0
+		self.disk_hits = 0
+		self.misses = 0
+		if path is not None:
+			self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+			self._db.execute("PRAGMA journal_mode=WAL")
+			self._db.execute(
+				"CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, expires_at REAL, payload TEXT NOT NULL)"
+			)
+
+	def get(self, key: str) -> Optional[Dict[str, Any]]:
+		now = time.time()
+		with self._lock:
+			entry = self._memory.get(key)
+			if entry is not None:
+				if entry[0] > now:
+					self._memory.move_to_end(key)
+					self.hits += 1
+					return entry[1]
+				del self._memory[key]
+			if self._db is not None:
+				row = self._db.execute(
+					"SELECT expires_at, payload FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+				).fetchone()
+				if row is not None:
+					value = json.loads(row[1])
+					self._remember(key, row[0], value)
+					self.hits += 1
+					self.disk_hits += 1
+					return value
+			self.misses += 1
+			return None
+
+	def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None) -> None:
+		ttl = self.ttl if ttl is None else ttl
+		expires_at = time.time() + ttl if ttl is not None else float("inf")
+		with self._lock:
+			self._remember(key, expires_at, value)
+			if self._db is not None:
+				self._db.execute(
+					"INSERT OR REPLACE INTO responses (key, expires_at, payload) VALUES (?, ?, ?)",
+					(key, expires_at, json.dumps(value, ensure_ascii=False)),
+				)
+
+	def _remember(self, key: str, expires_at: float, value: Dict[str, Any]) -> None:
+		self._memory[key] = (expires_at, value)
+		self._memory.move_to_end(key)
+		while len(self._memory) > self.max_entries:
+			self._memory.popitem(last=False)
+
+	def purge_expired(self) -> None:
+		now = time.time()
+		with self._lock:
+			for key in [k for k, (exp, _) in self._memory.items() if exp <= now]:
+				del self._memory[key]
+			if self._db is not None:
+				self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+
+	def stats(self) -> Dict[str, int]:
+		with self._lock:
+			return {"size": len(self._memory), "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
+
+	def close(self) -> None:
+		if self._db is not None:
+			self._db.close()
+			self._db = None
+
+
+def _cacheable(response: ChatResponse) -> bool:
+	"""
+	Whether `response` can be replayed to another caller: not when it asks for
+	tool calls, whose `call_id`s belong to the run that produced them.
+	"""
+	for message in response.messages:
+		for content in message.contents:
+			if isinstance(content, (FunctionCallContent, FunctionApprovalRequestContent)):
+				return False
+	return True
+
+
+def response_cache_middleware(cache: ResponseCache, scope: Optional[str] = None, bypass: bool = False):
+	"""
+	Build a chat middleware that serves repeated requests from `cache`.
+
+	A hit sets `context.result` and terminates the pipeline without calling the
+	model. Streaming requests, and requests continuing a service-side conversation
+	(`conversation_id` set), pass through untouched; responses requesting tool
+	calls are never stored. Stored responses drop their `conversation_id` and
+	`response_id`, so a hit never binds the caller's thread to the service thread
+	of the run that produced it. Set `bypass=True`, or
+	`context.metadata["cache_bypass"] = True` for a single call, to skip the cache.
+	"""
+
+	@chat_middleware
+	async def ResponseCacheMiddleware(context: ChatContext, next):
+		metadata = getattr(context, "metadata", None) or {}
+		options = getattr(context, "chat_options", None)
+		if (
+			bypass
+			or metadata.get("cache_bypass")
+			or getattr(context, "is_streaming", False)
+			or getattr(options, "conversation_id", None) is not None
+		):
+			await next(context)
+			return
+
+		key = cache_key(context.messages, options, scope=scope)
+		cached = cache.get(key)
+		if cached is not None:
+			response = ChatResponse.from_dict(cached)
+			response_format = getattr(options, "response_format", None)
+			if response_format is not None and hasattr(response, "try_parse_value"):
+				response.try_parse_value(response_format)
+			context.result = response
+			context.terminate = True
+			return
+
+		await next(context)
+
+		result = getattr(context, "result", None)
+		if isinstance(result, ChatResponse) and _cacheable(result):
+			payload = result.to_dict()
+			payload.pop("conversation_id", None)
+			payload.pop("response_id", None)
+			cache.set(key, payload)
+
+	return ResponseCacheMiddleware
@@ -1,17 +1,22 @@
 import asyncio
 import os
 from contextlib import AsyncExitStack
+from typing import Optional
 
 from azure.identity.aio import AzureCliCredential
 from agent_framework.azure import AzureAIAgentClient
 from agent_framework import (
-	WorkflowBuilder,
 	WorkflowOutputEvent,
 	AgentRunUpdateEvent,
 )
 
+from credential_cache import CachedAsyncCredential
+from dag_workflow import INPUT, DagWorkflowBuilder, StageTimer
+from instrumentation import Instrumentation
+from shared_transport import shared_transports
 
-async def sample_workflow(deployment_name: str) -> None:
+
+async def sample_workflow(deployment_name: str, instrumentation: Optional[Instrumentation] = None) -> None:
 	# Ensure endpoint + model are available via env for the Azure client
 	os.environ.setdefault(
 		"AZURE_AI_PROJECT_ENDPOINT",
@@ -19,11 +24,15 @@ async def sample_workflow(deployment_name: str) -> None:
 	)
 	os.environ.setdefault("AZURE_AI_MODEL_DEPLOYMENT_NAME", deployment_name)
 
-	async with AzureCliCredential() as credential:
-		client = AzureAIAgentClient(credential=credential)
+	async with CachedAsyncCredential(AzureCliCredential()) as credential:
+		# Every agent in the process shares one keep-alive pool instead of its own transport
+		transports = shared_transports()
+		client = AzureAIAgentClient(agents_client=transports.agents_client(credential), credential=credential)
 
 		# Use AsyncExitStack so agents are cleaned up automatically
 		async with AsyncExitStack() as stack:
+			# Entered first so the pool outlives the agents' cleanup
+			await stack.enter_async_context(transports.scope())
 			french_agent = await stack.enter_async_context(
 				client.create_agent(
 					name="FrenchAgent",
@@ -65,15 +74,18 @@ async def sample_workflow(deployment_name: str) -> None:
 				)
 			)
 
-			# Build the workflow with sequential edges
-			workflow = (
-				WorkflowBuilder()
-				.set_start_executor(french_agent)
-				.add_edge(french_agent, spanish_agent)
-				.add_edge(spanish_agent, quality_agent)
-				.add_edge(quality_agent, summary_agent)
-				.build()
+			# Declare what each stage reads; both translations only need the original
+			# English text, so they run concurrently and join before QualityAgent
+			dag = (
+				DagWorkflowBuilder()
+				.add_stage(french_agent)
+				.add_stage(spanish_agent)
+				.add_stage(quality_agent, inputs=[INPUT, "FrenchAgent", "SpanishAgent"])
+				.add_stage(summary_agent, inputs=["QualityAgent"])
 			)
+			workflow = dag.build()
+			timer = StageTimer(dag)
+			instr = instrumentation or Instrumentation(sample_rate=1.0)
 
 			user_text = (
 				"English texts for beginners to practice reading and comprehension online and for free. "
@@ -84,7 +96,7 @@ async def sample_workflow(deployment_name: str) -> None:
 
 			# Stream execution; print agent updates and final output
 			last_executor = None
-			async for evt in workflow.run_stream(user_text):
+			async for evt in instr.observe_workflow(timer.observe(workflow.run_stream(user_text))):
 				if isinstance(evt, AgentRunUpdateEvent):
 					if evt.executor_id != last_executor:
 						if last_executor is not None:
@@ -97,6 +109,13 @@ async def sample_workflow(deployment_name: str) -> None:
 					print("\nWorkflow completed with summary:\n")
 					print(evt.data)
 
+			print("\nStage latency:\n")
+			print(timer.report().format())
+			print("\nExecutor latency:\n")
+			print(instr.summary())
+			print("\nHTTP pool:\n")
+			print(transports.format_metrics())
+
 
 def main() -> None:
 	asyncio.run(sample_workflow("gpt-4.1"))
@@ -1,7 +1,26 @@
+import json
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
 from azure.identity import AzureCliCredential
 from azure.ai.projects import AIProjectClient
+from azure.ai.agents.models import AgentStreamEvent, ListSortOrder, MessageDeltaChunk, RunStatus
 import traceback
 
+from agent_pool import SyncAgentPool
+from credential_cache import CachedCredential
+from shared_transport import shared_transports
+
+
+def project_agent_pool(client: AIProjectClient, **kwargs) -> SyncAgentPool:
+	"""Pool agents created with `client.agents.create_agent` so repeated runs reuse them."""
+	return SyncAgentPool(
+		create=lambda **spec: client.agents.create_agent(**spec),
+		delete=lambda agent: client.agents.delete_agent(agent.id),
+		**kwargs,
+	)
+
 
 def simple_agent(
 	endpoint: str,
@@ -9,63 +28,247 @@ def simple_agent(
 	agent_name: str,
 	instructions: str,
 	user_message: str = "Tell me a joke about a pirate.",
+	client: Optional[AIProjectClient] = None,
+	pool: Optional[SyncAgentPool] = None,
+	run_path: str = "stream",
 ):
-	print("Initializing AIProjectClient...")
-	client = AIProjectClient(endpoint=endpoint, credential=AzureCliCredential())
+	"""
+	Run one message against a pooled agent.
+
+	`run_path` picks how the run is driven: "stream" (run events, reply built from
+	deltas), "poll" (adaptive backoff, then fetch only the newest message) or
+	"legacy" (create_and_process, then list the whole thread).
+
+	Pass a long-lived `client` and `pool` to reuse the same server-side agent across
+	calls; without them the agent is created and deleted around this single run.
+	"""
+	if client is None:
+		print("Initializing AIProjectClient...")
+		client = AIProjectClient(
+			endpoint=endpoint,
+			credential=CachedCredential(AzureCliCredential()),
+			transport=shared_transports().sync_transport(),
+		)
+
+	owns_pool = pool is None
+	if owns_pool:
+		pool = project_agent_pool(client)
 
-	agent = None
 	try:
-		print("Creating agent...")
-		agent = client.agents.create_agent(
+		print("Leasing agent...")
+		with pool.lease(
 			model=deployment_name,
 			name=agent_name,
 			instructions=instructions,
-		)
+		) as agent:
+			last_text, _ = _run_on_thread(client, agent, user_message, run_path=run_path)
+			return last_text
+	finally:
+		if owns_pool:
+			print("Deleting agent...")
+			pool.close()
 
-		print("Creating thread...")
-		thread = client.agents.threads.create()
 
-		print("Posting user message...")
-		client.agents.messages.create(
-			thread_id=thread.id,
-			role="user",
-			content=user_message,
-		)
+@dataclass
+class RunMetrics:
+	path: str
+	ttft_seconds: Optional[float] = None
+	total_seconds: float = 0.0
+	bytes_received: int = 0
+	requests: int = 0
 
-		print("Running agent and waiting for completion...")
-		client.agents.runs.create_and_process(
-			thread_id=thread.id,
-			agent_id=agent.id,
+	def format(self) -> str:
+		ttft = f"{self.ttft_seconds:.2f}s" if self.ttft_seconds is not None else "n/a"
+		return (
+			f"[{self.path}] time-to-first-token={ttft} total={self.total_seconds:.2f}s "
+			f"bytes={self.bytes_received} requests={self.requests}"
 		)
 
-		print("Fetching messages...")
-		messages = client.agents.messages.list(thread_id=thread.id)
-
-		last_text = None
-		for m in messages:
-			if getattr(m, "role", None) in ("assistant", "agent", "MessageRole.AGENT"):
-				for block in getattr(m, "content", []):
-					if getattr(block, "type", None) == "text":
-						text_obj = getattr(block, "text", None)
-						value = getattr(text_obj, "value", None) if text_obj else None
-						if value:
-							last_text = value
-
-		if last_text:
-			print(last_text)
-			return last_text
-		else:
-			# Fallback: return the first assistant message as string
-			for m in messages:
-				if getattr(m, "role", None) in ("assistant", "agent", "MessageRole.AGENT"):
-					print(m)
-					return str(m)
-			return None
 
-	finally:
-		if agent is not None:
-			print("Deleting agent...")
-			client.agents.delete_agent(agent.id)
+class _ByteCounter:
+	"""`raw_response_hook` that tallies response bodies received for one run."""
+
+	def __init__(self, metrics: RunMetrics) -> None:
+		self.metrics = metrics
+
+	def __call__(self, pipeline_response) -> None:
+		http_response = pipeline_response.http_response
+		self.metrics.requests += 1
+		length = http_response.headers.get("Content-Length")
+		if length is not None:
+			self.metrics.bytes_received += int(length)
+			return
+		try:
+			self.metrics.bytes_received += len(http_response.body())
+		except Exception:
+			# Streamed bodies are counted by the caller as they are read
+			pass
+
+
+def _block_text(block) -> Optional[str]:
+	if getattr(block, "type", None) == "text":
+		text_obj = getattr(block, "text", None)
+		return getattr(text_obj, "value", None) if text_obj else None
+	return None
+
+
+def _is_assistant(message) -> bool:
+	return getattr(message, "role", None) in ("assistant", "agent", "MessageRole.AGENT")
+
+
+def _fetch_last_assistant_text(client: AIProjectClient, thread_id: str, run_id: Optional[str], hook) -> Optional[str]:
+	"""Fetch only the newest assistant message of the run instead of the whole thread."""
+	messages = client.agents.messages.list(
+		thread_id=thread_id,
+		run_id=run_id,
+		order=ListSortOrder.DESCENDING,
+		limit=1,
+		raw_response_hook=hook,
+	)
+	for m in messages:
+		if _is_assistant(m):
+			text = "".join(t for t in (_block_text(b) for b in getattr(m, "content", [])) if t)
+			return text or str(m)
+		# limit=1 fills a single page; stop rather than paging further back
+		break
+	return None
+
+
+# Run events after which no further text arrives; the run did not complete
+_RUN_ENDED_EVENTS = (
+	AgentStreamEvent.THREAD_RUN_FAILED,
+	AgentStreamEvent.THREAD_RUN_CANCELLED,
+	AgentStreamEvent.THREAD_RUN_EXPIRED,
+	AgentStreamEvent.THREAD_RUN_INCOMPLETE,
+	AgentStreamEvent.THREAD_RUN_REQUIRES_ACTION,
+)
+
+
+def _run_streamed(client: AIProjectClient, thread_id: str, agent_id: str, metrics: RunMetrics) -> Optional[str]:
+	"""Stream run events; the reply is assembled from message deltas, so nothing is fetched afterwards."""
+	started = time.perf_counter()
+	chunks = []
+	with client.agents.runs.stream(
+		thread_id=thread_id,
+		agent_id=agent_id,
+		raw_response_hook=_ByteCounter(metrics),
+	) as stream:
+		for event_type, event_data, _ in stream:
+			if hasattr(event_data, "as_dict"):
+				# Approximate wire size of the SSE payload
+				metrics.bytes_received += len(json.dumps(event_data.as_dict(), default=str))
+			if isinstance(event_data, MessageDeltaChunk) and event_data.text:
+				if metrics.ttft_seconds is None:
+					metrics.ttft_seconds = time.perf_counter() - started
+				chunks.append(event_data.text)
+			elif event_type == AgentStreamEvent.ERROR:
+				raise RuntimeError(f"run failed: {event_data}")
+			elif event_type in _RUN_ENDED_EVENTS:
+				raise RuntimeError(
+					f"run ended with status {getattr(event_data, 'status', event_type)}: "
+					f"{getattr(event_data, 'last_error', None)}"
+				)
+	return "".join(chunks) or None
+
+
+def _run_polled(
+	client: AIProjectClient,
+	thread_id: str,
+	agent_id: str,
+	metrics: RunMetrics,
+	initial_delay: float = 0.1,
+	max_delay: float = 2.0,
+	factor: float = 1.6,
+) -> Optional[str]:
+	"""Poll the run with adaptive backoff, then fetch only the newest assistant message."""
+	hook = _ByteCounter(metrics)
+	started = time.perf_counter()
+	run = client.agents.runs.create(thread_id=thread_id, agent_id=agent_id, raw_response_hook=hook)
+	delay = initial_delay
+	while run.status in (RunStatus.QUEUED, RunStatus.IN_PROGRESS):
+		time.sleep(delay)
+		delay = min(delay * factor, max_delay)
+		run = client.agents.runs.get(thread_id=thread_id, run_id=run.id, raw_response_hook=hook)
+	if run.status != RunStatus.COMPLETED:
+		raise RuntimeError(f"run ended with status {run.status}: {getattr(run, 'last_error', None)}")
+	text = _fetch_last_assistant_text(client, thread_id, run.id, hook)
+	metrics.ttft_seconds = time.perf_counter() - started
+	return text
+
+
+def _run_legacy(client: AIProjectClient, thread_id: str, agent_id: str, metrics: RunMetrics) -> Optional[str]:
+	"""Original path: block in create_and_process, then list and scan the whole thread."""
+	hook = _ByteCounter(metrics)
+	started = time.perf_counter()
+	client.agents.runs.create_and_process(thread_id=thread_id, agent_id=agent_id, raw_response_hook=hook)
+	messages = list(client.agents.messages.list(thread_id=thread_id, raw_response_hook=hook))
+	metrics.ttft_seconds = time.perf_counter() - started
+
+	last_text = None
+	for m in messages:
+		if _is_assistant(m):
+			for block in getattr(m, "content", []):
+				value = _block_text(block)
+				if value:
+					last_text = value
+	if last_text:
+		return last_text
+	# Fallback: return the first assistant message as string
+	for m in messages:
+		if _is_assistant(m):
+			return str(m)
+	return None
+
+
+_RUN_PATHS = {"stream": _run_streamed, "poll": _run_polled, "legacy": _run_legacy}
+
+
+def _run_on_thread(client: AIProjectClient, agent, user_message: str, run_path: str = "stream"):
+	print("Creating thread...")
+	thread = client.agents.threads.create()
+
+	print("Posting user message...")
+	client.agents.messages.create(
+		thread_id=thread.id,
+		role="user",
+		content=user_message,
+	)
+
+	print(f"Running agent ({run_path})...")
+	metrics = RunMetrics(path=run_path)
+	started = time.perf_counter()
+	last_text = _RUN_PATHS[run_path](client, thread.id, agent.id, metrics)
+	metrics.total_seconds = time.perf_counter() - started
+
+	print(last_text)
+	print(metrics.format())
+	return last_text, metrics
+
+
+def compare_run_paths(
+	endpoint: str,
+	deployment_name: str,
+	agent_name: str,
+	instructions: str,
+	user_message: str = "Tell me a joke about a pirate.",
+	paths: Sequence[str] = ("legacy", "poll", "stream"),
+) -> List[RunMetrics]:
+	"""Run the same message through each run path on one warm agent and report their metrics."""
+	client = AIProjectClient(
+		endpoint=endpoint,
+		credential=CachedCredential(AzureCliCredential()),
+		transport=shared_transports().sync_transport(),
+	)
+	results = []
+	with project_agent_pool(client) as pool:
+		with pool.lease(model=deployment_name, name=agent_name, instructions=instructions) as agent:
+			for path in paths:
+				_, metrics = _run_on_thread(client, agent, user_message, run_path=path)
+				results.append(metrics)
+	print()
+	for metrics in results:
+		print(metrics.format())
+	return results
 
 
 def main() -> None:
@@ -0,0 +1,306 @@
+import asyncio
+import logging
+import sys
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from agent_framework import ChatMessage
+
+import message_codec
+from conversation_store import ConversationStore, Record
+from instrumentation import Histogram
+
+
+logger = logging.getLogger(__name__)
+
+
+# Interpreter overhead of one CompactMessage plus its slot in the session list
+_MESSAGE_OVERHEAD = 56 + 8
+
+
+class CompactMessage:
+	"""
+	Resident form of one `ChatMessage`: ~60 bytes plus text instead of ~540.
+
+	Plain text turns keep only an interned role and the text. Anything richer
+	(tool calls and results, attachments, extra properties) keeps its full
+	`to_dict()` record as `message_codec` bytes.
+	"""
+
+	__slots__ = ("role", "text", "packed")
+
+	def __init__(self, role: str, text: Optional[str], packed: Optional[bytes] = None) -> None:
+		self.role = sys.intern(role)
+		self.text = text
+		self.packed = packed
+
+	@classmethod
+	def from_record(cls, record: Record) -> "CompactMessage":
+		role = record.get("role")
+		role = role.get("value") if isinstance(role, dict) else role
+		contents = record.get("contents") or []
+		if (
+			len(contents) == 1
+			and contents[0].get("type") == "text"
+			and set(contents[0]) <= {"type", "text"}
+			and not record.get("additional_properties")
+			and set(record) <= {"type", "role", "contents", "additional_properties"}
+		):
+			return cls(str(role), contents[0]["text"])
+		return cls(str(role), None, message_codec.dumps([record]))
+
+	@classmethod
+	def from_message(cls, message: ChatMessage) -> "CompactMessage":
+		return cls.from_record(message.to_dict())
+
+	def to_record(self) -> Record:
+		if self.packed is not None:
+			return message_codec.loads(self.packed)[0]
+		return {
+			"type": "chat_message",
+			"role": {"type": "role", "value": self.role},
+			"contents": [{"type": "text", "text": self.text}],
+			"additional_properties": {},
+		}
+
+	def to_message(self) -> ChatMessage:
+		if self.packed is None:
+			return ChatMessage(role=self.role, text=self.text)
+		return ChatMessage.from_dict(self.to_record())
+
+	@property
+	def nbytes(self) -> int:
+		payload = len(self.packed) if self.packed is not None else sys.getsizeof(self.text)
+		return _MESSAGE_OVERHEAD + payload
+
+
+class Session:
+	"""One conversation's resident history; get one from `SessionManager.session(...)`."""
+
+	__slots__ = ("session_id", "messages", "nbytes", "accounted", "persisted", "leases", "last_used")
+
+	def __init__(self, session_id: str, messages: Optional[List[CompactMessage]] = None, persisted: int = 0) -> None:
+		self.session_id = session_id
+		self.messages: List[CompactMessage] = messages or []
+		self.nbytes = sum(m.nbytes for m in self.messages)
+		# `nbytes` as of the manager's last look; appends between leases are settled on release
+		self.accounted = 0
+		# Leading messages already in the store; only the rest are written on spill
+		self.persisted = persisted
+		self.leases = 0
+		self.last_used = time.monotonic()
+
+	def append(self, *messages: ChatMessage) -> None:
+		for message in messages:
+			compact = CompactMessage.from_message(message)
+			self.messages.append(compact)
+			self.nbytes += compact.nbytes
+
+	def chat_messages(self, last_n: Optional[int] = None) -> List[ChatMessage]:
+		messages = self.messages if last_n is None else self.messages[-last_n:]
+		return [m.to_message() for m in messages]
+
+	def __len__(self) -> int:
+		return len(self.messages)
+
+
+class SessionManager:
+	"""
+	Many concurrent multi-turn conversations under a memory budget.
+
+	- Resident sessions live in an LRU; past `max_bytes` (or `max_sessions`) the
+	  least recently used ones not currently leased are spilled: their unsaved
+	  messages are appended to `store` and the history is dropped from memory
+	- `session(id)` leases a session, rehydrating it from `store` if it was spilled
+	  (only the last `rehydrate_last_n` messages when set); concurrent leases of
+	  the same id share one load
+	- `stats()` reports residency, spills and rehydrate latency percentiles
+
+		async with manager.session(user_id) as s:
+			s.append(ChatMessage(role=Role.USER, text=prompt))
+			reply = await agent.run(s.chat_messages())
+			s.append(ChatMessage(role=Role.ASSISTANT, text=reply.text))
+	"""
+
+	def __init__(
+		self,
+		store: ConversationStore,
+		max_bytes: int = 256 * 1024 * 1024,
+		max_sessions: Optional[int] = None,
+		rehydrate_last_n: Optional[int] = None,
+	) -> None:
+		self.store = store
+		self.max_bytes = max_bytes
+		self.max_sessions = max_sessions
+		self.rehydrate_last_n = rehydrate_last_n
+		self._resident: "OrderedDict[str, Session]" = OrderedDict()
+		self._loading: Dict[str, asyncio.Future] = {}
+		self._spilling: Dict[str, Session] = {}
+		self._lock = asyncio.Lock()
+		self.rehydrate_latency = Histogram()
+		self.spill_latency = Histogram()
+		self.hits = 0
+		self.created = 0
+		self.rehydrated = 0
+		self.spills = 0
+		self.spill_failures = 0
+		self.spilled_messages = 0
+		self.resident_bytes = 0
+
+	def _admit(self, session: Session) -> None:
+		self._resident[session.session_id] = session
+		session.accounted = session.nbytes
+		self.resident_bytes += session.accounted
+
+	@asynccontextmanager
+	async def session(self, session_id: str) -> AsyncIterator[Session]:
+		session = await self._checkout(session_id)
+		try:
+			yield session
+		finally:
+			session.leases -= 1
+			session.last_used = time.monotonic()
+			if session.session_id in self._resident:
+				self.resident_bytes += session.nbytes - session.accounted
+				session.accounted = session.nbytes
+			await self._enforce_budget()
+
+	async def _checkout(self, session_id: str) -> Session:
+		async with self._lock:
+			session = self._resident.get(session_id)
+			if session is None:
+				# Mid-spill: take the object back instead of reading a half-written tail
+				session = self._spilling.get(session_id)
+				if session is not None:
+					self._admit(session)
+			if session is not None:
+				self._resident.move_to_end(session_id)
+				session.leases += 1
+				self.hits += 1
+				return session
+			pending = self._loading.get(session_id)
+			owner = pending is None
+			if owner:
+				pending = asyncio.get_running_loop().create_future()
+				self._loading[session_id] = pending
+
+		if not owner:
+			await asyncio.shield(pending)
+			return await self._checkout(session_id)
+
+		try:
+			started = time.perf_counter()
+			records = await asyncio.to_thread(self.store.load, session_id, self.rehydrate_last_n)
+			session = Session(session_id, [CompactMessage.from_record(r) for r in records], persisted=len(records))
+			if records:
+				self.rehydrate_latency.record(time.perf_counter() - started)
+				self.rehydrated += 1
+			else:
+				self.created += 1
+			async with self._lock:
+				session.leases += 1
+				self._admit(session)
+			pending.set_result(None)
+			return session
+		except BaseException as exc:
+			pending.set_exception(exc)
+			# Mark retrieved so an unobserved failure does not log a warning
+			pending.exception()
+			raise
+		finally:
+			self._loading.pop(session_id, None)
+
+	def _over_budget(self) -> bool:
+		if self.max_sessions is not None and len(self._resident) > self.max_sessions:
+			return True
+		return self.resident_bytes > self.max_bytes
+
+	async def _enforce_budget(self) -> None:
+		async with self._lock:
+			victims: List[Session] = []
+			for session_id, session in list(self._resident.items()):
+				if not self._over_budget():
+					break
+				if session.leases or session_id in self._spilling:
+					# In use, or revived while its previous spill is still being written
+					continue
+				del self._resident[session_id]
+				self._spilling[session_id] = session
+				self.resident_bytes -= session.accounted
+				victims.append(session)
+		for session in victims:
+			await self._spill(session)
+
+	async def _persist(self, session: Session) -> int:
+		"""Append the session's unsaved messages to the store; returns how many."""
+		start, upto = session.persisted, len(session.messages)
+		if start == upto:
+			return 0
+		records = [m.to_record() for m in session.messages[start:upto]]
+		# Claimed before the write so a concurrent flush cannot append them twice
+		session.persisted = upto
+		try:
+			await asyncio.to_thread(self.store.append, session.session_id, records)
+		except BaseException:
+			session.persisted = start
+			raise
+		return upto - start
+
+	async def _spill(self, session: Session) -> None:
+		"""Persist an evicted session; if that fails it stays resident and the error is logged."""
+		try:
+			started = time.perf_counter()
+			written = await self._persist(session)
+			if written:
+				self.spill_latency.record(time.perf_counter() - started)
+				self.spilled_messages += written
+			self.spills += 1
+		except BaseException as exc:
+			# Dropping the history now would lose its unsaved messages; a later release retries
+			if session.session_id not in self._resident:
+				self._admit(session)
+			if not isinstance(exc, Exception):
+				raise
+			self.spill_failures += 1
+			logger.exception("spilling session %s failed; keeping it resident", session.session_id)
+		finally:
+			self._spilling.pop(session.session_id, None)
+
+	async def flush(self) -> None:
+		"""Write every resident session's unsaved messages without evicting anything."""
+		for session in list(self._resident.values()):
+			await self._persist(session)
+
+	async def aclose(self) -> None:
+		await self.flush()
+		self._resident.clear()
+		self.resident_bytes = 0
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"resident_sessions": len(self._resident),
+			"resident_bytes": self.resident_bytes,
+			"max_bytes": self.max_bytes,
+			"hits": self.hits,
+			"created": self.created,
+			"rehydrated": self.rehydrated,
+			"spills": self.spills,
+			"spill_failures": self.spill_failures,
+			"spilled_messages": self.spilled_messages,
+			"rehydrate_p50_ms": round(self.rehydrate_latency.percentile(0.5) * 1000, 3),
+			"rehydrate_p95_ms": round(self.rehydrate_latency.percentile(0.95) * 1000, 3),
+			"rehydrate_p99_ms": round(self.rehydrate_latency.percentile(0.99) * 1000, 3),
+			"spill_p95_ms": round(self.spill_latency.percentile(0.95) * 1000, 3),
+		}
+
+	def format_stats(self) -> str:
+		s = self.stats()
+		return (
+			f"resident {s['resident_sessions']} sessions / {s['resident_bytes'] / 1024:.0f} KiB "
+			f"(budget {s['max_bytes'] / 1024:.0f} KiB); hits {s['hits']}, new {s['created']}, "
+			f"rehydrated {s['rehydrated']} (p50 {s['rehydrate_p50_ms']:.2f} ms, p99 {s['rehydrate_p99_ms']:.2f} ms), "
+			f"spills {s['spills']} ({s['spilled_messages']} messages, p95 {s['spill_p95_ms']:.2f} ms, "
+			f"{s['spill_failures']} failed)"
+		)
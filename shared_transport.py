@@ -0,0 +1,394 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import aiohttp
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from azure.ai.agents.aio import AgentsClient
+from azure.ai.projects import AIProjectClient
+from azure.core.pipeline.transport import AioHttpTransport, RequestsTransport
+
+from instrumentation import Histogram
+
+try:
+	import h2  # noqa: F401
+	HTTP2_AVAILABLE = True
+except ImportError:  # httpx only negotiates HTTP/2 when the `h2` package is installed
+	HTTP2_AVAILABLE = False
+
+
+class PoolMetrics:
+	"""
+	Saturation counters for one shared pool.
+
+	- `in_flight` / `peak_in_flight`: requests between send and response headers
+	- `queued` and `queue_wait`: requests that waited for a free connection, and for how long
+	- `connections_created` vs `connections_reused`: keep-alive effectiveness
+	- `dns_cache_hits` / `dns_cache_misses`: resolver cache effectiveness (aiohttp)
+	"""
+
+	def __init__(self, kind: str, max_connections: int) -> None:
+		self.kind = kind
+		self.max_connections = max_connections
+		self.requests = 0
+		self.in_flight = 0
+		self.peak_in_flight = 0
+		self.queued = 0
+		self.queue_wait = Histogram()
+		self.connections_created = 0
+		self.connections_reused = 0
+		self.dns_cache_hits = 0
+		self.dns_cache_misses = 0
+		self._lock = threading.Lock()
+
+	def request_started(self) -> None:
+		with self._lock:
+			self.requests += 1
+			self.in_flight += 1
+			if self.in_flight > self.peak_in_flight:
+				self.peak_in_flight = self.in_flight
+
+	def request_finished(self) -> None:
+		with self._lock:
+			self.in_flight -= 1
+
+	@property
+	def saturation(self) -> float:
+		"""Peak in-flight requests as a fraction of the pool size (>= 1.0 means requests queued)."""
+		return self.peak_in_flight / self.max_connections if self.max_connections else 0.0
+
+	def snapshot(self) -> Dict[str, Any]:
+		return {
+			"requests": self.requests,
+			"in_flight": self.in_flight,
+			"peak_in_flight": self.peak_in_flight,
+			"saturation": round(self.saturation, 3),
+			"queued": self.queued,
+			"queue_wait_p95_ms": round(self.queue_wait.percentile(0.95) * 1000, 3),
+			"connections_created": self.connections_created,
+			"connections_reused": self.connections_reused,
+			"dns_cache_hits": self.dns_cache_hits,
+			"dns_cache_misses": self.dns_cache_misses,
+		}
+
+	def format(self) -> str:
+		s = self.snapshot()
+		return (
+			f"{self.kind:<9} requests={s['requests']} peak={s['peak_in_flight']}/{self.max_connections} "
+			f"queued={s['queued']} (p95 wait {s['queue_wait_p95_ms']:.1f} ms) "
+			f"connections new={s['connections_created']} reused={s['connections_reused']} "
+			f"dns hit/miss={s['dns_cache_hits']}/{s['dns_cache_misses']}"
+		)
+
+
+def _trace_config(metrics: PoolMetrics) -> aiohttp.TraceConfig:
+	trace = aiohttp.TraceConfig()
+
+	async def on_request_start(session, ctx, params) -> None:
+		metrics.request_started()
+
+	async def on_request_done(session, ctx, params) -> None:
+		metrics.request_finished()
+
+	async def on_queued_start(session, ctx, params) -> None:
+		ctx.queued_at = time.perf_counter()
+
+	async def on_queued_end(session, ctx, params) -> None:
+		metrics.queued += 1
+		metrics.queue_wait.record(time.perf_counter() - ctx.queued_at)
+
+	async def on_create_end(session, ctx, params) -> None:
+		metrics.connections_created += 1
+
+	async def on_reuse(session, ctx, params) -> None:
+		metrics.connections_reused += 1
+
+	async def on_dns_hit(session, ctx, params) -> None:
+		metrics.dns_cache_hits += 1
+
+	async def on_dns_miss(session, ctx, params) -> None:
+		metrics.dns_cache_misses += 1
+
+	trace.on_request_start.append(on_request_start)
+	trace.on_request_end.append(on_request_done)
+	trace.on_request_exception.append(on_request_done)
+	trace.on_connection_queued_start.append(on_queued_start)
+	trace.on_connection_queued_end.append(on_queued_end)
+	trace.on_connection_create_end.append(on_create_end)
+	trace.on_connection_reuseconn.append(on_reuse)
+	trace.on_dns_cache_hit.append(on_dns_hit)
+	trace.on_dns_cache_miss.append(on_dns_miss)
+	return trace
+
+
+class _MeteredAdapter(HTTPAdapter):
+	"""`HTTPAdapter` that blocks (rather than opening throwaway connections) when the pool is full."""
+
+	def __init__(self, metrics: PoolMetrics, pool_size: int) -> None:
+		self.metrics = metrics
+		self.pool_size = pool_size
+		super().__init__(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+
+	def send(self, request, **kwargs):
+		self.metrics.request_started()
+		if self.metrics.in_flight > self.pool_size:
+			# urllib3 does not report its blocking wait; count requests that had to wait
+			self.metrics.queued += 1
+		try:
+			return super().send(request, **kwargs)
+		finally:
+			self.metrics.request_finished()
+
+	def refresh_connection_counts(self) -> None:
+		# urllib3 counts connections per host pool; a request that did not open one reused one
+		pools = self.poolmanager.pools
+		created = sum(pools[key].num_connections for key in list(pools.keys()))
+		self.metrics.connections_created = created
+		self.metrics.connections_reused = max(0, self.metrics.requests - created)
+
+
+class _MeteredHTTPTransport(httpx.HTTPTransport):
+	"""`httpx.HTTPTransport` that counts in-flight requests, including ones that fail before a response."""
+
+	def __init__(self, metrics: PoolMetrics, **kwargs: Any) -> None:
+		self.metrics = metrics
+		super().__init__(**kwargs)
+
+	def handle_request(self, request: httpx.Request) -> httpx.Response:
+		self.metrics.request_started()
+		try:
+			return super().handle_request(request)
+		finally:
+			self.metrics.request_finished()
+
+
+class _MeteredAsyncHTTPTransport(httpx.AsyncHTTPTransport):
+	"""Async counterpart of `_MeteredHTTPTransport`."""
+
+	def __init__(self, metrics: PoolMetrics, **kwargs: Any) -> None:
+		self.metrics = metrics
+		super().__init__(**kwargs)
+
+	async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+		self.metrics.request_started()
+		try:
+			return await super().handle_async_request(request)
+		finally:
+			self.metrics.request_finished()
+
+
+class SharedTransports:
+	"""
+	Process-wide HTTP pools shared by every Azure and OpenAI client.
+
+	- Async Azure clients (`AgentsClient` behind `AzureAIAgentClient`): one aiohttp
+	  session per event loop with a bounded keep-alive pool and a DNS cache
+	- Sync Azure clients (`AIProjectClient`): one requests session whose adapter
+	  blocks when all `max_per_host` connections are busy
+	- OpenAI clients (`openai_client(project_client)`, `AsyncOpenAI(http_client=...)`): shared httpx clients,
+	  HTTP/2 multiplexed when `h2` is installed
+
+	The azure-core transports speak HTTP/1.1 only, so for them reuse comes from
+	keep-alive and a per-host pool sized for the expected concurrency.
+
+		transports = shared_transports()
+		async with transports.scope():
+			client = AzureAIAgentClient(agents_client=transports.agents_client(credential), credential=credential)
+			...
+		print(transports.format_metrics())
+	"""
+
+	def __init__(
+		self,
+		max_connections: int = 100,
+		max_per_host: int = 64,
+		keepalive: float = 60.0,
+		dns_ttl: float = 300.0,
+		http2: bool = True,
+	) -> None:
+		self.max_connections = max_connections
+		self.max_per_host = max_per_host
+		self.keepalive = keepalive
+		self.dns_ttl = dns_ttl
+		self.http2 = http2 and HTTP2_AVAILABLE
+		self.metrics = {
+			"aiohttp": PoolMetrics("aiohttp", max_per_host),
+			"requests": PoolMetrics("requests", max_per_host),
+			"httpx": PoolMetrics("httpx", max_connections),
+		}
+		self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+			weakref.WeakKeyDictionary()
+		)
+		self._lock = threading.Lock()
+		self._requests_session: Optional[requests.Session] = None
+		self._adapter: Optional[_MeteredAdapter] = None
+		self._httpx: Optional[httpx.Client] = None
+		self._async_httpx: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+			weakref.WeakKeyDictionary()
+		)
+		self._scopes: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, int]" = weakref.WeakKeyDictionary()
+
+	# --- async azure-core ---
+
+	def aiohttp_session(self) -> aiohttp.ClientSession:
+		"""The running loop's shared session (aiohttp sessions are bound to one loop)."""
+		loop = asyncio.get_running_loop()
+		session = self._sessions.get(loop)
+		if session is None or session.closed:
+			connector = aiohttp.TCPConnector(
+				limit=self.max_connections,
+				limit_per_host=self.max_per_host,
+				keepalive_timeout=self.keepalive,
+				use_dns_cache=True,
+				ttl_dns_cache=self.dns_ttl,
+			)
+			session = aiohttp.ClientSession(
+				connector=connector,
+				trace_configs=[_trace_config(self.metrics["aiohttp"])],
+				# Same settings azure-core uses for the sessions it owns; it decompresses itself
+				cookie_jar=aiohttp.DummyCookieJar(),
+				auto_decompress=False,
+				trust_env=True,
+			)
+			self._sessions[loop] = session
+		return session
+
+	def aio_transport(self) -> AioHttpTransport:
+		return AioHttpTransport(session=self.aiohttp_session(), session_owner=False)
+
+	def agents_client(self, credential: Any, endpoint: Optional[str] = None, **kwargs: Any) -> AgentsClient:
+		"""
+		An `AgentsClient` on the shared pool, for `AzureAIAgentClient(agents_client=...)`.
+
+		`endpoint` defaults to `AZURE_AI_PROJECT_ENDPOINT`. The agent client does not
+		close an `agents_client` it was given, so the pool outlives it.
+		"""
+		endpoint = endpoint or os.environ["AZURE_AI_PROJECT_ENDPOINT"]
+		return AgentsClient(endpoint=endpoint, credential=credential, transport=self.aio_transport(), **kwargs)
+
+	# --- sync azure-core ---
+
+	def requests_session(self) -> requests.Session:
+		with self._lock:
+			if self._requests_session is None:
+				self._adapter = _MeteredAdapter(self.metrics["requests"], self.max_per_host)
+				session = requests.Session()
+				session.mount("https://", self._adapter)
+				session.mount("http://", self._adapter)
+				self._requests_session = session
+			return self._requests_session
+
+	def sync_transport(self) -> RequestsTransport:
+		return RequestsTransport(session=self.requests_session(), session_owner=False)
+
+	def project_client(self, endpoint: str, credential: Any, **kwargs: Any) -> AIProjectClient:
+		return AIProjectClient(endpoint=endpoint, credential=credential, transport=self.sync_transport(), **kwargs)
+
+	# --- openai (httpx) ---
+
+	def _httpx_options(self) -> Dict[str, Any]:
+		# Event hooks only see requests that got a response; the transport also sees failures
+		limits = httpx.Limits(
+			max_connections=self.max_connections,
+			max_keepalive_connections=self.max_per_host,
+			keepalive_expiry=self.keepalive,
+		)
+		return {"metrics": self.metrics["httpx"], "limits": limits, "http2": self.http2}
+
+	def openai_client(self, project_client: Any) -> Any:
+		"""
+		`project_client.get_openai_client()` rebound to the shared httpx pool.
+
+		`get_openai_client` always passes its own `http_client`, so the pool is
+		swapped in with `with_options` rather than as a keyword argument.
+		"""
+		return project_client.get_openai_client().with_options(http_client=self.httpx_client())
+
+	def httpx_client(self) -> httpx.Client:
+		"""Shared sync httpx client (see `openai_client`)."""
+		with self._lock:
+			if self._httpx is None:
+				self._httpx = httpx.Client(transport=_MeteredHTTPTransport(**self._httpx_options()))
+			return self._httpx
+
+	def async_httpx_client(self) -> httpx.AsyncClient:
+		"""For `AsyncOpenAI(http_client=...)` or `.with_options(http_client=...)`; one per event loop."""
+		loop = asyncio.get_running_loop()
+		client = self._async_httpx.get(loop)
+		if client is None or client.is_closed:
+			client = httpx.AsyncClient(transport=_MeteredAsyncHTTPTransport(**self._httpx_options()))
+			self._async_httpx[loop] = client
+		return client
+
+	# --- metrics / lifecycle ---
+
+	def snapshot(self) -> Dict[str, Dict[str, Any]]:
+		if self._adapter is not None:
+			self._adapter.refresh_connection_counts()
+		return {kind: metrics.snapshot() for kind, metrics in self.metrics.items() if metrics.requests}
+
+	def format_metrics(self) -> str:
+		if self._adapter is not None:
+			self._adapter.refresh_connection_counts()
+		lines = [metrics.format() for metrics in self.metrics.values() if metrics.requests]
+		return "\n".join(lines) or "no requests through the shared transports"
+
+	@asynccontextmanager
+	async def scope(self) -> AsyncIterator["SharedTransports"]:
+		"""
+		Keep the running loop's async pools open while in use; the last scope to
+		exit on a loop closes them, so concurrent users never close each other's pool.
+		"""
+		loop = asyncio.get_running_loop()
+		self._scopes[loop] = self._scopes.get(loop, 0) + 1
+		try:
+			yield self
+		finally:
+			self._scopes[loop] -= 1
+			if not self._scopes[loop]:
+				del self._scopes[loop]
+				await self.aclose()
+
+	async def aclose(self) -> None:
+		"""Close the running loop's async pools now, whoever else is using them (see `scope`)."""
+		loop = asyncio.get_running_loop()
+		session = self._sessions.pop(loop, None)
+		if session is not None:
+			await session.close()
+		client = self._async_httpx.pop(loop, None)
+		if client is not None:
+			await client.aclose()
+
+	def close(self) -> None:
+		with self._lock:
+			if self._requests_session is not None:
+				self._requests_session.close()
+				self._requests_session = None
+				self._adapter = None
+			if self._httpx is not None:
+				self._httpx.close()
+				self._httpx = None
+
+
+_default: Optional[SharedTransports] = None
+_default_lock = threading.Lock()
+
+
+def shared_transports(**settings: Any) -> SharedTransports:
+	"""
+	The process-wide `SharedTransports`, created on first call.
+
+	Settings (`max_connections`, `max_per_host`, `keepalive`, `dns_ttl`, `http2`)
+	only apply to that first call; later calls return the same instance.
+	"""
+	global _default
+	with _default_lock:
+		if _default is None:
+			_default = SharedTransports(**settings)
+		return _default
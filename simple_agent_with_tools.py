@@ -6,8 +6,13 @@ from azure.identity.aio import AzureCliCredential
 from agent_framework.azure import AzureAIAgentClient
 from agent_framework import ai_function
 
+from credential_cache import CachedAsyncCredential
+from tool_executor import ToolExecutor
+from tool_memo import memoize_tool
+
 
 @ai_function
+@memoize_tool(ttl=60)
 def GetWeather(city: Annotated[str, "City name to check weather for"]) -> Annotated[str, "Returns the current weather summary for the given city."]:
 	"""Simple tool function used by the agent.
 
@@ -25,7 +30,7 @@ async def simple_agent_with_tools(
 ) -> None:
 	"""Python equivalent of the C# SimpleAgentWitTools sample.
 
-	- Creates an agent with a Python function tool (`GetWeather`)
+	- Creates an agent with a Python function tool (`GetWeather`), run off the event loop
 	- Runs the agent once and prints the response
 	- Cleans up the agent automatically via async context manager
 	"""
@@ -37,17 +42,19 @@ async def simple_agent_with_tools(
 	)
 	os.environ.setdefault("AZURE_AI_MODEL_DEPLOYMENT_NAME", deployment_name)
 
-	async with AzureCliCredential() as credential:
+	async with CachedAsyncCredential(AzureCliCredential()) as credential:
 		client = AzureAIAgentClient(credential=credential)
 
-		# Create the agent with the tool; use provided name/instructions
-		async with client.create_agent(
-			name=joker_name or "WeatherAgent",
-			instructions=joker_instructions or "You are a helpful assistant",
-			tools=[GetWeather],
-		) as agent:
-			response = await agent.run("What is the weather like in Amsterdam?")
-			print(response.text or "<no assistant reply>")
+		# Run sync tools on a thread pool so parallel tool calls don't block the event loop
+		with ToolExecutor(max_threads=4, default_timeout=30) as tool_executor:
+			# Create the agent with the tool; use provided name/instructions
+			async with client.create_agent(
+				name=joker_name or "WeatherAgent",
+				instructions=joker_instructions or "You are a helpful assistant",
+				tools=[tool_executor.wrap(GetWeather)],
+			) as agent:
+				response = await agent.run("What is the weather like in Amsterdam?")
+				print(response.text or "<no assistant reply>")
 
 
 def main() -> None:
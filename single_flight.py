@@ -0,0 +1,197 @@
+import asyncio
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Generic, List, Optional, TypeVar
+
+from agent_framework._middleware import AgentRunContext, agent_middleware
+
+from response_cache import cache_key
+
+
+T = TypeVar("T")
+
+
+class _Flight(Generic[T]):
+	"""One upstream call and everyone waiting on it."""
+
+	__slots__ = ("task", "waiters", "items", "done", "changed")
+
+	def __init__(self) -> None:
+		self.task: Optional[asyncio.Task] = None
+		self.waiters = 0
+		# Streams only: every item so far, so late joiners replay the reply from the start
+		self.items: List[Any] = []
+		self.done = False
+		self.changed = asyncio.Event()
+
+	def push(self, item: Any) -> None:
+		self.items.append(item)
+		self.changed.set()
+
+
+class SingleFlight:
+	"""
+	Coalesces identical in-flight calls: the first caller for a key runs it, the
+	rest wait for the same result.
+
+	- `do(key, fn)` shares one awaited result; `stream(key, start)` shares one
+	  upstream stream and replays it to every subscriber, whenever it joined
+	- The upstream call runs in its own task, so a waiter leaving (cancelled,
+	  or a stream consumer stopping early) does not affect the others; when the
+	  last waiter leaves, the upstream call is cancelled
+	- Only calls in flight are shared: once a call finishes its key is free again
+	  (see `response_cache` for reuse across time)
+	- Every waiter gets the same result object; treat it as read-only
+	"""
+
+	def __init__(self) -> None:
+		self._flights: Dict[str, _Flight] = {}
+		self.calls = 0
+		self.upstream = 0
+		self.coalesced = 0
+		self.cancelled = 0
+
+	def _join(self, key: str, start: Callable[[_Flight], Awaitable[Any]]) -> _Flight:
+		self.calls += 1
+		flight = self._flights.get(key)
+		if flight is None:
+			flight = self._flights[key] = _Flight()
+			self.upstream += 1
+			flight.task = asyncio.create_task(start(flight))
+			flight.task.add_done_callback(lambda _: self._land(key, flight))
+		else:
+			self.coalesced += 1
+		flight.waiters += 1
+		return flight
+
+	def _land(self, key: str, flight: _Flight) -> None:
+		flight.done = True
+		flight.changed.set()
+		if self._flights.get(key) is flight:
+			del self._flights[key]
+		if not flight.task.cancelled():
+			# Retrieve the exception so an unobserved failure does not log a warning
+			flight.task.exception()
+
+	def _leave(self, key: str, flight: _Flight) -> None:
+		flight.waiters -= 1
+		if flight.waiters == 0 and not flight.done:
+			self.cancelled += 1
+			if self._flights.get(key) is flight:
+				# A caller arriving now starts fresh instead of joining a cancelled call
+				del self._flights[key]
+			flight.task.cancel()
+
+	async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+		"""`await fn()`, shared with every concurrent `do` for the same `key`."""
+
+		async def start(flight: _Flight) -> T:
+			return await fn()
+
+		flight = self._join(key, start)
+		try:
+			return await asyncio.shield(flight.task)
+		finally:
+			self._leave(key, flight)
+
+	async def stream(self, key: str, start: Callable[[], AsyncIterable[T]]) -> AsyncIterator[T]:
+		"""Iterate `start()`, shared with every concurrent `stream` for the same `key`."""
+
+		async def pump(flight: _Flight) -> None:
+			async for item in start():
+				flight.push(item)
+
+		flight = self._join(key, pump)
+		index = 0
+		try:
+			while True:
+				if index < len(flight.items):
+					item = flight.items[index]
+					index += 1
+					yield item
+					continue
+				if flight.done:
+					if not flight.task.cancelled() and flight.task.exception() is not None:
+						raise flight.task.exception()
+					return
+				flight.changed.clear()
+				await flight.changed.wait()
+		finally:
+			self._leave(key, flight)
+
+	def stats(self) -> Dict[str, int]:
+		return {
+			"calls": self.calls,
+			"upstream": self.upstream,
+			"coalesced": self.coalesced,
+			"cancelled": self.cancelled,
+			"in_flight": len(self._flights),
+		}
+
+
+# Run kwargs the framework adds itself: fresh objects on every run, not user options
+_INTERNAL_KWARGS = frozenset({"middleware"})
+
+
+def run_key(context: AgentRunContext, scope: Optional[str] = None) -> str:
+	"""
+	Key for one agent run: agent identity (or `scope`), messages, the agent's
+	options, the caller's run options and whether it streams.
+
+	Framework-internal kwargs (`_`-prefixed, `middleware`) are left out: they
+	differ on every run and would make identical runs never match.
+	"""
+	agent = context.agent
+	options = getattr(agent, "chat_options", None)
+	identity = scope or getattr(agent, "id", None) or getattr(agent, "name", None) or repr(agent)
+	run_options = {
+		name: value
+		for name, value in (context.kwargs or {}).items()
+		if not name.startswith("_") and name not in _INTERNAL_KWARGS
+	}
+	kwargs = json.dumps(run_options, sort_keys=True, default=repr)
+	mode = "stream" if context.is_streaming else "run"
+	return cache_key(context.messages, options, scope=f"{identity}|{mode}|{kwargs}")
+
+
+def single_flight_middleware(flights: SingleFlight, scope: Optional[str] = None):
+	"""
+	Build an agent middleware that coalesces identical concurrent runs through `flights`.
+
+	Runs are keyed by `run_key`; pass `scope` (e.g. the agent name) to share
+	flights across equivalent agents such as pooled copies. Runs on an explicit
+	thread pass through untouched: their reply must be recorded on that thread.
+	"""
+
+	@agent_middleware
+	async def SingleFlightMiddleware(context: AgentRunContext, next):
+		if context.thread is not None:
+			await next(context)
+			return
+
+		key = run_key(context, scope)
+		# The upstream call gets its own context: the caller that starts it may leave early
+		upstream = AgentRunContext(
+			agent=context.agent,
+			messages=list(context.messages),
+			is_streaming=context.is_streaming,
+			metadata=dict(context.metadata or {}),
+			kwargs=dict(context.kwargs or {}),
+		)
+
+		if not context.is_streaming:
+
+			async def run() -> Any:
+				await next(upstream)
+				return upstream.result
+
+			context.result = await flights.do(key, run)
+			return
+
+		async def start() -> AsyncIterator[Any]:
+			await next(upstream)
+			async for update in upstream.result:
+				yield update
+
+		context.result = flights.stream(key, start)
+
+	return SingleFlightMiddleware
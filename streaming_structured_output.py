@@ -0,0 +1,214 @@
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Generic, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_CLOSERS = {"{": "}", "[": "]"}
+_SCALAR_END = set(",}] \t\r\n")
+
+
+class PartialJsonParser:
+	"""
+	Incremental JSON scanner that can return the longest complete prefix as a value.
+
+	Each `feed` is O(len(chunk)): the scanner tracks container nesting, string and
+	escape state, and remembers the last "cut point" — a position right after a
+	complete value — together with the closers needed there. `snapshot()` then
+	parses `buffer[:cut] + closers`, so strings and numbers are never half-read.
+
+	Anything before the first `{` or `[` or after the matching close (e.g. a
+	Markdown fence) is ignored.
+	"""
+
+	def __init__(self) -> None:
+		self._chars: List[str] = []
+		self._stack: List[str] = []
+		# Per open object: True while the next string is a key
+		self._expect_key: List[bool] = []
+		self._in_string = False
+		self._escape = False
+		self._in_scalar = False
+		self._started = False
+		self._cut: Optional[Tuple[int, str]] = None
+		self._emitted_cut = -1
+
+	@property
+	def text(self) -> str:
+		return "".join(self._chars)
+
+	@property
+	def complete(self) -> bool:
+		return self._started and not self._stack and not self._in_string
+
+	def _mark_cut(self) -> None:
+		closers = "".join(_CLOSERS[c] for c in reversed(self._stack))
+		self._cut = (len(self._chars), closers)
+
+	def _value_done(self) -> None:
+		if self._stack and self._stack[-1] == "{":
+			self._expect_key[-1] = True
+		self._mark_cut()
+
+	def feed(self, chunk: str) -> None:
+		for ch in chunk:
+			if not self._started:
+				if ch not in _CLOSERS:
+					continue
+				self._started = True
+			elif self.complete:
+				# Ignore anything after the top-level value (closing fence, trailing text)
+				break
+			if self._in_scalar and ch in _SCALAR_END:
+				self._in_scalar = False
+				self._value_done()
+			self._chars.append(ch)
+
+			if self._in_string:
+				if self._escape:
+					self._escape = False
+				elif ch == "\\":
+					self._escape = True
+				elif ch == '"':
+					self._in_string = False
+					if self._stack and self._stack[-1] == "{" and self._expect_key[-1]:
+						self._expect_key[-1] = False
+					else:
+						self._value_done()
+				continue
+
+			if ch == '"':
+				self._in_string = True
+			elif ch in _CLOSERS:
+				self._stack.append(ch)
+				self._expect_key.append(ch == "{")
+				self._mark_cut()
+			elif ch in "}]":
+				if self._stack:
+					self._stack.pop()
+					self._expect_key.pop()
+				self._value_done()
+			elif ch == ",":
+				# Drop the comma from the cut: the prefix stays valid JSON
+				pass
+			elif ch not in ": \t\r\n":
+				self._in_scalar = True
+
+	def snapshot(self) -> Optional[Any]:
+		"""The parsed complete prefix if it grew since the last call, else None."""
+		if self._cut is None or self._cut[0] == self._emitted_cut:
+			return None
+		index, closers = self._cut
+		self._emitted_cut = index
+		try:
+			return json.loads("".join(self._chars[:index]) + closers)
+		except json.JSONDecodeError:
+			return None
+
+
+class PartialModelValidator(Generic[ModelT]):
+	"""
+	Validate whichever fields of `model` are present, one `TypeAdapter` per field.
+
+	Missing required fields do not fail the snapshot; a field whose complete value
+	does not validate is left out (and retried on later snapshots).
+	"""
+
+	def __init__(self, model: Type[ModelT]) -> None:
+		self.model = model
+		self._adapters: Dict[str, Tuple[str, TypeAdapter]] = {}
+		for name, info in model.model_fields.items():
+			self._adapters[info.alias or name] = (name, TypeAdapter(info.annotation))
+
+	def validate(self, data: Any) -> Tuple[ModelT, Tuple[str, ...]]:
+		values: Dict[str, Any] = {}
+		if isinstance(data, dict):
+			for key, raw in data.items():
+				adapter = self._adapters.get(key)
+				if adapter is None:
+					continue
+				name, type_adapter = adapter
+				try:
+					values[name] = type_adapter.validate_python(raw)
+				except ValidationError:
+					continue
+		return self.model.model_construct(**values), tuple(values)
+
+
+@dataclass
+class PartialSnapshot(Generic[ModelT]):
+	"""
+	One step of a streamed structured response.
+
+	- `value`: model built from the fields complete so far (final one is fully validated)
+	- `fields`: field names present in `value`; `new_fields` arrived in this step
+	- `field_times`: seconds from the request to each field's arrival
+	"""
+
+	value: ModelT
+	fields: Tuple[str, ...]
+	new_fields: Tuple[str, ...]
+	elapsed: float
+	field_times: Dict[str, float] = field(default_factory=dict)
+	time_to_first_token: Optional[float] = None
+	done: bool = False
+	text: str = ""
+
+	@property
+	def time_to_first_field(self) -> Optional[float]:
+		return min(self.field_times.values()) if self.field_times else None
+
+
+async def stream_structured(
+	agent,
+	messages,
+	response_format: Type[ModelT],
+	**kwargs: Any,
+) -> AsyncIterator[PartialSnapshot[ModelT]]:
+	"""
+	Streaming counterpart of `agent.run(messages, response_format=...)`.
+
+	Yields a `PartialSnapshot` every time at least one more field of
+	`response_format` is complete, then a final `done=True` snapshot validated
+	against the whole model (raising `ValidationError` if the full output is invalid).
+
+		async for snap in stream_structured(agent, messages, PersonInfo):
+			if "name" in snap.new_fields:
+				start_lookup(snap.value.name)
+	"""
+	parser = PartialJsonParser()
+	validator = PartialModelValidator(response_format)
+	started = time.perf_counter()
+	first_token: Optional[float] = None
+	field_times: Dict[str, float] = {}
+
+	async for update in agent.run_stream(messages, response_format=response_format, **kwargs):
+		chunk = update.text
+		if not chunk:
+			continue
+		if first_token is None:
+			first_token = time.perf_counter() - started
+		parser.feed(chunk)
+		data = parser.snapshot()
+		if data is None:
+			continue
+		value, present = validator.validate(data)
+		new_fields = tuple(name for name in present if name not in field_times)
+		if not new_fields:
+			continue
+		now = time.perf_counter() - started
+		for name in new_fields:
+			field_times[name] = now
+		yield PartialSnapshot(value, present, new_fields, now, dict(field_times), first_token, text=parser.text)
+
+	final = response_format.model_validate_json(parser.text or "{}")
+	present = tuple(name for name in response_format.model_fields if name in final.model_fields_set)
+	new_fields = tuple(name for name in present if name not in field_times)
+	now = time.perf_counter() - started
+	for name in new_fields:
+		field_times[name] = now
+	yield PartialSnapshot(final, present, new_fields, now, dict(field_times), first_token, done=True, text=parser.text)
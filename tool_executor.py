@@ -0,0 +1,108 @@
+import asyncio
+import functools
+import importlib
+import inspect
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from agent_framework import ai_function
+
+
+def _call_by_reference(module: str, qualname: str, kwargs: Dict[str, Any]) -> Any:
+	"""Process-pool trampoline: re-resolve the tool in the worker so `@ai_function` objects need not pickle."""
+	target: Any = importlib.import_module(module)
+	for part in qualname.split("."):
+		target = getattr(target, part)
+	target = getattr(target, "func", target)
+	return target(**kwargs)
+
+
+class ToolExecutor:
+	"""
+	Runs tool functions without blocking the event loop.
+
+	- Async tools are awaited directly, so several tool calls from one model turn
+	  (which the framework gathers) run concurrently
+	- Sync tools are pushed to a bounded thread pool (`max_threads`)
+	- Tools marked `cpu_bound=True` go to a process pool (`max_processes`), which
+	  sidesteps the GIL; they must be importable module-level functions
+	- Every call can carry a timeout; a timed-out thread keeps running in the
+	  background, but the model gets the `TimeoutError` straight away
+	"""
+
+	def __init__(
+		self,
+		max_threads: int = 8,
+		max_processes: int = 0,
+		default_timeout: Optional[float] = None,
+	) -> None:
+		self.default_timeout = default_timeout
+		self._threads = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="tool")
+		self._processes = ProcessPoolExecutor(max_workers=max_processes) if max_processes > 0 else None
+
+	async def invoke(
+		self,
+		func: Callable[..., Any],
+		kwargs: Dict[str, Any],
+		timeout: Optional[float] = None,
+		cpu_bound: bool = False,
+	) -> Any:
+		timeout = self.default_timeout if timeout is None else timeout
+		raw = getattr(func, "func", func)
+		if inspect.iscoroutinefunction(raw):
+			call = raw(**kwargs)
+		else:
+			loop = asyncio.get_running_loop()
+			if cpu_bound:
+				if self._processes is None:
+					raise RuntimeError("cpu_bound tools need ToolExecutor(max_processes > 0)")
+				call = loop.run_in_executor(
+					self._processes, _call_by_reference, raw.__module__, raw.__qualname__, kwargs
+				)
+			else:
+				call = loop.run_in_executor(self._threads, functools.partial(raw, **kwargs))
+		if timeout is None:
+			return await call
+		return await asyncio.wait_for(call, timeout)
+
+	def wrap(self, tool: Any, timeout: Optional[float] = None, cpu_bound: bool = False) -> Any:
+		"""
+		Return an async version of `tool` that runs through this executor.
+
+		Plain functions come back as async functions with the same signature and
+		docstring; `@ai_function` tools come back as `@ai_function` tools with the
+		same name and description, so samples can pass them to `tools=[...]` unchanged.
+		"""
+		raw = getattr(tool, "func", tool)
+
+		@functools.wraps(raw)
+		async def _run(*args: Any, **kwargs: Any) -> Any:
+			if args:
+				kwargs = inspect.signature(raw).bind(*args, **kwargs).arguments
+			return await self.invoke(raw, kwargs, timeout=timeout, cpu_bound=cpu_bound)
+
+		if raw is tool:
+			return _run
+		return ai_function(name=tool.name, description=tool.description)(_run)
+
+	async def run_all(
+		self,
+		calls: Iterable[Tuple[Callable[..., Any], Dict[str, Any]]],
+		timeout: Optional[float] = None,
+	) -> List[Any]:
+		"""Run several tool calls concurrently; failures are returned in place as exceptions."""
+		return await asyncio.gather(
+			*(self.invoke(func, kwargs, timeout=timeout) for func, kwargs in calls),
+			return_exceptions=True,
+		)
+
+	def shutdown(self, wait: bool = True) -> None:
+		self._threads.shutdown(wait=wait)
+		if self._processes is not None:
+			self._processes.shutdown(wait=wait)
+
+	def __enter__(self) -> "ToolExecutor":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.shutdown()
@@ -0,0 +1,181 @@
+import asyncio
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "joined", "maxsize", "currsize"])
+
+
+def _freeze(value: Any) -> Hashable:
+	if isinstance(value, str):
+		return value.strip()
+	if isinstance(value, dict):
+		return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+	if isinstance(value, (list, tuple)):
+		return tuple(_freeze(v) for v in value)
+	if isinstance(value, set):
+		return frozenset(_freeze(v) for v in value)
+	return value
+
+
+class _TtlCache:
+	def __init__(self, ttl: Optional[float], maxsize: int) -> None:
+		self.ttl = ttl
+		self.maxsize = maxsize
+		self.entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+		self.joined = 0
+
+	def get(self, key: Hashable) -> Tuple[bool, Any]:
+		entry = self.entries.get(key)
+		if entry is not None:
+			if entry[0] > time.monotonic():
+				self.entries.move_to_end(key)
+				self.hits += 1
+				return True, entry[1]
+			del self.entries[key]
+		return False, None
+
+	def put(self, key: Hashable, value: Any) -> None:
+		expires_at = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+		self.entries[key] = (expires_at, value)
+		self.entries.move_to_end(key)
+		while len(self.entries) > self.maxsize:
+			self.entries.popitem(last=False)
+
+	def info(self) -> CacheInfo:
+		return CacheInfo(self.hits, self.misses, self.joined, self.maxsize, len(self.entries))
+
+
+def memoize_tool(
+	ttl: Optional[float] = 60.0,
+	maxsize: int = 256,
+	normalize: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+	"""
+	Memoize a tool function per normalized argument tuple.
+
+	Apply it underneath `@ai_function` so the tool's name, docstring and
+	annotated signature are unchanged:
+
+		@ai_function
+		@memoize_tool(ttl=60)
+		def GetWeather(city: Annotated[str, "..."]) -> str: ...
+
+	- Arguments are bound to the signature with defaults applied, so `f("x")` and
+	  `f(city="x")` share an entry; strings are whitespace-stripped and containers
+	  frozen. `normalize` can rewrite the bound arguments further (e.g. casefold)
+	- Results live for `ttl` seconds in an LRU of `maxsize` entries; exceptions are not cached
+	- Concurrent identical calls share one execution (async and threaded callers alike)
+	- `cache_info()` reports hits, misses, joined in-flight calls and size; `cache_clear()` empties it
+	"""
+
+	def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+		signature = inspect.signature(func)
+		cache = _TtlCache(ttl, maxsize)
+
+		def _key(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Hashable:
+			bound = signature.bind(*args, **kwargs)
+			bound.apply_defaults()
+			arguments = dict(bound.arguments)
+			if normalize is not None:
+				arguments = normalize(arguments)
+			return _freeze(arguments)
+
+		if inspect.iscoroutinefunction(func):
+			inflight: Dict[Hashable, asyncio.Future] = {}
+
+			@functools.wraps(func)
+			async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+				key = _key(args, kwargs)
+				found, value = cache.get(key)
+				if found:
+					return value
+				pending = inflight.get(key)
+				if pending is not None:
+					cache.joined += 1
+					try:
+						return await asyncio.shield(pending)
+					except asyncio.CancelledError:
+						# The call we joined was cancelled, not us: run it ourselves
+						task = asyncio.current_task()
+						if pending.cancelled() and not getattr(task, "cancelling", lambda: 0)():
+							return await async_wrapper(*args, **kwargs)
+						raise
+				cache.misses += 1
+				pending = asyncio.get_running_loop().create_future()
+				inflight[key] = pending
+				try:
+					value = await func(*args, **kwargs)
+				except asyncio.CancelledError:
+					pending.cancel()
+					raise
+				except BaseException as exc:
+					pending.set_exception(exc)
+					pending.exception()
+					raise
+				finally:
+					inflight.pop(key, None)
+				cache.put(key, value)
+				pending.set_result(value)
+				return value
+
+			wrapper = async_wrapper
+		else:
+			lock = threading.Lock()
+			inflight_events: Dict[Hashable, Tuple[threading.Event, list]] = {}
+
+			@functools.wraps(func)
+			def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
+				key = _key(args, kwargs)
+				with lock:
+					found, value = cache.get(key)
+					if found:
+						return value
+					waiting = inflight_events.get(key)
+					if waiting is None:
+						cache.misses += 1
+						waiting = (threading.Event(), [])
+						inflight_events[key] = waiting
+						owner = True
+					else:
+						cache.joined += 1
+						owner = False
+				event, outcome = waiting
+				if not owner:
+					event.wait()
+					ok, value = outcome[0]
+					if ok:
+						return value
+					raise value
+				try:
+					value = func(*args, **kwargs)
+				except BaseException as exc:
+					outcome.append((False, exc))
+					raise
+				else:
+					outcome.append((True, value))
+					with lock:
+						cache.put(key, value)
+					return value
+				finally:
+					with lock:
+						inflight_events.pop(key, None)
+					event.set()
+
+			wrapper = sync_wrapper
+
+		def cache_clear() -> None:
+			cache.entries.clear()
+			cache.hits = cache.misses = cache.joined = 0
+
+		wrapper.cache_info = cache.info
+		wrapper.cache_clear = cache_clear
+		return wrapper
+
+	return decorator
@@ -6,8 +6,12 @@ from azure.identity.aio import AzureCliCredential
 from agent_framework.azure import AzureAIAgentClient
 from agent_framework import ai_function
 
+from credential_cache import CachedAsyncCredential
+from tool_memo import memoize_tool
+
 
 @ai_function
+@memoize_tool(ttl=60)
 def get_weather(
 	location: Annotated[str, "City name to get the forecast for"],
 	unit: Annotated[str, "Temperature unit: celsius or fahrenheit"] = "celsius",
@@ -25,7 +29,7 @@ async def using_agent_as_a_function(deployment_name: str) -> None:
 	)
 	os.environ.setdefault("AZURE_AI_MODEL_DEPLOYMENT_NAME", deployment_name)
 
-	async with AzureCliCredential() as credential:
+	async with CachedAsyncCredential(AzureCliCredential()) as credential:
 		client = AzureAIAgentClient(credential=credential)
 
 		# Create the weather agent with the python function tool
@@ -1,15 +1,25 @@
 import asyncio
 import os
 from contextlib import AsyncExitStack
+from typing import Optional
 
 from azure.identity.aio import AzureCliCredential
 from agent_framework.azure import AzureAIAgentClient
-from agent_framework import ConcurrentBuilder, WorkflowOutputEvent
+from agent_framework import WorkflowOutputEvent
 
+from credential_cache import CachedAsyncCredential
+from quorum_fan_in import FINAL_SOURCE_ID, QuorumConcurrentBuilder
+from rate_limiter import deployment_limiter
+from shared_transport import shared_transports
 
-async def workflow_concurrent_fan_in_fan_out(deployment_name: str) -> None:
+
+async def workflow_concurrent_fan_in_fan_out(
+    deployment_name: str,
+    first_k: Optional[int] = None,
+    deadline: Optional[float] = None,
+) -> None:
     # Auth via Azure CLI: ensure you've run `az login` first.
-    async with AzureCliCredential() as credential:
+    async with CachedAsyncCredential(AzureCliCredential()) as credential:
         # Ensure endpoint + model are available for the client
         os.environ.setdefault(
             "AZURE_AI_PROJECT_ENDPOINT",
@@ -17,11 +27,18 @@ async def workflow_concurrent_fan_in_fan_out(deployment_name: str) -> None:
         )
         os.environ.setdefault("AZURE_AI_MODEL_DEPLOYMENT_NAME", deployment_name)
 
-        # Create client (reads env vars above)
-        client = AzureAIAgentClient(credential=credential)
+        # Create client (reads env vars above) on the process-wide connection pool
+        transports = shared_transports()
+        client = AzureAIAgentClient(agents_client=transports.agents_client(credential), credential=credential)
+
+        # Both participants call the same deployment, so they share its limiter:
+        # one RPM/TPM budget, one AIMD concurrency window, one Retry-After pause.
+        limiter = deployment_limiter(deployment_name)
 
         # Create both agents as context-managed resources (auto-cleanup on exit).
         async with AsyncExitStack() as stack:
+            # Entered first so the pool outlives the agents' cleanup
+            await stack.enter_async_context(transports.scope())
             chemist = await stack.enter_async_context(
                 client.create_agent(
                     name="chemistryAgent",
@@ -29,6 +46,7 @@ async def workflow_concurrent_fan_in_fan_out(deployment_name: str) -> None:
                     # Some versions infer the deployment from env vars:
                     # AZURE_AI_PROJECT_ENDPOINT / AZURE_AI_MODEL_DEPLOYMENT_NAME
                     # If your client supports explicit param, add: model_deployment_name=deployment_name
+                    middleware=[limiter.agent_middleware()],
                 )
             )
             physicist = await stack.enter_async_context(
@@ -36,6 +54,7 @@ async def workflow_concurrent_fan_in_fan_out(deployment_name: str) -> None:
                     name="physicistAgent",
                     instructions="You are an expert in chemistry. You answer questions from a chemistry perspective",
                     # model_deployment_name=deployment_name
+                    middleware=[limiter.agent_middleware()],
                 )
             )
 
@@ -48,18 +67,31 @@ async def workflow_concurrent_fan_in_fan_out(deployment_name: str) -> None:
                 )
 
             # Build concurrent fan-out/fan-in workflow with a custom aggregator.
+            # Partial results stream as each agent finishes; with first_k/deadline set,
+            # the workflow completes on a quorum and cancels the stragglers.
             workflow = (
-                ConcurrentBuilder()
+                QuorumConcurrentBuilder()
                 .participants([physicist, chemist])
                 .with_aggregator(aggregate)
+                .with_quorum(first_k=first_k, deadline=deadline)
                 .build()
             )
 
-            # Stream execution; print final aggregated output.
+            # Stream execution; print partial and final aggregated output.
             async for evt in workflow.run_stream("What is temperature?"):
                 if isinstance(evt, WorkflowOutputEvent):
-                    print(f"Workflow completed with results:\n{evt.data}")
+                    if evt.source_executor_id == FINAL_SOURCE_ID:
+                        print(f"Workflow completed with results:\n{evt.data}")
+                    else:
+                        print(f"{evt.source_executor_id} finished.")
 
+            print(f"HTTP pool: {transports.format_metrics()}")
+            print(f"Rate limiter: {limiter.format_stats()}")
 
-if __name__ == "__main__":
+
+def main() -> None:
     asyncio.run(workflow_concurrent_fan_in_fan_out("gpt-4.1"))
+
+
+if __name__ == "__main__":
+    main()